@@ -0,0 +1,191 @@
+"""Pooled HTTP clients used to reach other NApps."""
+import asyncio
+import time
+from collections import defaultdict
+from threading import Lock
+from urllib.parse import urlsplit
+
+import httpx
+
+from napps.kytos.mef_eline import settings
+
+
+def _client_kwargs(service: str) -> dict:
+    """Return the httpx client limits and timeout of a service."""
+    config = {
+        **settings.HTTP_CLIENTS.get("default", {}),
+        **settings.HTTP_CLIENTS.get(service, {}),
+    }
+    limits = httpx.Limits(
+        max_connections=config.get("max_connections"),
+        max_keepalive_connections=config.get("max_keepalive_connections"),
+        keepalive_expiry=config.get("keepalive_expiry", 5),
+    )
+    return {"limits": limits, "timeout": config.get("timeout", 30)}
+
+
+class LatencyStats:
+    """Latency stats of requests per endpoint."""
+
+    def __init__(self) -> None:
+        self._stats_lock = Lock()
+        self._stats = defaultdict(
+            lambda: {"count": 0, "errors": 0, "total": 0.0, "max": 0.0}
+        )
+
+    @staticmethod
+    def endpoint(method: str, url: str) -> str:
+        """Return the endpoint of a request, without its query string."""
+        return f"{method.upper()} {urlsplit(str(url)).path}"
+
+    def record(self, endpoint: str, elapsed: float, failed: bool) -> None:
+        """Record the latency of a request."""
+        with self._stats_lock:
+            stats = self._stats[endpoint]
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+
+    def get_stats(self) -> dict[str, dict]:
+        """Return count, errors, avg and max latency (s) per endpoint."""
+        with self._stats_lock:
+            return {
+                endpoint: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "avg": stats["total"] / stats["count"],
+                    "max": stats["max"],
+                }
+                for endpoint, stats in self._stats.items()
+            }
+
+
+class HTTPClient(LatencyStats):
+    """Keep-alive HTTP client of a service with per endpoint latency stats.
+
+    The requests mirror the httpx module functions, so a client can be used
+    in place of them. The connection pool limits and the default timeout are
+    taken from settings.HTTP_CLIENTS[service].
+    """
+
+    def __init__(self, service: str) -> None:
+        super().__init__()
+        self.service = service
+        self._client = httpx.Client(**_client_kwargs(service))
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether the client has been closed."""
+        return self._client.is_closed
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request recording its latency."""
+        endpoint = self.endpoint(method, url)
+        start = time.monotonic()
+        failed = True
+        try:
+            response = self._client.request(method, url, **kwargs)
+            failed = response.is_error
+            return response
+        finally:
+            self.record(endpoint, time.monotonic() - start, failed)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        """Send a POST request."""
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> httpx.Response:
+        """Send a PUT request."""
+        return self.request("PUT", url, **kwargs)
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self._client.close()
+
+
+class AsyncHTTPClient(LatencyStats):
+    """Asynchronous counterpart of HTTPClient.
+
+    It must be created and used on a single event loop.
+    """
+
+    def __init__(self, service: str) -> None:
+        super().__init__()
+        self.service = service
+        self.loop = asyncio.get_running_loop()
+        self._client = httpx.AsyncClient(**_client_kwargs(service))
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether the client has been closed."""
+        return self._client.is_closed
+
+    async def request(
+        self, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        """Send a request recording its latency."""
+        endpoint = self.endpoint(method, url)
+        start = time.monotonic()
+        failed = True
+        try:
+            response = await self._client.request(method, url, **kwargs)
+            failed = response.is_error
+            return response
+        finally:
+            self.record(endpoint, time.monotonic() - start, failed)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self._client.aclose()
+
+
+_clients: dict[str, HTTPClient] = {}
+_async_clients: dict[str, AsyncHTTPClient] = {}
+_clients_lock = Lock()
+
+
+def get_client(service: str) -> HTTPClient:
+    """Return the shared client of a service, creating it if needed."""
+    with _clients_lock:
+        client = _clients.get(service)
+        if client is None or client.is_closed:
+            client = _clients[service] = HTTPClient(service)
+        return client
+
+
+def get_async_client(service: str) -> AsyncHTTPClient:
+    """Return the shared async client of a service on the running loop."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _async_clients.get(service)
+        if client is None or client.is_closed or client.loop is not loop:
+            client = _async_clients[service] = AsyncHTTPClient(service)
+        return client
+
+
+def get_latency_stats() -> dict[str, dict]:
+    """Return the latency stats of every client by service."""
+    with _clients_lock:
+        clients = [*_clients.values(), *_async_clients.values()]
+    stats = {}
+    for client in clients:
+        stats.setdefault(client.service, {}).update(client.get_stats())
+    return stats
+
+
+def close_clients() -> None:
+    """Close and forget every shared client.
+
+    The async clients are closed on their loops, if still running.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        async_clients = list(_async_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        client.close()
+    for client in async_clients:
+        if client.loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), client.loop)
@@ -15,6 +15,32 @@ from kytos.core.db import Mongo
 from kytos.core.retry import before_sleep, for_all_methods, retries
 from napps.kytos.mef_eline.db.models import EVCBaseDoc, EVCUpdateDoc
 
+# Fields of the EVC operational state, which change far more often than the
+# rest of its document, so they're stored in the small documents of the
+# evcs_state collection and merged into the evcs ones when read.
+# Both collections are written without a transaction, the evcs document of
+# an EVC first when it's upserted, so a failure in between, or a read in
+# between, can find an EVC without its evcs_state document or with a stale
+# one. Reads take a missing evcs_state document as the EVC state defaults,
+# e.g. an inactive EVC without paths, left to the consistency check
+EVC_STATE_FIELDS = frozenset({
+    "active", "current_path", "failover_path", "execution_rounds",
+    "flow_removed_at", "last_deployed_at", "last_removed_at", "updated_at",
+})
+# Aggregation stages merging the evcs_state document of each EVC into it.
+# State fields still in evcs, written before they were split, are overridden
+EVC_STATE_LOOKUP = [
+    {"$lookup": {
+        "from": "evcs_state",
+        "localField": "_id",
+        "foreignField": "_id",
+        "as": "state",
+    }},
+    {"$replaceWith": {
+        "$mergeObjects": ["$$ROOT", {"$arrayElemAt": ["$state", 0]}]
+    }},
+]
+
 
 @for_all_methods(
     retries,
@@ -69,6 +95,7 @@ class ELineController:
                         match_filters["$match"][key] = item
         aggregation.extend([
                 {"$sort": {"_id": 1}},
+                *EVC_STATE_LOOKUP,
                 {"$project": EVCBaseDoc.projection()},
             ]
         )
@@ -77,12 +104,39 @@ class ELineController:
 
     def get_circuit(self, circuit_id: str) -> Optional[Dict]:
         """Get a circuit."""
-        return self.db.evcs.find_one({"_id": circuit_id},
-                                     EVCBaseDoc.projection())
+        circuits = self.db.evcs.aggregate([
+            {"$match": {"_id": circuit_id}},
+            *EVC_STATE_LOOKUP,
+            {"$project": EVCBaseDoc.projection()},
+        ])
+        return next(circuits, None)
 
-    def upsert_evc(self, evc: Dict) -> Optional[Dict]:
-        """Update or insert an EVC"""
-        utc_now = datetime.utcnow()
+    def split_evc_fields(self, fields: Dict) -> tuple[Dict, Dict]:
+        """Split the fields of an EVC into the evcs and evcs_state ones."""
+        config, state = {}, {}
+        for key, value in fields.items():
+            if key in EVC_STATE_FIELDS:
+                state[key] = value
+            else:
+                config[key] = value
+        return config, state
+
+    def update_evc_state(self, evc_id: str, state: Dict) -> None:
+        """Set the state fields of an EVC in evcs_state."""
+        if state:
+            self.db.evcs_state.update_one(
+                {"_id": evc_id},
+                {"$set": {**state, "id": evc_id}},
+                upsert=True,
+            )
+
+    def get_upsert_fields(self, evc: Dict, trusted: bool = False) -> Dict:
+        """Return the validated fields upsert_evc sets.
+
+        trusted fields, built by EVC.as_document, are returned as they are.
+        """
+        if trusted:
+            return evc
         model = EVCBaseDoc(
             **{
                 **evc,
@@ -90,63 +144,145 @@ class ELineController:
             }
         ).model_dump(exclude={"inserted_at"}, exclude_none=True)
         model.setdefault("queue_id", None)
+        return model
+
+    def get_update_fields(self, evc: Dict, trusted: bool = False) -> Dict:
+        """Return the fields update_evc sets, checking for errors.
+
+        trusted fields, built by EVC.as_document, aren't checked.
+        """
+        if not trusted:
+            EVCUpdateDoc(
+                **{
+                    **evc,
+                    **{"_id": evc["id"]}
+                }
+            )
+        return evc
+
+    def upsert_evc(
+        self, evc: Dict, trusted: bool = False
+    ) -> Optional[Dict]:
+        """Update or insert an EVC.
+
+        Its evcs_state document is written after the evcs one, they aren't
+        written atomically, see EVC_STATE_FIELDS.
+        """
+        utc_now = datetime.utcnow()
+        model = self.get_upsert_fields(evc, trusted=trusted)
+        config, state = self.split_evc_fields(model)
         updated = self.db.evcs.find_one_and_update(
             {"_id": evc["id"]},
             {
-                "$set": model,
+                "$set": config,
                 "$setOnInsert": {"inserted_at": utc_now},
             },
             return_document=ReturnDocument.AFTER,
             upsert=True,
         )
-        return updated
+        self.update_evc_state(evc["id"], state)
+        return {**updated, **state} if updated else updated
 
-    def update_evc(self, evc: Dict) -> Optional[Dict]:
+    def update_evc(
+        self, evc: Dict, trusted: bool = False
+    ) -> Optional[Dict]:
         """Update an EVC.
-        This is needed to correctly set None values to fields"""
-
-        # Check for errors in fields only.
-        EVCUpdateDoc(
-            **{
-                **evc,
-                **{"_id": evc["id"]}
-            }
-        )
+        This is needed to correctly set None values to fields.
+        If only state fields are set, evcs isn't written and None is
+        returned."""
+        fields = self.get_update_fields(evc, trusted=trusted)
+        config, state = self.split_evc_fields(fields)
+        self.update_evc_state(evc["id"], state)
+        if not config.keys() - {"id", "_id"}:
+            return None
         updated = self.db.evcs.find_one_and_update(
             {"_id": evc["id"]},
             {
-                "$set": evc,
+                "$set": config,
             },
             return_document=ReturnDocument.AFTER,
         )
-        return updated
+        return {**updated, **state} if updated else updated
+
+    def write_evcs(self, writes: Dict[str, tuple[Dict, bool]]) -> int:
+        """Write the EVCs buffered by EVCWriteBehind in a single bulk.
+
+        writes maps each EVC id to the fields to set and whether it's
+        upserted. The state fields are written to evcs_state, evcs is only
+        written if other fields are set. evcs is written first, but not
+        atomically with evcs_state, see EVC_STATE_FIELDS. Return the number
+        of modified and upserted evcs documents, like update_evcs the
+        evcs_state ones aren't counted, so each EVC is counted once.
+        """
+        if not writes:
+            return 0
+        ops, state_ops = [], []
+        utc_now = datetime.utcnow()
+        for evc_id, (fields, upsert) in writes.items():
+            config, state = self.split_evc_fields(fields)
+            if state:
+                state_ops.append(UpdateOne(
+                    {"_id": evc_id},
+                    {"$set": {**state, "id": evc_id}},
+                    upsert=True,
+                ))
+            if not upsert and not config.keys() - {"id", "_id"}:
+                continue
+            update = {"$set": config}
+            if upsert:
+                update["$setOnInsert"] = {"inserted_at": utc_now}
+            ops.append(UpdateOne({"_id": evc_id}, update, upsert=upsert))
+        count = 0
+        if ops:
+            result = self.db.evcs.bulk_write(ops, ordered=False)
+            count = result.modified_count + result.upserted_count
+        if state_ops:
+            self.db.evcs_state.bulk_write(state_ops, ordered=False)
+        return count
 
-    def update_evcs(self, evcs: list[dict]) -> int:
-        """Update EVCs and return the number of modified documents."""
+    def update_evcs(self, evcs: list[dict], trusted: bool = False) -> int:
+        """Update EVCs and return the number of modified evcs documents.
+
+        The evcs_state documents written along aren't counted, so each EVC
+        is counted once.
+
+        trusted EVCs, built by EVC.as_document, are set without being
+        validated.
+        """
         if not evcs:
             return 0
 
-        ops = []
+        ops, state_ops = [], []
         utc_now = datetime.utcnow()
 
         for evc in evcs:
             evc["updated_at"] = utc_now
-            model = EVCBaseDoc(
+            model = evc if trusted else EVCBaseDoc(
                 **{
                     **evc,
                     **{"_id": evc["id"]}
                 }
             ).model_dump(exclude_none=True)
+            config, state = self.split_evc_fields(model)
             ops.append(
                 UpdateOne(
                     {"_id": evc["id"]},
                     {
-                        "$set": model,
+                        "$set": config,
                         "$setOnInsert": {"inserted_at": utc_now}
                     },
                 )
             )
-        return self.db.evcs.bulk_write(ops).modified_count
+            state_ops.append(
+                UpdateOne(
+                    {"_id": evc["id"]},
+                    {"$set": {**state, "id": evc["id"]}},
+                    upsert=True,
+                )
+            )
+        modified_count = self.db.evcs.bulk_write(ops).modified_count
+        self.db.evcs_state.bulk_write(state_ops)
+        return modified_count
 
     def update_evcs_metadata(
         self, circuit_ids: list, metadata: dict, action: str
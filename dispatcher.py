@@ -0,0 +1,202 @@
+"""Asynchronous flow mods dispatcher."""
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+import httpx
+from tenacity import (retry, retry_if_exception_type, stop_after_attempt,
+                      wait_combine, wait_fixed, wait_random)
+
+from kytos.core.retry import before_sleep
+from napps.kytos.mef_eline import settings
+from napps.kytos.mef_eline.clients import get_async_client
+from napps.kytos.mef_eline.exceptions import FlowModException
+
+
+class FlowModDispatcher:
+    """Send flow mods to flow_manager on the controller event loop.
+
+    At most settings.FLOW_MOD_MAX_CONCURRENCY requests are in flight and
+    failed requests are retried with asyncio sleeps, so a retrying flow mod
+    doesn't hold a thread nor a concurrency slot while waiting. Coroutines
+    can await asend, sync callers either wait on send or keep the future
+    returned by submit.
+
+    flows_by_switch requests can also be coalesced: requests with the same
+    method and endpoint are buffered during FLOW_MOD_COALESCE_WINDOW
+    seconds, or until FLOW_MOD_COALESCE_MAX_FLOWS flows are buffered, and
+    their flows are merged per dpid and sent in a single request.
+    """
+
+    def __init__(self) -> None:
+        self.controller = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # (method, endpoint) -> buffered (flows by dpid, future) requests
+        self._buffers: dict[tuple, list] = {}
+        self._buffered_flows: dict[tuple, int] = {}
+        self._flush_handles: dict[tuple, asyncio.TimerHandle] = {}
+        # The event loop only keeps weak references to tasks
+        self._tasks: set[asyncio.Task] = set()
+
+    def set_controller(self, controller) -> None:
+        """Set the controller whose event loop dispatches the flow mods."""
+        self.controller = controller
+        self._semaphore = None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Event loop where the flow mods are dispatched."""
+        return getattr(self.controller, "loop", None)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding the requests in flight."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(
+                settings.FLOW_MOD_MAX_CONCURRENCY
+            )
+        return self._semaphore
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_combine(wait_fixed(3), wait_random(min=2, max=7)),
+        retry=retry_if_exception_type(FlowModException),
+        before_sleep=before_sleep,
+        reraise=True,
+    )
+    async def asend(self, method: str, endpoint: str, data: dict) -> None:
+        """Send a flow_manager request, raising FlowModException on errors."""
+        await self._request(method, endpoint, data)
+
+    async def _request(self, method: str, endpoint: str, data: dict) -> None:
+        """Send a flow_manager request once, without retrying it."""
+        async with self.semaphore:
+            try:
+                res = await get_async_client("flow_manager").request(
+                    method, endpoint, json=data
+                )
+            except httpx.RequestError as err:
+                raise FlowModException(str(err)) from err
+        if res.is_server_error or res.status_code >= 400:
+            raise FlowModException(res.text)
+
+    async def acoalesce(
+        self, method: str, endpoint: str, data: dict[str, dict]
+    ) -> None:
+        """Send a flows_by_switch request coalesced with others.
+
+        It raises FlowModException if the flows of this request couldn't
+        be sent, regardless of the other requests in the same batch.
+        """
+        key = (method, endpoint)
+        future = asyncio.get_running_loop().create_future()
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append((data, future))
+        self._buffered_flows[key] = self._buffered_flows.get(key, 0) + sum(
+            len(value["flows"]) for value in data.values()
+        )
+        if self._buffered_flows[key] >= settings.FLOW_MOD_COALESCE_MAX_FLOWS:
+            self._flush(key)
+        elif key not in self._flush_handles:
+            self._flush_handles[key] = asyncio.get_running_loop().call_later(
+                settings.FLOW_MOD_COALESCE_WINDOW, self._flush, key
+            )
+        await future
+
+    def _flush(self, key: tuple) -> None:
+        """Send the requests buffered for key in a single request."""
+        handle = self._flush_handles.pop(key, None)
+        if handle:
+            handle.cancel()
+        batch = self._buffers.pop(key, [])
+        self._buffered_flows.pop(key, None)
+        if batch:
+            task = asyncio.create_task(self._send_batch(*key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _merge(batch: list) -> dict[str, dict]:
+        """Merge the flows of the batched requests per dpid."""
+        merged = {}
+        for data, _ in batch:
+            for dpid, value in data.items():
+                merged.setdefault(dpid, {"flows": []})
+                merged[dpid]["flows"].extend(value["flows"])
+        return merged
+
+    async def _send_batch(
+        self, method: str, endpoint: str, batch: list
+    ) -> None:
+        """Send a batch and resolve the future of each request.
+
+        If the merged request fails, even after its retries, each request
+        is sent once on its own, so a request is only failed by its own
+        flows.
+        """
+        try:
+            await self.asend(method, endpoint, self._merge(batch))
+            results = [None] * len(batch)
+        except FlowModException as exc:
+            if len(batch) == 1:
+                results = [exc]
+            else:
+                results = await asyncio.gather(
+                    *(
+                        self._request(method, endpoint, data)
+                        for data, _ in batch
+                    ),
+                    return_exceptions=True
+                )
+        # pylint: disable=broad-except
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(None)
+
+    def submit(
+        self, method: str, endpoint: str, data: dict, coalesce=False
+    ) -> Future:
+        """Schedule a flow_manager request from a thread."""
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            raise FlowModException("Controller event loop isn't running")
+        send = self.acoalesce if coalesce else self.asend
+        return asyncio.run_coroutine_threadsafe(
+            send(method, endpoint, data), loop
+        )
+
+    def send(
+        self, method: str, endpoint: str, data: dict, coalesce=False
+    ) -> None:
+        """Send a flow_manager request from a thread and wait for it.
+
+        It mustn't be called from the event loop thread, coroutines
+        should await asend or acoalesce instead. It raises
+        FlowModException if the request isn't done in FLOW_MOD_SEND_TIMEOUT
+        seconds.
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is not None and running_loop is self.loop:
+            raise RuntimeError("send would block the event loop, use asend")
+        future = self.submit(method, endpoint, data, coalesce)
+        try:
+            future.result(timeout=settings.FLOW_MOD_SEND_TIMEOUT)
+        except FutureTimeoutError as err:
+            future.cancel()
+            raise FlowModException(
+                f"{method} {endpoint} timed out after "
+                f"{settings.FLOW_MOD_SEND_TIMEOUT} seconds"
+            ) from err
+
+
+flow_mod_dispatcher = FlowModDispatcher()
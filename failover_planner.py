@@ -0,0 +1,145 @@
+"""Background planning of EVC failover paths."""
+import heapq
+import time
+from itertools import chain
+from threading import Condition, Thread
+from typing import Callable, Optional
+
+from kytos.core import log
+from kytos.core.common import EntityStatus
+from napps.kytos.mef_eline import settings
+
+
+class FailoverPlanner:
+    """Set up the failover paths of EVCs in a pool of worker threads.
+
+    Scheduled EVCs are planned by desc service_level and asc creation_time.
+    A worker computes the failover path candidates of an EVC (pathfinder
+    request and disjointness scoring) without holding its lock, then hands
+    them to EVC.setup_failover_path, which only allocates the S-VLANs and
+    installs the flows under the lock. At most settings.FAILOVER_PLANNER_RATE
+    plans are started per second, a rate of 0 doesn't limit them.
+
+    The workers are started with the first scheduled EVC.
+    """
+
+    def __init__(
+        self,
+        get_evc: Callable[[str], Optional[object]],
+        max_workers: int = None,
+        rate: float = None,
+    ) -> None:
+        self.get_evc = get_evc
+        self.max_workers = (
+            settings.FAILOVER_PLANNER_WORKERS
+            if max_workers is None else max_workers
+        )
+        self.rate = settings.FAILOVER_PLANNER_RATE if rate is None else rate
+        self._condition = Condition()
+        # heap of (priority, evc id)
+        self._queue = []
+        self._pending = set()
+        self._workers = []
+        self._running = False
+        self._next_start = 0.0
+
+    @staticmethod
+    def needs_failover(evc) -> bool:
+        """Whether an EVC should get a failover path set up."""
+        return bool(
+            evc.is_eligible_for_failover_path()
+            and evc.is_active()
+            and not evc.failover_path
+            and evc.current_path
+        )
+
+    def schedule(self, evc) -> None:
+        """Queue an EVC to have its failover path planned."""
+        priority = (-evc.service_level, evc.creation_time, evc.id)
+        with self._condition:
+            if evc.id in self._pending:
+                return
+            self._pending.add(evc.id)
+            heapq.heappush(self._queue, (priority, evc.id))
+            if not self._running:
+                self._start()
+            self._condition.notify()
+
+    def _start(self) -> None:
+        """Start the workers, the condition lock must be held."""
+        self._running = True
+        self._workers = [
+            Thread(
+                target=self._work, name=f"failover_planner_{i}", daemon=True
+            )
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop the workers, dropping the queued EVCs."""
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._pending.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def _next(self) -> Optional[str]:
+        """Wait for the next EVC id to plan, None once stopped."""
+        with self._condition:
+            while self._running and not self._queue:
+                self._condition.wait()
+            if not self._running:
+                return None
+            _, evc_id = heapq.heappop(self._queue)
+            self._pending.discard(evc_id)
+            now = time.monotonic()
+            delay = self._next_start - now
+            if self.rate > 0:
+                self._next_start = max(now, self._next_start) + 1 / self.rate
+        if delay > 0:
+            time.sleep(delay)
+        return evc_id
+
+    def _work(self) -> None:
+        """Plan the queued EVCs until stopped."""
+        while (evc_id := self._next()) is not None:
+            try:
+                self.plan(evc_id)
+            # pylint: disable=broad-except
+            except Exception as exc:
+                log.error(f"Failed to plan failover path of {evc_id}: {exc}")
+
+    def plan(self, evc_id: str) -> None:
+        """Compute the failover path candidates of an EVC and set it up.
+
+        If the current_path changed while computing them, the EVC is
+        scheduled again. Candidates with a link no longer UP are skipped.
+
+        Candidates are created lazily, the pathfinder request and the
+        first UP candidate are computed without holding the EVC lock, the
+        next ones only if setup_failover_path can't use the previous ones.
+        """
+        evc = self.get_evc(evc_id)
+        if evc is None or not self.needs_failover(evc):
+            return
+        current_path = evc.current_path
+        candidates = (
+            path for path in evc.get_failover_path_candidates() or []
+            if path and path.status is EntityStatus.UP
+        )
+        first = next(candidates, None)
+        with evc.lock:
+            if not self.needs_failover(evc):
+                return
+            if evc.current_path != current_path:
+                self.schedule(evc)
+                return
+            evc.setup_failover_path(candidates=(
+                path for path in chain([first] if first else [], candidates)
+                if path.status is EntityStatus.UP
+            ))
@@ -9,7 +9,7 @@ import traceback
 from collections import defaultdict
 from contextlib import ExitStack
 from copy import deepcopy
-from threading import Lock
+from threading import Lock, Timer
 from typing import Optional
 
 from jsonschema.exceptions import ValidationError as OpenapiValidationError
@@ -17,6 +17,7 @@ from openapi_schema_validator import validate
 from pydantic import ValidationError
 
 from kytos.core import KytosNApp, log, rest
+from kytos.core.common import EntityStatus
 from kytos.core.events import KytosEvent
 from kytos.core.exceptions import KytosTagError
 from kytos.core.helpers import (alisten_to, listen_to, load_spec, now,
@@ -27,11 +28,17 @@ from kytos.core.rest_api import (HTTPException, JSONResponse, Request,
                                  get_json_or_400)
 from kytos.core.tag_ranges import get_tag_ranges
 from napps.kytos.mef_eline import controllers, settings
-from napps.kytos.mef_eline.exceptions import (DisabledSwitch,
+from napps.kytos.mef_eline.clients import close_clients, get_latency_stats
+from napps.kytos.mef_eline.dispatcher import flow_mod_dispatcher
+from napps.kytos.mef_eline.exceptions import (ActivationError, DisabledSwitch,
                                               DuplicatedNoTagUNI,
                                               FlowModException, InvalidPath)
+from napps.kytos.mef_eline.failover_planner import FailoverPlanner
 from napps.kytos.mef_eline.models import (EVC, DynamicPathManager, EVCDeploy,
-                                          Path)
+                                          LinkIndex, Path, ServiceLevelIndex,
+                                          UNIIndex)
+from napps.kytos.mef_eline.models.evc import PATH_FIELDS
+from napps.kytos.mef_eline.persistence import evc_writer
 from napps.kytos.mef_eline.scheduler import CircuitSchedule, Scheduler
 from napps.kytos.mef_eline.utils import (_does_uni_affect_evc, aemit_event,
                                          emit_event, get_vlan_tags_and_masks,
@@ -73,19 +80,38 @@ class Main(KytosNApp):
         # object to save and load circuits
         self.mongo_controller = self.get_eline_controller()
         self.mongo_controller.bootstrap_indexes()
+        # EVC writes are flushed to mongodb in bulk
+        evc_writer.start(self.mongo_controller)
 
         # set the controller that will manager the dynamic paths
         DynamicPathManager.set_controller(self.controller)
+        flow_mod_dispatcher.set_controller(self.controller)
 
         # dictionary of EVCs created. It acts as a circuit buffer.
         # Every create/update/delete must be synced to mongodb.
         self.circuits = dict[str, EVC]()
 
+        # reverse index from link id to the EVCs using it in their paths
+        self.link_index = LinkIndex()
+        # index from interface id to the EVCs with a UNI on it
+        self.uni_index = UNIIndex()
+        # circuits kept sorted by service level
+        self.svc_level_index = ServiceLevelIndex()
+        # failover paths are set up in background threads
+        self.failover_planner = FailoverPlanner(self.circuits.get)
+
         self._intf_events = defaultdict(dict)
         self._lock_interfaces = defaultdict(Lock)
         self.table_group = {"epl": 0, "evpl": 0}
         self._lock = Lock()
         self.multi_evc_lock = Lock()
+        # link_down events waiting to be handled in a batch
+        self._links_down = dict[str, Link]()
+        self._links_down_lock = Lock()
+        # Timer handling the pending link_down events, None if there's none
+        self._links_down_timer = None
+        # link_down batches are handled one at a time
+        self._links_down_batch_lock = Lock()
         self.execute_as_loop(settings.DEPLOY_EVCS_INTERVAL)
 
         self.load_all_evcs()
@@ -114,19 +140,41 @@ class Main(KytosNApp):
                 msg = f"Invalid {key} with error: {err.message}"
                 raise ValueError(msg) from err
 
+    @staticmethod
+    def sort_by_svc_level(evcs, enable_filter: bool = True) -> list[EVC]:
+        """Sort circuits by desc service level and asc creation_time."""
+        if enable_filter:
+            evcs = [evc for evc in evcs if evc.is_enabled()]
+        return sorted(
+            evcs, key=lambda x: (-x.service_level, x.creation_time)
+        )
+
     def get_evcs_by_svc_level(self, enable_filter: bool = True) -> list[EVC]:
         """Get circuits sorted by desc service level and asc creation_time.
 
-        In the future, as more ops are offloaded it should be get from the DB.
+        They're kept sorted by svc_level_index, without enable_filter its
+        sorted list is returned as is, so it mustn't be changed.
         """
-        if enable_filter:
-            return sorted(
-                          [circuit for circuit in self.circuits.values()
-                           if circuit.is_enabled()],
-                          key=lambda x: (-x.service_level, x.creation_time),
-            )
-        return sorted(self.circuits.values(),
-                      key=lambda x: (-x.service_level, x.creation_time))
+        return self.svc_level_index.get_evcs(enable_filter)
+
+    def _index_evc(self, evc: EVC) -> None:
+        """Add an EVC to the in-memory indexes."""
+        self.link_index.add(evc)
+        self.uni_index.add(evc)
+        self.svc_level_index.add(evc)
+
+    def _index_evcs(self, evcs: list[EVC]) -> None:
+        """Add EVCs loaded in bulk to the in-memory indexes."""
+        for evc in evcs:
+            self.link_index.add(evc)
+            self.uni_index.add(evc)
+        self.svc_level_index.load(evcs)
+
+    def _unindex_evc(self, evc: EVC) -> None:
+        """Remove an EVC from the in-memory indexes."""
+        self.link_index.remove(evc)
+        self.uni_index.remove(evc)
+        self.svc_level_index.remove(evc)
 
     @staticmethod
     def get_eline_controller():
@@ -196,6 +244,12 @@ class Main(KytosNApp):
 
         If you have some cleanup procedure, insert it here.
         """
+        with self._links_down_lock:
+            if self._links_down_timer is not None:
+                self._links_down_timer.cancel()
+        self.failover_planner.stop()
+        evc_writer.stop()
+        close_clients()
 
     @rest("/v2/evc/", methods=["GET"])
     def list_circuits(self, request: Request) -> JSONResponse:
@@ -208,9 +262,11 @@ class Main(KytosNApp):
         args = request.query_params
         archived = args.get("archived", "false").lower()
         args = {k: v for k, v in args.items() if k not in {"archived"}}
+        evc_writer.flush()
         circuits = self.mongo_controller.get_circuits(archived=archived,
                                                       metadata=args)
         circuits = circuits['circuits']
+        self._expand_paths(circuits.values())
         return JSONResponse(circuits)
 
     @rest("/v2/evc/schedule", methods=["GET"])
@@ -223,6 +279,7 @@ class Main(KytosNApp):
          "schedule": <schedule object>}]
         """
         log.debug("list_schedules /v2/evc/schedule")
+        evc_writer.flush()
         circuits = self.mongo_controller.get_circuits()['circuits'].values()
         if not circuits:
             result = {}
@@ -250,15 +307,32 @@ class Main(KytosNApp):
         """Endpoint to return a circuit based on id."""
         circuit_id = request.path_params["circuit_id"]
         log.debug("get_circuit /v2/evc/%s", circuit_id)
+        evc_writer.flush()
         circuit = self.mongo_controller.get_circuit(circuit_id)
         if not circuit:
             result = f"circuit_id {circuit_id} not found"
             log.debug("get_circuit result %s %s", result, 404)
             raise HTTPException(404, detail=result)
+        self._expand_paths([circuit])
         status = 200
         log.debug("get_circuit result %s %s", circuit, status)
         return JSONResponse(circuit, status_code=status)
 
+    @rest("/v2/evc/persistence/metrics", methods=["GET"])
+    def get_persistence_metrics(self, _request: Request) -> JSONResponse:
+        """Endpoint to return the EVC write-behind metrics."""
+        return JSONResponse(evc_writer.get_metrics())
+
+    @rest("/v2/evc/clients/metrics", methods=["GET"])
+    def get_clients_metrics(self, _request: Request) -> JSONResponse:
+        """Endpoint to return the HTTP clients latency stats by service."""
+        return JSONResponse(get_latency_stats())
+
+    @rest("/v2/evc/pathfinder/metrics", methods=["GET"])
+    def get_pathfinder_metrics(self, _request: Request) -> JSONResponse:
+        """Endpoint to return the pathfinder replies cache counters."""
+        return JSONResponse(DynamicPathManager.path_cache.get_stats())
+
     # pylint: disable=too-many-branches, too-many-statements
     @rest("/v2/evc/", methods=["POST"])
     @validate_openapi(spec)
@@ -348,6 +422,7 @@ class Main(KytosNApp):
 
         # store circuit in dictionary
         self.circuits[evc.id] = evc
+        self._index_evc(evc)
 
         # Schedule the circuit deploy
         self.sched.add(evc)
@@ -416,6 +491,10 @@ class Main(KytosNApp):
                     updated_data.get("uni_z")
                 )
                 enable, redeploy = evc.update(**updated_data)
+                if "uni_a" in updated_data or "uni_z" in updated_data:
+                    self.uni_index.add(evc)
+                if "service_level" in updated_data:
+                    self.svc_level_index.add(evc)
             except (ValueError, KytosTagError, ValidationError) as exception:
                 log.debug("update result %s %s", exception, 400)
                 raise HTTPException(400, detail=str(exception)) from exception
@@ -441,7 +520,9 @@ class Main(KytosNApp):
                 elif evc.is_enabled() and redeploy:
                     evc.remove()
                     redeployed = evc.deploy()
-            result = {evc.id: evc.as_dict(), 'redeployed': redeployed}
+            evc_dict = evc.as_dict()
+            self._expand_paths([evc_dict])
+            result = {evc.id: evc_dict, 'redeployed': redeployed}
             status = 200
 
         log.debug("update result %s %s", result, status)
@@ -476,6 +557,7 @@ class Main(KytosNApp):
                 evc.archive()
                 evc.remove_uni_tags()
                 evc.sync()
+                self._unindex_evc(evc)
                 emit_event(
                     self.controller, "deleted",
                     content=map_evc_event_content(evc)
@@ -509,6 +591,7 @@ class Main(KytosNApp):
         data = get_json_or_400(request, self.controller.loop)
         circuit_ids = data.pop("circuit_ids")
 
+        evc_writer.flush()
         self.mongo_controller.update_evcs_metadata(circuit_ids, data, "add")
 
         fail_evcs = []
@@ -550,6 +633,7 @@ class Main(KytosNApp):
         data = get_json_or_400(request, self.controller.loop)
         key = request.path_params["key"]
         circuit_ids = data.pop("circuit_ids")
+        evc_writer.flush()
         self.mongo_controller.update_evcs_metadata(
             circuit_ids, {key: ""}, "del"
         )
@@ -594,6 +678,12 @@ class Main(KytosNApp):
         if try_avoid_same_s_vlan not in {"true", "false"}:
             msg = "Parameter try_avoid_same_s_vlan has an invalid value."
             raise HTTPException(400, detail=msg)
+        make_before_break = request.query_params.get(
+            "make_before_break", "false"
+        ).lower()
+        if make_before_break not in {"true", "false"}:
+            msg = "Parameter make_before_break has an invalid value."
+            raise HTTPException(400, detail=msg)
         log.debug("redeploy /v2/evc/%s/redeploy", circuit_id)
         try:
             evc = self.circuits[circuit_id]
@@ -604,7 +694,13 @@ class Main(KytosNApp):
             ) from KeyError
         deployed = False
         with evc.lock:
-            if evc.is_enabled():
+            if evc.is_enabled() and make_before_break == "true":
+                # The failover flows are removed by match, since removing
+                # them by cookie could remove current path flows
+                evc.remove_path_flows(evc.failover_path)
+                evc.failover_path = Path([])
+                deployed = evc.deploy(make_before_break=True)
+            elif evc.is_enabled():
                 path_dict = evc.remove_current_flows(
                     sync=False,
                     return_path=try_avoid_same_s_vlan == "true"
@@ -788,15 +884,173 @@ class Main(KytosNApp):
     @listen_to("kytos/topology.link_up")
     def on_link_up(self, event):
         """Change circuit when link is up or end_maintenance."""
+        DynamicPathManager.handle_topology_event(event)
         self.handle_link_up(event)
+        self.schedule_missing_failover_paths(event.content["link"])
 
     def handle_link_up(self, event):
-        """Change circuit when link is up or end_maintenance."""
-        log.info("Event handle_link_up %s", event.content["link"])
-        for evc in self.get_evcs_by_svc_level():
-            if evc.is_enabled() and not evc.archived:
-                with evc.lock:
-                    evc.handle_link_up(event.content["link"])
+        """Change circuit when link is up or end_maintenance.
+
+        Only EVCs using the link on primary_path or backup_path, and
+        inactive EVCs that could be deployed with a dynamic path, can be
+        affected by a link_up, so the other EVCs aren't visited.
+        """
+        link = event.content["link"]
+        log.info("Event handle_link_up %s", link)
+        with self._links_down_lock:
+            self._links_down.pop(link.id, None)
+        evcs = {
+            evc.id: evc for evc in self.link_index.get_evcs(
+                link.id, ("primary_path", "backup_path")
+            )
+        }
+        evcs.update(
+            (evc.id, evc)
+            for evc in self.link_index.get_inactive_dynamic_evcs()
+        )
+
+        handle_one_by_one = list[EVC]()
+        with ExitStack() as exit_stack:
+            exit_stack.enter_context(self.multi_evc_lock)
+            revert_to_primary = list[EVC]()
+            for evc in self.sort_by_svc_level(evcs.values()):
+                if evc.archived:
+                    continue
+                with ExitStack() as sub_stack:
+                    sub_stack.enter_context(evc.lock)
+                    if not evc.should_revert_to_primary_path(link):
+                        handle_one_by_one.append(evc)
+                        continue
+                    revert_to_primary.append(evc)
+                    exit_stack.push(sub_stack.pop_all())
+
+            if revert_to_primary:
+                success, failure = self.execute_revert_to_primary(
+                    revert_to_primary
+                )
+                for evc in success:
+                    emit_event(self.controller, "redeployed_link_up",
+                               content=map_evc_event_content(evc))
+                if success:
+                    self.write_evcs(success)
+                handle_one_by_one = self.sort_by_svc_level(
+                    [*failure, *handle_one_by_one], enable_filter=False
+                )
+
+        for evc in handle_one_by_one:
+            with evc.lock:
+                evc.handle_link_up(link)
+
+    def prepare_revert_to_primary_flows(
+        self, evc: EVC
+    ) -> tuple[dict[str, list], dict[str, list]]:
+        """Prepare the flows to delete the current path flows of an evc
+        and the flows to install its primary path.
+
+        The primary path VLANs must have been chosen already.
+        """
+        delete_flows, install_flows = {}, {}
+        try:
+            switches = {
+                evc.uni_a.interface.switch.id, evc.uni_z.interface.switch.id
+            }
+            if evc.leftover_switch:
+                switches.add(evc.leftover_switch)
+            for link in evc.current_path:
+                switches.add(link.endpoint_a.switch.id)
+                switches.add(link.endpoint_b.switch.id)
+            delete_flows = {
+                dpid: [{
+                    "cookie": evc.get_cookie(),
+                    "cookie_mask": int(0xffffffffffffffff),
+                    "owner": "mef_eline",
+                }]
+                for dpid in switches
+            }
+            install_flows = merge_flow_dicts(
+                {},
+                evc._prepare_nni_flows(evc.primary_path),
+                evc._prepare_uni_flows(evc.primary_path)
+            )
+        # pylint: disable=broad-except
+        except Exception:
+            err = traceback.format_exc()
+            log.error(f"Fail to prepare {evc} primary_path flows: {err}")
+            return {}, {}
+        return delete_flows, install_flows
+
+    def execute_revert_to_primary(
+        self,
+        evcs: list[EVC]
+    ) -> tuple[list[EVC], list[EVC]]:
+        """Redeploy evcs to their primary paths in bulk.
+
+        The current path flows of all evcs are removed with a single
+        request, then the primary path flows are installed with another
+        one. The S-VLANs of all primary paths are chosen in bulk. The evcs
+        that couldn't be reverted are returned to be handled one by one.
+        """
+        delete_flows, install_flows = {}, {}
+        reverted_evcs = list[EVC]()
+        not_reverted_evcs = list[EVC]()
+
+        failed = Path.choose_vlans_bulk(
+            self.controller, [evc.primary_path for evc in evcs]
+        )
+        for index, evc in enumerate(evcs):
+            if index in failed:
+                not_reverted_evcs.append(evc)
+                continue
+            delete_flow, install_flow = self.prepare_revert_to_primary_flows(
+                evc
+            )
+            if not install_flow:
+                evc.primary_path.make_vlans_available(self.controller)
+                not_reverted_evcs.append(evc)
+                continue
+            delete_flows = merge_flow_dicts(delete_flows, delete_flow)
+            install_flows = merge_flow_dicts(install_flows, install_flow)
+            reverted_evcs.append(evc)
+
+        if not reverted_evcs:
+            return [], not_reverted_evcs
+
+        try:
+            send_flow_mods_http(delete_flows, "delete")
+        except FlowModException as exc:
+            log.error(f"Fail to remove flows of {reverted_evcs}: {exc}")
+            for evc in reverted_evcs:
+                evc.primary_path.make_vlans_available(self.controller)
+            return [], [*reverted_evcs, *not_reverted_evcs]
+
+        for evc in reverted_evcs:
+            evc.current_path.make_vlans_available(self.controller)
+            evc.current_path = Path([])
+            evc.leftover_switch = None
+            evc.last_removed_at = now()
+            evc.deactivate()
+
+        try:
+            send_flow_mods_http(install_flows, "install")
+        except FlowModException as exc:
+            log.error(
+                f"Fail to install primary_path flows of {reverted_evcs}: "
+                f"{exc}"
+            )
+            for evc in reverted_evcs:
+                evc.primary_path.make_vlans_available(self.controller)
+            return [], [*reverted_evcs, *not_reverted_evcs]
+
+        for evc in reverted_evcs:
+            evc.current_path = evc.primary_path
+            evc.last_deployed_at = now()
+            msg = f"{evc} was deployed."
+            try:
+                evc.try_to_activate()
+            except ActivationError as exc:
+                msg = f"{msg} {str(exc)}"
+            log.info(msg)
+        return reverted_evcs, not_reverted_evcs
 
     # Possibly replace this with interruptions?
     @listen_to(
@@ -807,6 +1061,7 @@ class Main(KytosNApp):
         """
         Handler for interface link_up and link_down events.
         """
+        Path.invalidate_status()
         self.handle_on_interface_link_change(event)
 
     def handle_on_interface_link_change(self, event: KytosEvent):
@@ -847,7 +1102,8 @@ class Main(KytosNApp):
         Handler for interface link_up events
         """
         log.info("Event handle_interface_link_up %s", interface)
-        for evc in self.get_evcs_by_svc_level():
+        evcs = self.uni_index.get_evcs(interface.id)
+        for evc in self.sort_by_svc_level(evcs):
             if _does_uni_affect_evc(evc, interface, "up"):
                 with evc.lock:
                     evc.handle_interface_link_up(
@@ -859,7 +1115,8 @@ class Main(KytosNApp):
         Handler for interface link_down events
         """
         log.info("Event handle_interface_link_down %s", interface)
-        for evc in self.get_evcs_by_svc_level():
+        evcs = self.uni_index.get_evcs(interface.id)
+        for evc in self.sort_by_svc_level(evcs):
             if _does_uni_affect_evc(evc, interface, "down"):
                 with evc.lock:
                     evc.handle_interface_link_down(
@@ -869,8 +1126,21 @@ class Main(KytosNApp):
     @listen_to("kytos/topology.link_down", pool="dynamic_single")
     def on_link_down(self, event):
         """Change circuit when link is down or under_mantenance."""
+        DynamicPathManager.handle_topology_event(event)
         self.handle_link_down(event)
 
+    @listen_to(
+        "kytos/topology.(switch|link).(enabled|disabled|deleted)",
+        "kytos/topology.(switches|links).metadata.(added|removed)",
+        "kytos/topology.topology_loaded",
+    )
+    def on_topology_changed(self, event):
+        """Update the path engine and drop the cached paths on changes.
+
+        link_up and link_down are also handled before their own handlers.
+        """
+        DynamicPathManager.handle_topology_event(event)
+
     def prepare_swap_to_failover_flow(self, evc: EVC):
         """Prepare an evc for switching to failover."""
         install_flows = {}
@@ -1011,7 +1281,11 @@ class Main(KytosNApp):
         return del_flows
 
     def execute_undeploy(self, evcs: list[EVC]):
-        """Process changes needed to commit an undeploy"""
+        """Process changes needed to commit an undeploy
+
+        need_redeploy isn't emitted for the undeployed EVCs, it's up to the
+        caller once their locks are released, see handle_links_down.
+        """
         delete_flows = {}
         undeploy_evcs = list[EVC]()
         not_undeploy_evcs = list[EVC]()
@@ -1036,12 +1310,6 @@ class Main(KytosNApp):
                 evc.current_path = Path([])
                 evc.failover_path = Path([])
                 evc.deactivate()
-                emit_event(
-                    self.controller,
-                    "need_redeploy",
-                    content={"evc_id": evc.id}
-                )
-                log.info(f"{evc} scheduled for redeploy")
             return undeploy_evcs, not_undeploy_evcs
         except FlowModException as exc:
             log.error(
@@ -1049,10 +1317,75 @@ class Main(KytosNApp):
             )
             return [], [*undeploy_evcs, *not_undeploy_evcs]
 
+    @staticmethod
+    def prefetch_dynamic_paths(evcs: list[EVC]) -> None:
+        """Request in batch the dynamic paths of EVCs about to be redeployed.
+
+        Only EVCs that will need a dynamic path, since neither their
+        primary_path nor backup_path is up, are requested. Each distinct
+        source, destination and constraints is requested once and the
+        replies are cached, so the need_redeploy handlers don't send a
+        pathfinder request per EVC. It's skipped if the cache is disabled.
+        It's called before need_redeploy is emitted, but not holding EVC
+        locks, since pathfinder requests can take seconds.
+        """
+        if DynamicPathManager.path_cache.max_size <= 0:
+            return
+        dynamic_evcs = [
+            evc for evc in evcs
+            if evc.dynamic_backup_path
+            and not evc.is_intra_switch()
+            and evc.primary_path.status is not EntityStatus.UP
+            and evc.backup_path.status is not EntityStatus.UP
+        ]
+        if dynamic_evcs:
+            DynamicPathManager.get_best_paths_batch(dynamic_evcs)
+
     def handle_link_down(self, event):
-        """Change circuit when link is down or under_mantenance."""
+        """Change circuit when link is down or under_mantenance.
+
+        When a switch goes down, a link_down is emitted for each of its
+        links. To handle them in a single pass, link_down events are
+        aggregated during settings.LINK_DOWN_AGGREGATION_DELAY by a timer,
+        which then handles all of them with handle_pending_links_down.
+        """
         link = event.content["link"]
         log.info("Event handle_link_down %s", link)
+        with self._links_down_lock:
+            self._links_down[link.id] = link
+            if self._links_down_timer is not None:
+                return
+            self._links_down_timer = Timer(
+                settings.LINK_DOWN_AGGREGATION_DELAY,
+                self.handle_pending_links_down,
+            )
+            self._links_down_timer.daemon = True
+            self._links_down_timer.start()
+
+    def handle_pending_links_down(self):
+        """Handle the pending link_down events in a batch.
+
+        Batches are handled one at a time, link_down events received while
+        a batch is handled are left for the next one.
+        """
+        with self._links_down_batch_lock:
+            with self._links_down_lock:
+                links = list(self._links_down.values())
+                self._links_down.clear()
+                self._links_down_timer = None
+            if links:
+                self.handle_links_down(links)
+
+    # pylint: disable=too-many-locals
+    def handle_links_down(self, links: list[Link]):
+        """Change circuits affected by links that went down.
+
+        Swap to failover, clear failover and undeploy sets are computed
+        against all the given links, so each set is committed with a
+        single flow mods request and the EVCs are updated in a single
+        DB write.
+        """
+        log.info("Handling link_down of %s", links)
 
         with ExitStack() as exit_stack:
             exit_stack.enter_context(self.multi_evc_lock)
@@ -1060,26 +1393,40 @@ class Main(KytosNApp):
             undeploy = list[EVC]()
             clear_failover = list[EVC]()
             evcs_to_update = dict[str, EVC]()
+            undeployed = list[EVC]()
 
-            for evc in self.get_evcs_by_svc_level():
+            affected_evcs = {}
+            for link in links:
+                affected_evcs.update(
+                    (evc.id, evc) for evc in self.link_index.get_evcs(
+                        link.id, ("current_path", "failover_path")
+                    )
+                )
+            for evc in self.sort_by_svc_level(affected_evcs.values()):
                 with ExitStack() as sub_stack:
                     sub_stack.enter_context(evc.lock)
+                    current_affected = any(
+                        evc.is_affected_by_link(link) for link in links
+                    )
+                    failover_affected = any(
+                        evc.is_failover_path_affected_by_link(link)
+                        for link in links
+                    )
                     if all((
-                        evc.is_affected_by_link(link),
+                        current_affected,
                         evc.failover_path,
-                        not evc.is_failover_path_affected_by_link(link)
+                        not failover_affected
                     )):
                         swap_to_failover.append(evc)
                     elif all((
-                        evc.is_affected_by_link(link),
-                        not evc.failover_path or
-                        evc.is_failover_path_affected_by_link(link)
+                        current_affected,
+                        not evc.failover_path or failover_affected
                     )):
                         undeploy.append(evc)
                     elif all((
-                        not evc.is_affected_by_link(link),
+                        not current_affected,
                         evc.failover_path,
-                        evc.is_failover_path_affected_by_link(link)
+                        failover_affected
                     )):
                         clear_failover.append(evc)
                     else:
@@ -1115,6 +1462,7 @@ class Main(KytosNApp):
                 success, failure = self.execute_undeploy(undeploy)
 
                 evcs_to_update.update((evc.id, evc) for evc in success)
+                undeployed.extend(success)
 
                 if failure:
                     log.error(f"Failed to handle_link_down for {failure}")
@@ -1122,9 +1470,34 @@ class Main(KytosNApp):
             # Push update to DB
 
             if evcs_to_update:
-                self.mongo_controller.update_evcs(
-                    [evc.as_dict() for evc in evcs_to_update.values()]
-                )
+                self.write_evcs(list(evcs_to_update.values()))
+
+        # Once the EVC locks are released, and before need_redeploy is
+        # emitted, so that its handlers find the paths cached
+        self.prefetch_dynamic_paths(undeployed)
+        for evc in undeployed:
+            emit_event(
+                self.controller,
+                "need_redeploy",
+                content={"evc_id": evc.id}
+            )
+            log.info(f"{evc} scheduled for redeploy")
+
+    def write_evcs(self, evcs: list[EVC]) -> None:
+        """Write the EVCs changed by a link handler holding their locks.
+
+        While evc_writer is running, each EVC is synced, so its changed
+        fields are merged into its pending writes and flushed in bulk by
+        evc_writer, without a MongoDB write holding the EVC locks nor a
+        flush. Otherwise they're written with a single update_evcs.
+        """
+        if evc_writer.running:
+            for evc in evcs:
+                evc.sync(trusted=True)
+            return
+        self.mongo_controller.update_evcs(
+            [evc.as_document() for evc in evcs], trusted=True
+        )
 
     @listen_to("kytos/mef_eline.need_redeploy")
     def on_evc_need_redeploy(self, event):
@@ -1177,19 +1550,30 @@ class Main(KytosNApp):
         self.handle_evc_deployed(event)
 
     def handle_evc_deployed(self, event):
-        """Setup failover path on evc deployed."""
+        """Schedule the failover path setup on evc deployed."""
         evc = self.circuits.get(event.content["evc_id"])
-        if evc is None:
+        if evc is None or not self.failover_planner.needs_failover(evc):
             return
-        with evc.lock:
-            if (
-                not evc.is_eligible_for_failover_path()
-                or not evc.is_active()
-                or evc.failover_path
-                or not evc.current_path
-            ):
-                return
-            evc.setup_failover_path()
+        self.failover_planner.schedule(evc)
+
+    def schedule_missing_failover_paths(self, link):
+        """Schedule the failover path setup of EVCs lacking one.
+
+        The link coming up might have made a disjoint path available. Only
+        the EVCs using the link on a path or with a UNI on one of its
+        endpoints are visited, the other ones lacking a failover_path are
+        left to the consistency check.
+        """
+        evcs = {
+            evc.id: evc for evc in self.link_index.get_evcs(link.id)
+        }
+        for interface in (link.endpoint_a, link.endpoint_b):
+            evcs.update(
+                (evc.id, evc) for evc in self.uni_index.get_evcs(interface.id)
+            )
+        for evc in self.sort_by_svc_level(evcs.values()):
+            if self.failover_planner.needs_failover(evc):
+                self.failover_planner.schedule(evc)
 
     @listen_to("kytos/topology.topology_loaded")
     def on_topology_loaded(self, event):  # pylint: disable=unused-argument
@@ -1197,16 +1581,34 @@ class Main(KytosNApp):
         self.load_all_evcs()
 
     def load_all_evcs(self):
-        """Try to load all EVCs on startup."""
-        circuits = self.mongo_controller.get_circuits()['circuits'].items()
-        for circuit_id, circuit in circuits:
+        """Try to load all EVCs on startup.
+
+        The pending EVC writes are flushed first, so they're read as
+        they're in memory. The evcs_loaded event has their paths expanded as
+        the API returns them.
+        """
+        evc_writer.flush()
+        circuits = self.mongo_controller.get_circuits()['circuits']
+        loaded = []
+        for circuit_id, circuit in circuits.items():
             if circuit_id not in self.circuits:
-                self._load_evc(circuit)
-        emit_event(self.controller, "evcs_loaded", content=dict(circuits),
+                evc = self._load_evc(circuit, index=False)
+                if evc is not None and self.circuits.get(evc.id) is evc:
+                    loaded.append(evc)
+        self._index_evcs(loaded)
+        content = {
+            circuit_id: dict(circuit)
+            for circuit_id, circuit in circuits.items()
+        }
+        self._expand_paths(content.values())
+        emit_event(self.controller, "evcs_loaded", content=content,
                    timeout=1)
 
-    def _load_evc(self, circuit_dict):
-        """Load one EVC from mongodb to memory."""
+    def _load_evc(self, circuit_dict, index: bool = True):
+        """Load one EVC from mongodb to memory.
+
+        Without index, the EVC is left to be indexed in bulk with others.
+        """
         try:
             evc = self._evc_from_dict(circuit_dict)
         except (ValueError, KytosTagError) as exception:
@@ -1217,7 +1619,8 @@ class Main(KytosNApp):
         if evc.archived:
             return None
 
-        self.circuits.setdefault(evc.id, evc)
+        if self.circuits.setdefault(evc.id, evc) is evc and index:
+            self._index_evc(evc)
         self.sched.add(evc)
         return evc
 
@@ -1350,6 +1753,40 @@ class Main(KytosNApp):
             link.update_metadata("s_vlan", tag)
         return link
 
+    def _expand_paths(self, circuits) -> None:
+        """Expand the stored links of the circuits paths in place.
+
+        Paths are stored with the id, endpoint ids and S-VLAN of their
+        links, the API returns the links as the topology has them. Links
+        the topology doesn't have are returned as stored.
+        """
+        links = {}
+        for circuit in circuits:
+            for attribute in PATH_FIELDS:
+                if circuit.get(attribute):
+                    circuit[attribute] = [
+                        self._expand_link_dict(link_dict, links)
+                        for link_dict in circuit[attribute]
+                    ]
+
+    def _expand_link_dict(self, link_dict: dict, links: dict) -> dict:
+        """Return a stored link as the topology has it, with its S-VLAN.
+
+        links caches the topology links as_dict by id.
+        """
+        link_id = link_dict.get("id")
+        if link_id not in links:
+            link = self.controller.links.get(link_id)
+            links[link_id] = link.as_dict() if link else None
+        if links[link_id] is None:
+            return link_dict
+        metadata = dict(links[link_id].get("metadata") or {})
+        metadata.pop("s_vlan", None)
+        s_vlan = (link_dict.get("metadata") or {}).get("s_vlan")
+        if s_vlan:
+            metadata["s_vlan"] = s_vlan
+        return {**links[link_id], "metadata": metadata}
+
     def _find_evc_by_schedule_id(self, schedule_id):
         """
         Find an EVC and CircuitSchedule based on schedule_id.
@@ -1381,9 +1818,12 @@ class Main(KytosNApp):
         if not self.circuits:
             # Load circuits from mongodb to buffer
             circuits = self.mongo_controller.get_circuits()['circuits']
+            evcs = []
             for c_id, circuit in circuits.items():
                 evc = self._evc_from_dict(circuit)
                 self.circuits[c_id] = evc
+                evcs.append(evc)
+            self._index_evcs(evcs)
         return self.circuits
 
     # pylint: disable=attribute-defined-outside-init
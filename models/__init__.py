@@ -1,5 +1,11 @@
 """MEF E-Line models."""
 from .evc import EVC, EVCDeploy, LinkProtection
-from .path import DynamicPathManager, Path
+from .index import LinkIndex, ServiceLevelIndex, UNIIndex
+from .path import DynamicPathManager, Path, PathFinderCache
+from .path_engine import LocalPathEngine
+from .vlan_bitmap import VlanBitmap
 
-__all__ = ["Path", "DynamicPathManager", "EVC"]
+__all__ = [
+    "Path", "DynamicPathManager", "EVC", "LinkIndex", "LocalPathEngine",
+    "PathFinderCache", "ServiceLevelIndex", "UNIIndex", "VlanBitmap",
+]
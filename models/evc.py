@@ -1,4 +1,5 @@
 """Classes used in the main application."""  # pylint: disable=too-many-lines
+import json
 import traceback
 from collections import OrderedDict, defaultdict
 from copy import deepcopy
@@ -10,8 +11,6 @@ from uuid import uuid4
 
 import httpx
 from glom import glom
-from tenacity import (retry, retry_if_exception_type, stop_after_attempt,
-                      wait_combine, wait_fixed, wait_random)
 
 from kytos.core import log
 from kytos.core.common import EntityStatus, GenericEntity
@@ -19,13 +18,14 @@ from kytos.core.exceptions import KytosNoTagAvailableError, KytosTagError
 from kytos.core.helpers import get_time, now
 from kytos.core.interface import UNI, Interface, TAGRange
 from kytos.core.link import Link
-from kytos.core.retry import before_sleep
-from kytos.core.tag_ranges import range_difference
 from napps.kytos.mef_eline import controllers, settings
+from napps.kytos.mef_eline.clients import get_client
+from napps.kytos.mef_eline.dispatcher import flow_mod_dispatcher
 from napps.kytos.mef_eline.exceptions import (ActivationError,
                                               DuplicatedNoTagUNI,
                                               EVCPathNotInstalled,
                                               FlowModException, InvalidPath)
+from napps.kytos.mef_eline.persistence import evc_writer
 from napps.kytos.mef_eline.utils import (_does_uni_affect_evc,
                                          compare_endpoint_trace,
                                          compare_uni_out_trace, emit_event,
@@ -34,10 +34,146 @@ from napps.kytos.mef_eline.utils import (_does_uni_affect_evc,
                                          merge_flow_dicts)
 
 from .path import DynamicPathManager, Path
+from .vlan_bitmap import VlanBitmap
+
+
+def _format_time(value):
+    """Format a datetime as stored in the database, other values as is."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%S")
+    return value
+
+
+def _path_state(path: Path) -> tuple:
+    """Return the links and their S-VLANs, to find out a path changed."""
+    return tuple(
+        (link.id, getattr(link.get_metadata("s_vlan"), "value", None))
+        for link in path
+    )
+
+
+# EVC document field -> function returning its value for an EVC
+EVC_FIELDS = {
+    "id": lambda evc: evc.id,
+    "name": lambda evc: evc.name,
+    "uni_a": lambda evc: evc.uni_a.as_dict(),
+    "uni_z": lambda evc: evc.uni_z.as_dict(),
+    "start_date": lambda evc: _format_time(evc.start_date),
+    "end_date": lambda evc: _format_time(evc.end_date),
+    "queue_id": lambda evc: evc.queue_id,
+    "bandwidth": lambda evc: evc.bandwidth,
+    "primary_links": lambda evc: evc.primary_links.as_stored_dict(),
+    "backup_links": lambda evc: evc.backup_links.as_stored_dict(),
+    "current_path": lambda evc: evc.current_path.as_stored_dict(),
+    "failover_path": lambda evc: evc.failover_path.as_stored_dict(),
+    "primary_path": lambda evc: evc.primary_path.as_stored_dict(),
+    "backup_path": lambda evc: evc.backup_path.as_stored_dict(),
+    "dynamic_backup_path": lambda evc: evc.dynamic_backup_path,
+    "metadata": lambda evc: evc.metadata,
+    "request_time": lambda evc: _format_time(evc.request_time),
+    "creation_time": lambda evc: _format_time(evc.creation_time),
+    "owner": lambda evc: evc.owner,
+    "circuit_scheduler": lambda evc: [
+        sc.as_dict() for sc in evc.circuit_scheduler
+    ],
+    "active": lambda evc: evc.is_active(),
+    "enabled": lambda evc: evc.is_enabled(),
+    "archived": lambda evc: evc.archived,
+    "sb_priority": lambda evc: evc.sb_priority,
+    "service_level": lambda evc: evc.service_level,
+    "primary_constraints": lambda evc: evc.primary_constraints,
+    "secondary_constraints": lambda evc: evc.secondary_constraints,
+    "flow_removed_at": lambda evc: evc.flow_removed_at,
+    "last_deployed_at": lambda evc: evc.last_deployed_at,
+    "last_removed_at": lambda evc: evc.last_removed_at,
+    "updated_at": lambda evc: evc.updated_at,
+    "max_paths": lambda evc: evc.max_paths,
+    "leftover_switch": lambda evc: evc.leftover_switch,
+}
+
+
+def _document_time(value):
+    """Return a time as stored in the database, parsing formatted ones."""
+    if isinstance(value, str):
+        return get_time(value)
+    return value
+
+
+def _uni_document(uni: UNI) -> dict:
+    """Return a UNI as stored in the database, without a None tag."""
+    uni_dict = uni.as_dict()
+    if uni_dict.get("tag") is None:
+        uni_dict.pop("tag", None)
+    return uni_dict
+
+
+# EVC document field -> function returning its value as stored in the
+# database, the times as datetimes instead of formatted strings
+EVC_DOCUMENT_FIELDS = {
+    **EVC_FIELDS,
+    "uni_a": lambda evc: _uni_document(evc.uni_a),
+    "uni_z": lambda evc: _uni_document(evc.uni_z),
+    "start_date": lambda evc: _document_time(evc.start_date),
+    "end_date": lambda evc: _document_time(evc.end_date),
+    "request_time": lambda evc: _document_time(evc.request_time),
+    "creation_time": lambda evc: _document_time(evc.creation_time),
+}
+# Attributes stored as an EVC_FIELDS field of another name
+_ATTRIBUTE_FIELDS = {"_active": "active", "_enabled": "enabled"}
+# Fields stored as Path.as_stored_dict
+PATH_FIELDS = (
+    "primary_links", "backup_links", "current_path", "failover_path",
+    "primary_path", "backup_path",
+)
+# Fields that can change in place, without setting their attribute. They're
+# compared with their state on the last sync to find out if they changed,
+# PATH_FIELDS by their links and S-VLANs and the others by a copy of them
+_MUTABLE_FIELDS = {
+    "metadata": deepcopy,
+    "circuit_scheduler": list,
+    "primary_constraints": deepcopy,
+    "secondary_constraints": deepcopy,
+}
+
+
+class IndexedPath:
+    """EVC path attribute that keeps the EVC link index updated."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.private_name = f"_{name}"
+
+    def __get__(self, evc, owner=None):
+        if evc is None:
+            return self
+        return getattr(evc, self.private_name)
+
+    def __set__(self, evc, path):
+        setattr(evc, self.private_name, path)
+        if evc.link_index is not None:
+            evc.link_index.update_path(evc, self.name, path)
 
 
 class EVCBase(GenericEntity):
-    """Class to represent a circuit."""
+    """Class to represent a circuit.
+
+    The EVC_FIELDS changed since the last sync are tracked, setting one of
+    their attributes marks it dirty and paths, metadata, schedules and
+    constraints are compared with their state on the last sync, so sync
+    only writes the changed fields.
+    """
+
+    # EVC_FIELDS set since the last sync, None until the first one
+    _dirty = None
+    # field -> state on the last sync of PATH_FIELDS and _MUTABLE_FIELDS
+    _synced_state = None
+    # LinkIndex this EVC belongs to, it's set by LinkIndex.add
+    link_index = None
+
+    current_path = IndexedPath()
+    failover_path = IndexedPath()
+    primary_path = IndexedPath()
+    backup_path = IndexedPath()
 
     attributes_requiring_redeploy = [
         "primary_path",
@@ -158,9 +294,6 @@ class EVCBase(GenericEntity):
         self.last_removed_at = get_time(kwargs.get("last_removed_at")) or None
         self.updated_at = get_time(kwargs.get("updated_at")) or now()
         self.execution_rounds = kwargs.get("execution_rounds", 0)
-        self.current_links_cache = set()
-        self.primary_links_cache = set()
-        self.backup_links_cache = set()
         self.old_path = Path([])
         self.max_paths = kwargs.get("max_paths", 2)
         self.leftover_switch = kwargs.get("leftover_switch", None)
@@ -192,14 +325,78 @@ class EVCBase(GenericEntity):
         # Special cases: No tag, any, untagged
         self.special_cases = {None, "4096/4096", 0}
         self.table_group = kwargs.get("table_group")
+        # (key, flows) cached by get_failover_flows
+        self._failover_flows = None
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if self._dirty is not None:
+            field = _ATTRIBUTE_FIELDS.get(name, name)
+            if field in EVC_FIELDS:
+                self._dirty.add(field)
+        if (
+            name in ("_active", "dynamic_backup_path")
+            and self.link_index is not None
+        ):
+            self.link_index.update_state(self)
 
-    def sync(self, keys: set = None):
-        """Sync this EVC in the MongoDB."""
+    def get_dirty_fields(self) -> set:
+        """Return the fields changed since the last sync.
+
+        Every field is dirty if this EVC was never synced.
+        """
+        if self._dirty is None:
+            return set(EVC_FIELDS)
+        dirty = set(self._dirty)
+        for field in PATH_FIELDS:
+            state = _path_state(getattr(self, field))
+            if state != self._synced_state.get(field):
+                dirty.add(field)
+        for field in _MUTABLE_FIELDS:
+            if getattr(self, field) != self._synced_state.get(field):
+                dirty.add(field)
+        return dirty
+
+    def _mark_synced(self, fields: set = None) -> None:
+        """Take the state of the synced fields, all fields if None."""
+        if self._dirty is None:
+            if fields is not None:
+                return
+            self._dirty = set()
+            self._synced_state = {}
+        fields = set(EVC_FIELDS) if fields is None else fields
+        self._dirty -= fields
+        for field in fields.intersection(PATH_FIELDS):
+            self._synced_state[field] = _path_state(getattr(self, field))
+        for field in fields.intersection(_MUTABLE_FIELDS):
+            copy_value = _MUTABLE_FIELDS[field]
+            self._synced_state[field] = copy_value(getattr(self, field))
+
+    def sync(self, keys: set = None, trusted: bool = False):
+        """Sync this EVC in the MongoDB.
+
+        While evc_writer is running the write is buffered and flushed
+        later in bulk, see EVCWriteBehind, and without keys only the fields
+        changed since the last sync are written, the whole EVC on its first
+        sync.
+
+        trusted writes are built with as_document instead of being validated,
+        they're meant for the internal updates of an EVC, not for the data
+        of an API request.
+        """
         self.updated_at = now()
+        mongo_controller = self._mongo_controller
+        if evc_writer.running:
+            mongo_controller = evc_writer
+            if not keys and self._dirty is not None:
+                keys = self.get_dirty_fields()
+        serialize = self.as_document if trusted else self.as_dict
         if keys:
-            self._mongo_controller.update_evc(self.as_dict(keys))
+            mongo_controller.update_evc(serialize(keys), trusted=trusted)
+            self._mark_synced(set(keys))
             return
-        self._mongo_controller.upsert_evc(self.as_dict())
+        mongo_controller.upsert_evc(serialize(), trusted=trusted)
+        self._mark_synced()
 
     def _get_unis(self, **kwargs) -> tuple[UNI, UNI]:
         """Get the updated UNIs."""
@@ -415,73 +612,54 @@ class EVCBase(GenericEntity):
         """Return a dictionary representing an EVC object.
             keys: Only fields on this variable will be
                   returned in the dictionary"""
-        evc_dict = {
-            "id": self.id,
-            "name": self.name,
-            "uni_a": self.uni_a.as_dict(),
-            "uni_z": self.uni_z.as_dict(),
-        }
-
-        time_fmt = "%Y-%m-%dT%H:%M:%S"
-
-        evc_dict["start_date"] = self.start_date
-        if isinstance(self.start_date, datetime):
-            evc_dict["start_date"] = self.start_date.strftime(time_fmt)
-
-        evc_dict["end_date"] = self.end_date
-        if isinstance(self.end_date, datetime):
-            evc_dict["end_date"] = self.end_date.strftime(time_fmt)
-
-        evc_dict["queue_id"] = self.queue_id
-        evc_dict["bandwidth"] = self.bandwidth
-        evc_dict["primary_links"] = self.primary_links.as_dict()
-        evc_dict["backup_links"] = self.backup_links.as_dict()
-        evc_dict["current_path"] = self.current_path.as_dict()
-        evc_dict["failover_path"] = self.failover_path.as_dict()
-        evc_dict["primary_path"] = self.primary_path.as_dict()
-        evc_dict["backup_path"] = self.backup_path.as_dict()
-        evc_dict["dynamic_backup_path"] = self.dynamic_backup_path
-        evc_dict["metadata"] = self.metadata
-
-        evc_dict["request_time"] = self.request_time
-        if isinstance(self.request_time, datetime):
-            evc_dict["request_time"] = self.request_time.strftime(time_fmt)
-
-        time = self.creation_time.strftime(time_fmt)
-        evc_dict["creation_time"] = time
-
-        evc_dict["owner"] = self.owner
-        evc_dict["circuit_scheduler"] = [
-            sc.as_dict() for sc in self.circuit_scheduler
-        ]
-
-        evc_dict["active"] = self.is_active()
-        evc_dict["enabled"] = self.is_enabled()
-        evc_dict["archived"] = self.archived
-        evc_dict["sb_priority"] = self.sb_priority
-        evc_dict["service_level"] = self.service_level
-        evc_dict["primary_constraints"] = self.primary_constraints
-        evc_dict["secondary_constraints"] = self.secondary_constraints
-        evc_dict["flow_removed_at"] = self.flow_removed_at
-        evc_dict["last_deployed_at"] = self.last_deployed_at
-        evc_dict["last_removed_at"] = self.last_removed_at
-        evc_dict["updated_at"] = self.updated_at
-        evc_dict["max_paths"] = self.max_paths
-        evc_dict["leftover_switch"] = self.leftover_switch
-
         if keys:
             selected = {}
             for key in keys:
-                selected[key] = evc_dict[key]
-            selected["id"] = evc_dict["id"]
+                selected[key] = EVC_FIELDS[key](self)
+            selected["id"] = self.id
             return selected
-        return evc_dict
+        return {key: get_field(self) for key, get_field in EVC_FIELDS.items()}
+
+    def as_document(self, keys: set = None) -> dict:
+        """Return this EVC as stored in the database.
+
+        The fields are mapped straight from the attributes to what
+        EVCBaseDoc dumps, skipping its validation, which the API already
+        did for the data of an EVC. With keys only those fields and id are
+        returned, None values included so that they're set.
+        """
+        if keys:
+            document = {key: EVC_DOCUMENT_FIELDS[key](self) for key in keys}
+            document["id"] = self.id
+            return document
+        document = {"_id": self.id, "execution_rounds": 0}
+        for key, get_field in EVC_DOCUMENT_FIELDS.items():
+            value = get_field(self)
+            if value is not None:
+                document[key] = value
+        document.setdefault("queue_id", None)
+        return document
 
     @property
     def id(self):  # pylint: disable=invalid-name
         """Return this EVC's ID."""
         return self._id
 
+    @property
+    def current_links_cache(self) -> frozenset:
+        """Return the ids of the current_path links."""
+        return self.current_path.link_ids
+
+    @property
+    def primary_links_cache(self) -> frozenset:
+        """Return the ids of the primary_path links."""
+        return self.primary_path.link_ids
+
+    @property
+    def backup_links_cache(self) -> frozenset:
+        """Return the ids of the backup_path links."""
+        return self.backup_path.link_ids
+
     def archive(self):
         """Archive this EVC on deletion."""
         self.archived = True
@@ -498,7 +676,10 @@ class EVCBase(GenericEntity):
         tag_type = uni.user_tag.tag_type
         if (uni_dif and isinstance(tag, list) and
                 isinstance(uni_dif.user_tag.value, list)):
-            tag = range_difference(tag, uni_dif.user_tag.value)
+            tag = (
+                VlanBitmap.from_ranges(tag)
+                - VlanBitmap.from_ranges(uni_dif.user_tag.value)
+            ).to_ranges()
             if not tag:
                 return
         uni.interface.use_tags(
@@ -517,7 +698,10 @@ class EVCBase(GenericEntity):
         tag_type = uni.user_tag.tag_type
         if (uni_dif and isinstance(tag, list) and
                 isinstance(uni_dif.user_tag.value, list)):
-            tag = range_difference(tag, uni_dif.user_tag.value)
+            tag = (
+                VlanBitmap.from_ranges(tag)
+                - VlanBitmap.from_ranges(uni_dif.user_tag.value)
+            ).to_ranges()
             if not tag:
                 return
         try:
@@ -569,7 +753,7 @@ class EVCDeploy(EVCBase):
 
     def is_affected_by_link(self, link):
         """Return True if this EVC has the given link on its current path."""
-        return link in self.current_path
+        return self.current_path.is_affected_by_link(link)
 
     def link_affected_by_interface(self, interface):
         """Return True if this EVC has the given link on its current path."""
@@ -577,16 +761,16 @@ class EVCDeploy(EVCBase):
 
     def is_backup_path_affected_by_link(self, link):
         """Return True if the backup path of this EVC uses the given link."""
-        return link in self.backup_path
+        return self.backup_path.is_affected_by_link(link)
 
     # pylint: disable=invalid-name
     def is_primary_path_affected_by_link(self, link):
         """Return True if the primary path of this EVC uses the given link."""
-        return link in self.primary_path
+        return self.primary_path.is_affected_by_link(link)
 
     def is_failover_path_affected_by_link(self, link):
         """Return True if this EVC has the given link on its failover path."""
-        return link in self.failover_path
+        return self.failover_path.is_affected_by_link(link)
 
     def is_eligible_for_failover_path(self):
         """Verify if this EVC is eligible for failover path (EP029)"""
@@ -616,7 +800,9 @@ class EVCDeploy(EVCBase):
             return True
         return False
 
-    def deploy_to_backup_path(self, old_path_dict: dict = None):
+    def deploy_to_backup_path(
+        self, old_path_dict: dict = None, make_before_break=False
+    ):
         """Deploy the backup path into the datapaths of this circuit.
 
         If the backup_path attribute is valid and up, this method will try to
@@ -632,17 +818,24 @@ class EVCDeploy(EVCBase):
 
         success = False
         if self.backup_path.status is EntityStatus.UP:
-            success = self.deploy_to_path(self.backup_path, old_path_dict)
+            success = self.deploy_to_path(
+                self.backup_path, old_path_dict, make_before_break
+            )
 
         if success:
             return True
 
         if self.dynamic_backup_path or self.is_intra_switch():
-            return self.deploy_to_path(old_path_dict=old_path_dict)
+            return self.deploy_to_path(
+                old_path_dict=old_path_dict,
+                make_before_break=make_before_break,
+            )
 
         return False
 
-    def deploy_to_primary_path(self, old_path_dict: dict = None):
+    def deploy_to_primary_path(
+        self, old_path_dict: dict = None, make_before_break=False
+    ):
         """Deploy the primary path into the datapaths of this circuit.
 
         If the primary_path attribute is valid and up, this method will try to
@@ -654,10 +847,12 @@ class EVCDeploy(EVCBase):
             return True
 
         if self.primary_path.status is EntityStatus.UP:
-            return self.deploy_to_path(self.primary_path, old_path_dict)
+            return self.deploy_to_path(
+                self.primary_path, old_path_dict, make_before_break
+            )
         return False
 
-    def deploy(self, old_path_dict: dict = None):
+    def deploy(self, old_path_dict: dict = None, make_before_break=False):
         """Deploy EVC to best path.
 
         Best path can be the primary path, if available. If not, the backup
@@ -666,9 +861,13 @@ class EVCDeploy(EVCBase):
         if self.archived:
             return False
         self.enable()
-        success = self.deploy_to_primary_path(old_path_dict)
+        success = self.deploy_to_primary_path(
+            old_path_dict, make_before_break
+        )
         if not success:
-            success = self.deploy_to_backup_path(old_path_dict)
+            success = self.deploy_to_backup_path(
+                old_path_dict, make_before_break
+            )
 
         if success:
             emit_event(self._controller, "deployed",
@@ -697,7 +896,7 @@ class EVCDeploy(EVCBase):
         self.remove_current_flows(sync=False)
         self.remove_failover_flows(sync=False)
         self.disable()
-        self.sync()
+        self.sync(trusted=True)
         emit_event(self._controller, "undeployed",
                    content=map_evc_event_content(self))
 
@@ -742,7 +941,7 @@ class EVCDeploy(EVCBase):
             log.error(f"Error removing {self} failover_path: {err}")
         self.failover_path = Path([])
         if sync:
-            self.sync()
+            self.sync(trusted=True)
 
     # pylint: disable=too-many-arguments
     def remove_current_flows(
@@ -798,7 +997,7 @@ class EVCDeploy(EVCBase):
         self.last_removed_at = now()
         self.deactivate()
         if sync:
-            self.sync()
+            self.sync(trusted=True)
         return old_path_dict
 
     def remove_path_flows(
@@ -944,7 +1143,12 @@ class EVCDeploy(EVCBase):
         return True
 
     # pylint: disable=too-many-branches, too-many-statements
-    def deploy_to_path(self, path=None, old_path_dict: dict = None):
+    def deploy_to_path(
+        self,
+        path=None,
+        old_path_dict: dict = None,
+        make_before_break=False,
+    ):
         """Install the flows for this circuit.
 
         Procedures to deploy:
@@ -958,16 +1162,91 @@ class EVCDeploy(EVCBase):
         6. Update current_path
         7. Update links caches(primary, current, backup)
 
+        With make_before_break, the current flows of an inter-switch EVC
+        are only removed after the new ones are installed, see
+        _deploy_make_before_break.
         """
+        if (
+            make_before_break
+            and self.current_path
+            and not self.is_intra_switch()
+        ):
+            return self._deploy_make_before_break(path)
+
         self.remove_current_flows(sync=False)
+        use_path, tag_errors, no_valid_path = self._choose_path(
+            path, old_path_dict
+        )
+
+        try:
+            if use_path:
+                self._install_flows(use_path)
+            elif self.is_intra_switch():
+                use_path = Path()
+                self._install_direct_uni_flows()
+            else:
+                self._log_not_deployed(tag_errors, no_valid_path)
+                return False
+        except EVCPathNotInstalled as err:
+            log.error(
+                f"Error deploying EVC {self} when calling flow_manager: {err}"
+            )
+            self.remove_current_flows(use_path, sync=True)
+            return False
+
+        self.current_path = use_path
+        msg = f"{self} was deployed."
+        self.last_deployed_at = now()
+        try:
+            self.try_to_activate()
+        except ActivationError as exc:
+            msg = f"{msg} {str(exc)}"
+        self.sync(trusted=True)
+        log.info(msg)
+        return True
+
+    def _choose_path(
+        self, path=None, old_path_dict: dict = None, keep_path=None
+    ) -> tuple[Path, list, bool]:
+        """Choose the path to deploy and its VLANs.
+
+        It's path, if it should be deployed, or the first discovered path
+        whose VLANs could be chosen. The links of keep_path, the path being
+        replaced by a make-before-break deploy, keep their current VLANs.
+
+        Return the path (None if there's none), the tag errors and whether
+        an invalid path was discovered.
+        """
         use_path = path or Path([])
         if not old_path_dict:
             old_path_dict = {}
         tag_errors = []
         no_valid_path = False
-        if self.should_deploy(use_path):
-            try:
+
+        def choose_vlans(use_path):
+            if not keep_path:
                 use_path.choose_vlans(self._controller, old_path_dict)
+                return
+            kept_links = {link.id: link for link in keep_path}
+            Path(
+                [link for link in use_path if link.id not in kept_links]
+            ).choose_vlans(self._controller, old_path_dict)
+            # The links of a new path are new Link objects, the shared ones
+            # take the VLAN of their kept link
+            for link in use_path:
+                kept_link = kept_links.get(link.id)
+                if kept_link is not None and kept_link is not link:
+                    link.update_metadata(
+                        "s_vlan", kept_link.get_metadata("s_vlan")
+                    )
+
+        if keep_path is not None:
+            should_deploy = bool(use_path) and self.is_enabled()
+        else:
+            should_deploy = self.should_deploy(use_path)
+        if should_deploy:
+            try:
+                choose_vlans(use_path)
             except KytosNoTagAvailableError as e:
                 tag_errors.append(str(e))
                 use_path = None
@@ -977,39 +1256,93 @@ class EVCDeploy(EVCBase):
                     no_valid_path = True
                     continue
                 try:
-                    use_path.choose_vlans(self._controller, old_path_dict)
+                    choose_vlans(use_path)
                     break
                 except KytosNoTagAvailableError as e:
                     tag_errors.append(str(e))
             else:
                 use_path = None
+        return use_path, tag_errors, no_valid_path
+
+    def _log_not_deployed(self, tag_errors: list, no_valid_path: bool):
+        """Log why no path could be deployed."""
+        no_path_msg = "No available path was found."
+        if no_valid_path:
+            no_path_msg = "No valid path was found, "\
+                          "try increasing `max_paths`"\
+                         f" from {self.max_paths}."
+        msg = f"{self} was not deployed. {no_path_msg}"
+        if tag_errors:
+            msg = self.add_tag_errors(msg, tag_errors)
+            log.error(msg)
+        else:
+            log.warning(msg)
 
-        try:
-            if use_path:
-                self._install_flows(use_path)
-            elif self.is_intra_switch():
-                use_path = Path()
-                self._install_direct_uni_flows()
-            else:
-                no_path_msg = "No available path was found."
-                if no_valid_path:
-                    no_path_msg = "No valid path was found, "\
-                                  "try increasing `max_paths`"\
-                                 f" from {self.max_paths}."
-                msg = f"{self} was not deployed. {no_path_msg}"
-                if tag_errors:
-                    msg = self.add_tag_errors(msg, tag_errors)
-                    log.error(msg)
-                else:
-                    log.warning(msg)
-                return False
-        except EVCPathNotInstalled as err:
-            log.error(
-                f"Error deploying EVC {self} when calling flow_manager: {err}"
-            )
-            self.remove_current_flows(use_path, sync=True)
+    def _deploy_make_before_break(self, path=None) -> bool:
+        """Move this circuit from its current path to a new one.
+
+        The links shared with the current path keep their VLANs, so only
+        the flows that differ from the installed ones are sent. The new
+        flows are installed first, then the current flows that weren't
+        replaced are deleted, with a single request per phase. If a new
+        path can't be chosen, the current path is kept.
+        """
+        old_path = self.current_path
+        old_flows = merge_flow_dicts(
+            {},
+            self._prepare_nni_flows(old_path),
+            self._prepare_uni_flows(old_path),
+        )
+        use_path, tag_errors, no_valid_path = self._choose_path(
+            path, keep_path=old_path
+        )
+        if not use_path:
+            self._log_not_deployed(tag_errors, no_valid_path)
             return False
 
+        new_flows = merge_flow_dicts(
+            {},
+            self._prepare_nni_flows(use_path),
+            self._prepare_uni_flows(use_path),
+        )
+        install_flows, delete_flows = self._diff_flows(old_flows, new_flows)
+        if install_flows:
+            try:
+                self._send_flow_mods(
+                    install_flows, "install", by_switch=True
+                )
+            except FlowModException as err:
+                log.error(
+                    f"Error deploying EVC {self} when calling flow_manager: "
+                    f"{err}"
+                )
+                self.remove_current_flows(
+                    Path(
+                        old_path
+                        + [
+                            link for link in use_path
+                            if link.id not in old_path.link_ids
+                        ]
+                    ),
+                    sync=True,
+                )
+                return False
+        if delete_flows:
+            try:
+                self._send_flow_mods(delete_flows, "delete", by_switch=True)
+            except FlowModException as err:
+                log.error(f"Error deleting {self} replaced flows, {err}")
+
+        try:
+            Path(
+                [
+                    link for link in old_path
+                    if link.id not in use_path.link_ids
+                ]
+            ).make_vlans_available(self._controller)
+        except KytosTagError as err:
+            log.error(f"Error removing {self} replaced path: {err}")
+
         self.current_path = use_path
         msg = f"{self} was deployed."
         self.last_deployed_at = now()
@@ -1017,18 +1350,58 @@ class EVCDeploy(EVCBase):
             self.try_to_activate()
         except ActivationError as exc:
             msg = f"{msg} {str(exc)}"
-        self.sync()
+        self.sync(trusted=True)
         log.info(msg)
         return True
 
+    @staticmethod
+    def _diff_flows(
+        old_flows: dict[str, list], new_flows: dict[str, list]
+    ) -> tuple[dict[str, dict], dict[str, dict]]:
+        """Return the flows by switch to install and to delete.
+
+        Flows are identified by dpid, match, priority and table: a new flow
+        is installed unless it's already installed as is, and an old flow
+        is deleted unless a new flow replaces it.
+        """
+        def flow_key(flow: dict) -> tuple:
+            return (
+                json.dumps(flow["match"], sort_keys=True),
+                flow.get("priority"),
+                flow.get("table_id"),
+            )
+
+        install_flows, delete_flows = {}, {}
+        for dpid in new_flows.keys() | old_flows.keys():
+            old = {flow_key(flow): flow for flow in old_flows.get(dpid, [])}
+            new = {flow_key(flow): flow for flow in new_flows.get(dpid, [])}
+            to_install = [
+                flow for key, flow in new.items() if old.get(key) != flow
+            ]
+            to_delete = [
+                {
+                    "cookie": flow["cookie"],
+                    "match": flow["match"],
+                    "owner": "mef_eline",
+                    "cookie_mask": int(0xffffffffffffffff),
+                }
+                for key, flow in old.items() if key not in new
+            ]
+            if to_install:
+                install_flows[dpid] = {"flows": to_install}
+            if to_delete:
+                delete_flows[dpid] = {"flows": to_delete}
+        return install_flows, delete_flows
+
     # pylint: disable=too-many-statements
-    def setup_failover_path(self, warn_if_not_path=True):
+    def setup_failover_path(self, warn_if_not_path=True, candidates=None):
         """Install flows for the failover path of this EVC.
 
         Procedures to deploy:
 
         0. Remove flows currently installed for failover_path (if any)
-        1. Discover a disjoint path from current_path
+        1. Discover a disjoint path from current_path, unless candidates
+           were already computed, e.g., by the FailoverPlanner
         2. Choose vlans
         3. Install NNI flows
         4. Install UNI egress flows
@@ -1048,7 +1421,9 @@ class EVCDeploy(EVCBase):
         out_removed_flows = self.remove_path_flows(self.failover_path)
         self.failover_path = Path([])
 
-        for use_path in self.get_failover_path_candidates():
+        if candidates is None:
+            candidates = self.get_failover_path_candidates()
+        for use_path in candidates or []:
             if not use_path:
                 continue
             try:
@@ -1077,7 +1452,9 @@ class EVCDeploy(EVCBase):
             use_path = Path([])
 
         self.failover_path = use_path
-        self.sync()
+        # Precompute the flows used by a swap to failover on link_down
+        self.get_failover_flows()
+        self.sync(trusted=True)
 
         if out_new_flows or out_removed_flows:
             emit_event(self._controller, "failover_deployed", content={
@@ -1127,7 +1504,39 @@ class EVCDeploy(EVCBase):
         """
         if not self.failover_path:
             return {}
-        return self._prepare_uni_flows(self.failover_path, skip_out=True)
+        key = self._failover_flows_key()
+        if self._failover_flows is None or self._failover_flows[0] != key:
+            flows = self._prepare_uni_flows(self.failover_path, skip_out=True)
+            self._failover_flows = (key, flows)
+        # The lists are copied since merge_flow_dicts extends them
+        return {
+            dpid: list(flows)
+            for dpid, flows in self._failover_flows[1].items()
+        }
+
+    def _failover_flows_key(self) -> tuple:
+        """Return everything the failover flows are computed from.
+
+        The cached failover flows are recomputed whenever the UNIs,
+        queue_id, sb_priority, table_group or failover_path change.
+        """
+        return (
+            tuple(
+                (
+                    uni.interface.id,
+                    uni.interface.switch.id,
+                    uni.user_tag.value if uni.user_tag else None,
+                )
+                for uni in (self.uni_a, self.uni_z)
+            ),
+            self.queue_id,
+            self.sb_priority,
+            dict(self.table_group or {}),
+            tuple(
+                (link.id, getattr(link.get_metadata("s_vlan"), "value", None))
+                for link in self.failover_path
+            ),
+        )
 
     # pylint: disable=too-many-branches
     def _prepare_direct_uni_flows(self):
@@ -1386,13 +1795,6 @@ class EVCDeploy(EVCBase):
         return uni_flows
 
     @staticmethod
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_combine(wait_fixed(3), wait_random(min=2, max=7)),
-        retry=retry_if_exception_type(FlowModException),
-        before_sleep=before_sleep,
-        reraise=True,
-    )
     def _send_flow_mods(
         data_content: dict,
         command="install",
@@ -1413,17 +1815,10 @@ class EVCDeploy(EVCBase):
         else:
             endpoint = f"{settings.MANAGER_URL}/flows"
             data_content["force"] = force
-        try:
-            if command == "install":
-                res = httpx.post(endpoint, json=data_content, timeout=30)
-            elif command == "delete":
-                res = httpx.request(
-                    "DELETE", endpoint, json=data_content, timeout=30
-                )
-        except httpx.RequestError as err:
-            raise FlowModException(str(err)) from err
-        if res.is_server_error or res.status_code >= 400:
-            raise FlowModException(res.text)
+        method = "POST" if command == "install" else "DELETE"
+        flow_mod_dispatcher.send(
+            method, endpoint, data_content, coalesce=by_switch
+        )
 
     def get_cookie(self):
         """Return the cookie integer from evc id."""
@@ -1610,7 +2005,7 @@ class EVCDeploy(EVCBase):
                                             }
             data.append(data_uni)
         try:
-            response = httpx.put(endpoint, json=data, timeout=30)
+            response = get_client("sdntrace_cp").put(endpoint, json=data)
         except httpx.TimeoutException as exception:
             log.error(f"Request has timed out: {exception}")
             return {"result": []}
@@ -1878,6 +2273,19 @@ class LinkProtection(EVCDeploy):
                 return True
         return False
 
+    def should_revert_to_primary_path(self, link) -> bool:
+        """Whether a link_up should redeploy this EVC to its primary_path.
+
+        It's the case handled by handle_link_up when the primary_path is
+        affected by link and it's UP, which can be handled in bulk.
+        """
+        return bool(
+            not self.is_using_primary_path()
+            and not self.is_intra_switch()
+            and self.primary_path.is_affected_by_link(link)
+            and self.primary_path.status == EntityStatus.UP
+        )
+
     def handle_link_down(self):
         """Handle circuit when link down.
 
@@ -1899,7 +2307,7 @@ class LinkProtection(EVCDeploy):
         else:
             self.remove_current_flows(sync=False)
             self.deactivate()
-            self.sync()
+            self.sync(trusted=True)
             log.debug(f"Failed to re-deploy {self} after link down.")
 
         return success
@@ -1959,7 +2367,7 @@ class LinkProtection(EVCDeploy):
             )
             emit_event(self._controller, "uni_active_updated",
                        content=map_evc_event_content(self))
-            self.sync()
+            self.sync(trusted=True)
         except ActivationError as exc:
             # On this ctx, no ActivationError isn't expected since the
             # activation pre-requisites states were checked, so handled as err
@@ -1986,7 +2394,7 @@ class LinkProtection(EVCDeploy):
         )
         emit_event(self._controller, "uni_active_updated",
                    content=map_evc_event_content(self))
-        self.sync()
+        self.sync(trusted=True)
 
 
 class EVC(LinkProtection):
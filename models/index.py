@@ -0,0 +1,241 @@
+"""In-memory indexes used to find the EVCs affected by topology events."""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from operator import itemgetter
+from threading import Lock
+
+
+class LinkIndex:
+    """Reverse index from link id to the EVCs using that link.
+
+    Each path attribute of an EVC is indexed separately, so link_down can
+    look up only current_path/failover_path users and link_up only
+    primary_path/backup_path users. EVCs added to the index keep it
+    updated whenever one of their path attributes is assigned.
+
+    The inactive EVCs with dynamic_backup_path are also kept, since any
+    link_up might let them be deployed, and updated whenever their
+    active state or dynamic_backup_path is set.
+    """
+
+    path_attributes = (
+        "current_path",
+        "failover_path",
+        "primary_path",
+        "backup_path",
+    )
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # link id -> evc id -> path attributes using the link
+        self._links = defaultdict(dict)
+        # evc id -> path attribute -> link ids
+        self._paths = defaultdict(dict)
+        self._evcs = {}
+        # evc id -> inactive evc with dynamic_backup_path
+        self._inactive_dynamic = {}
+
+    def add(self, evc) -> None:
+        """Index all paths of an EVC and keep them indexed on changes."""
+        evc.link_index = self
+        for attribute in self.path_attributes:
+            self.update_path(evc, attribute, getattr(evc, attribute))
+        self.update_state(evc)
+
+    def remove(self, evc) -> None:
+        """Remove an EVC from the index."""
+        if evc.link_index is self:
+            evc.link_index = None
+        with self._lock:
+            for link_ids in self._paths.pop(evc.id, {}).values():
+                for link_id in link_ids:
+                    self._discard(link_id, evc.id)
+            self._evcs.pop(evc.id, None)
+            self._inactive_dynamic.pop(evc.id, None)
+
+    def update_state(self, evc) -> None:
+        """Update whether an EVC is inactive with dynamic_backup_path."""
+        with self._lock:
+            if evc.dynamic_backup_path and not evc.is_active():
+                self._inactive_dynamic[evc.id] = evc
+            else:
+                self._inactive_dynamic.pop(evc.id, None)
+
+    def update_path(self, evc, attribute: str, path) -> None:
+        """Replace the indexed links of an EVC path attribute."""
+        link_ids = {link.id for link in path or [] if link}
+        with self._lock:
+            evc_paths = self._paths[evc.id]
+            old_link_ids = evc_paths.get(attribute, set())
+            for link_id in old_link_ids - link_ids:
+                self._discard(link_id, evc.id, attribute)
+            for link_id in link_ids - old_link_ids:
+                self._links[link_id].setdefault(evc.id, set()).add(attribute)
+            if link_ids:
+                evc_paths[attribute] = link_ids
+            else:
+                evc_paths.pop(attribute, None)
+            if evc_paths:
+                self._evcs[evc.id] = evc
+            else:
+                self._paths.pop(evc.id, None)
+                self._evcs.pop(evc.id, None)
+
+    def _discard(self, link_id, evc_id: str, attribute: str = None) -> None:
+        """Discard an EVC (path attribute) from a link entry."""
+        evcs = self._links.get(link_id)
+        if evcs is None or evc_id not in evcs:
+            return
+        if attribute:
+            evcs[evc_id].discard(attribute)
+        if not attribute or not evcs[evc_id]:
+            del evcs[evc_id]
+        if not evcs:
+            del self._links[link_id]
+
+    def get_evcs(self, link_id, attributes: tuple = path_attributes) -> list:
+        """Return the EVCs using link_id in any of the path attributes."""
+        attributes = set(attributes)
+        with self._lock:
+            return [
+                self._evcs[evc_id]
+                for evc_id, evc_attributes in self._links.get(
+                    link_id, {}
+                ).items()
+                if evc_attributes & attributes
+            ]
+
+    def get_inactive_dynamic_evcs(self) -> list:
+        """Return the inactive EVCs with dynamic_backup_path."""
+        with self._lock:
+            return list(self._inactive_dynamic.values())
+
+    def __contains__(self, link_id) -> bool:
+        with self._lock:
+            return link_id in self._links
+
+
+class UNIIndex:
+    """Index from interface id to the EVCs with a UNI on that interface."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # interface id -> evc id -> evc
+        self._interfaces = defaultdict(dict)
+        # evc id -> interface ids
+        self._evc_interfaces = {}
+
+    def add(self, evc) -> None:
+        """Index (or re-index after a UNI change) the UNIs of an EVC."""
+        interface_ids = {
+            uni.interface.id for uni in (evc.uni_a, evc.uni_z) if uni
+        }
+        with self._lock:
+            old_ids = self._evc_interfaces.get(evc.id, set())
+            for interface_id in old_ids - interface_ids:
+                self._discard(interface_id, evc.id)
+            for interface_id in interface_ids:
+                self._interfaces[interface_id][evc.id] = evc
+            self._evc_interfaces[evc.id] = interface_ids
+
+    def remove(self, evc) -> None:
+        """Remove an EVC from the index."""
+        with self._lock:
+            for interface_id in self._evc_interfaces.pop(evc.id, set()):
+                self._discard(interface_id, evc.id)
+
+    def _discard(self, interface_id: str, evc_id: str) -> None:
+        """Discard an EVC from an interface entry."""
+        evcs = self._interfaces.get(interface_id)
+        if evcs is None:
+            return
+        evcs.pop(evc_id, None)
+        if not evcs:
+            del self._interfaces[interface_id]
+
+    def get_evcs(self, interface_id: str) -> list:
+        """Return the EVCs with a UNI on interface_id."""
+        with self._lock:
+            return list(self._interfaces.get(interface_id, {}).values())
+
+
+class ServiceLevelIndex:
+    """EVCs kept sorted by desc service_level and asc creation_time.
+
+    The order is only updated when an EVC is added, removed or has its
+    service_level changed, so getting the sorted EVCs doesn't sort them.
+    EVCs loaded in bulk are sorted once with load. A copy of the sorted
+    EVCs is taken on the first get_evcs after a change and returned until
+    the next one.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._keys = []
+        self._evcs = []
+        # evc id -> sort key
+        self._evc_keys = {}
+        # Copy of _evcs returned by get_evcs, None after a change
+        self._sorted = None
+
+    @staticmethod
+    def _key(evc) -> tuple:
+        """Return the sort key of an EVC, its id breaks ties."""
+        return (-evc.service_level, evc.creation_time, evc.id)
+
+    def add(self, evc) -> None:
+        """Add an EVC or update its position after a service_level change."""
+        key = self._key(evc)
+        with self._lock:
+            self._remove(evc.id)
+            position = bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._evcs.insert(position, evc)
+            self._evc_keys[evc.id] = key
+            self._sorted = None
+
+    def load(self, evcs) -> None:
+        """Add EVCs in bulk, sorting them once."""
+        with self._lock:
+            entries = {
+                key[2]: (key, evc)
+                for key, evc in zip(self._keys, self._evcs)
+            }
+            for evc in evcs:
+                entries[evc.id] = (self._key(evc), evc)
+            ordered = sorted(entries.values(), key=itemgetter(0))
+            self._keys = [key for key, _ in ordered]
+            self._evcs = [evc for _, evc in ordered]
+            self._evc_keys = {key[2]: key for key in self._keys}
+            self._sorted = None
+
+    def remove(self, evc) -> None:
+        """Remove an EVC."""
+        with self._lock:
+            self._remove(evc.id)
+
+    def _remove(self, evc_id: str) -> None:
+        key = self._evc_keys.pop(evc_id, None)
+        if key is None:
+            return
+        position = bisect_left(self._keys, key)
+        del self._keys[position]
+        del self._evcs[position]
+        self._sorted = None
+
+    def get_evcs(self, enable_filter: bool = True) -> list:
+        """Return the sorted EVCs, only the enabled ones by default.
+
+        Without enable_filter the same list is returned until the index
+        changes, it mustn't be changed.
+        """
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = self._evcs.copy()
+            evcs = self._sorted
+        if enable_filter:
+            return [evc for evc in evcs if evc.is_enabled()]
+        return evcs
+
+    def __len__(self) -> int:
+        return len(self._evcs)
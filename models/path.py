@@ -1,4 +1,13 @@
 """Classes related to paths"""
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from itertools import count
+from threading import Event, Lock
+from typing import Callable, Iterator
+
 import httpx
 from tenacity import (retry, retry_if_exception_type, stop_after_attempt,
                       wait_combine, wait_fixed, wait_random)
@@ -10,11 +19,68 @@ from kytos.core.interface import TAG
 from kytos.core.link import Link
 from kytos.core.retry import before_sleep
 from napps.kytos.mef_eline import settings
+from napps.kytos.mef_eline.clients import get_client
 from napps.kytos.mef_eline.exceptions import InvalidPath, PathFinderException
+from napps.kytos.mef_eline.models.path_engine import LocalPathEngine
+
+
+def _entity_id(entity):
+    """Return the id of a link or interface, the entity itself if none."""
+    return getattr(entity, "id", entity)
+
+
+def _resets_caches(method):
+    """Wrap a list method mutating a Path to reset its cached lookups."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._link_ids = self._interface_links = self._status = None
+        return result
+    return wrapper
 
 
 class Path(list[Link], GenericEntity):
-    """Class to represent a Path."""
+    """Class to represent a Path.
+
+    The ids of its links and the interfaces they connect are indexed on
+    first use, so link and interface lookups don't compare every link.
+    The status is cached until the topology status epoch changes, see
+    invalidate_status, for up to settings.PATH_STATUS_CACHE_TTL seconds,
+    bounding how stale a status missed by the invalidations can be. Both
+    are reset whenever the path is mutated.
+    """
+
+    status_epoch = 0
+    _epochs = count(1)
+
+    # Locks held while reserving the tags of a batch, a link uses the one
+    # of its id hash, so there's a fixed number of them however many links
+    _vlans_locks = tuple(Lock() for _ in range(64))
+
+    _link_ids = None
+    _interface_links = None
+    # (status epoch, expiry time, status)
+    _status = None
+
+    append = _resets_caches(list.append)
+    extend = _resets_caches(list.extend)
+    insert = _resets_caches(list.insert)
+    remove = _resets_caches(list.remove)
+    pop = _resets_caches(list.pop)
+    clear = _resets_caches(list.clear)
+    __setitem__ = _resets_caches(list.__setitem__)
+    __delitem__ = _resets_caches(list.__delitem__)
+    __iadd__ = _resets_caches(list.__iadd__)
+    __imul__ = _resets_caches(list.__imul__)
+
+    @classmethod
+    def invalidate_status(cls) -> None:
+        """Start a new status epoch, invalidating every cached status.
+
+        It must be called whenever a link or interface status may have
+        changed, i.e., on topology link and interface events.
+        """
+        Path.status_epoch = next(Path._epochs)
 
     def __eq__(self, other=None):
         """Compare paths."""
@@ -22,38 +88,110 @@ class Path(list[Link], GenericEntity):
             return False
         return super().__eq__(other)
 
+    @property
+    def link_ids(self) -> frozenset:
+        """Ids of the links of this path."""
+        if self._link_ids is None:
+            self._link_ids = frozenset(
+                _entity_id(link) for link in self if link
+            )
+        return self._link_ids
+
+    @property
+    def interface_links(self) -> dict:
+        """Links of this path by the ids of the interfaces they connect."""
+        if self._interface_links is None:
+            interface_links = {}
+            for link in self:
+                if not link:
+                    continue
+                for endpoint in (link.endpoint_a, link.endpoint_b):
+                    interface_links.setdefault(_entity_id(endpoint), link)
+            self._interface_links = interface_links
+        return self._interface_links
+
     def is_affected_by_link(self, link=None):
         """Verify if the current path is affected by link."""
         if not link:
             return False
-        return link in self
+        return _entity_id(link) in self.link_ids
 
     def link_affected_by_interface(self, interface=None):
         """Return the link using this interface, if any, or None otherwise."""
         if not interface:
             return None
-        for link in self:
-            if interface in (link.endpoint_a, link.endpoint_b):
-                return link
-        return None
+        return self.interface_links.get(_entity_id(interface))
 
     def choose_vlans(self, controller, old_path_dict: dict = None):
         """Choose the VLANs to be used for the circuit.
         If any of the links next tag isn't available, it'll release
         all vlans of the path that have been allocated, all or nothing.
         """
-        old_path_dict = old_path_dict if old_path_dict else {}
-        try:
-            for link in self:
+        failed = self.choose_vlans_bulk(controller, [self], [old_path_dict])
+        if failed:
+            raise failed[0]
+
+    @classmethod
+    def choose_vlans_bulk(
+        cls, controller, paths: list["Path"], old_path_dicts: list = None
+    ) -> dict[int, KytosNoTagAvailableError]:
+        """Choose the VLANs of many paths, all or nothing per path.
+
+        The tags of each link are reserved for every path using it in a
+        row, holding the link lock, starting with the links shared by the
+        most paths. Once a path fails it stops reserving tags and the ones
+        it got are released, and once a link has no tag available the
+        remaining paths using it fail without asking for one.
+        old_path_dicts holds a link id to tag dict per path, the tags to
+        try to avoid. Return the error of each failed path by its index.
+        """
+        old_path_dicts = old_path_dicts or [None] * len(paths)
+        requests = {}
+        for index, (path, old_path_dict) in enumerate(
+            zip(paths, old_path_dicts)
+        ):
+            old_path_dict = old_path_dict or {}
+            for link in path:
+                requests.setdefault(link.id, []).append(
+                    (index, link, old_path_dict.get(link.id))
+                )
+
+        failed = {}
+        link_ids = sorted(requests, key=lambda id_: -len(requests[id_]))
+        for link_id in link_ids:
+            lock = cls._vlans_locks[hash(link_id) % len(cls._vlans_locks)]
+            with lock:
+                cls._choose_link_vlans(
+                    controller, link_id, requests[link_id], failed
+                )
+        for index in failed:
+            paths[index].make_vlans_available(controller)
+        return failed
+
+    @staticmethod
+    def _choose_link_vlans(
+        controller, link_id: str, requests: list[tuple], failed: dict
+    ) -> None:
+        """Reserve a tag of a link for each of its requests.
+
+        requests are (path index, link, tag to avoid) tuples, the indexes
+        of the paths that fail are added to failed with their error.
+        """
+        exhausted = None
+        for index, link, avoid_value in requests:
+            if index in failed:
+                continue
+            if exhausted:
+                failed[index] = exhausted
+                continue
+            try:
                 tag_value = link.get_next_available_tag(
-                    controller, link.id,
-                    try_avoid_value=old_path_dict.get(link.id)
+                    controller, link_id, try_avoid_value=avoid_value
                 )
-                tag = TAG('vlan', tag_value)
-                link.add_metadata("s_vlan", tag)
-        except KytosNoTagAvailableError as exc:
-            self.make_vlans_available(controller)
-            raise exc
+            except KytosNoTagAvailableError as exc:
+                failed[index] = exhausted = exc
+                continue
+            link.add_metadata("s_vlan", TAG("vlan", tag_value))
 
     def make_vlans_available(self, controller):
         """Make the VLANs used in a path available when undeployed."""
@@ -110,8 +248,21 @@ class Path(list[Link], GenericEntity):
 
         Each endpoint link is checked instead to have the same object
         ref as topology. If any link in this path isn't UP,
-        the path isn't considered UP.
+        the path isn't considered UP. The status is cached for the
+        current status epoch, for up to settings.PATH_STATUS_CACHE_TTL
+        seconds.
         """
+        epoch = Path.status_epoch
+        now = time.monotonic()
+        cached = self._status
+        if cached is not None and cached[0] == epoch and cached[1] > now:
+            return cached[2]
+        status = self._get_status()
+        self._status = (epoch, now + settings.PATH_STATUS_CACHE_TTL, status)
+        return status
+
+    def _get_status(self) -> EntityStatus:
+        """Compute the status of the path from its links."""
         if not self:
             return EntityStatus.DISABLED
 
@@ -127,28 +278,177 @@ class Path(list[Link], GenericEntity):
         """Return list comprehension of links as_dict."""
         return [link.as_dict() for link in self if link]
 
+    def as_stored_dict(self) -> list[dict]:
+        """Return the links as stored in the database.
+
+        Only the id, endpoint ids and S-VLAN of each link are stored, the
+        links are rebuilt from the controller interfaces when loaded.
+        """
+        links = []
+        for link in self:
+            if not link:
+                continue
+            link_dict = {
+                "id": link.id,
+                "endpoint_a": {"id": link.endpoint_a.id},
+                "endpoint_b": {"id": link.endpoint_b.id},
+            }
+            s_vlan = link.get_metadata("s_vlan")
+            if s_vlan:
+                if isinstance(s_vlan, TAG):
+                    s_vlan = s_vlan.as_dict()
+                link_dict["metadata"] = {"s_vlan": s_vlan}
+            links.append(link_dict)
+        return links
+
+
+class _InflightRequest:
+    """A pathfinder request other threads can wait for."""
+
+    def __init__(self, epoch: int) -> None:
+        self.epoch = epoch
+        self.done = Event()
+        self.paths = None
+        self.error = None
+
+
+class PathFinderCache:
+    """LRU cache of pathfinder replies.
+
+    Replies are cached by request data for the current topology epoch,
+    which is incremented by invalidate on topology changes, and for at most
+    ttl seconds. Concurrent identical requests are coalesced, only one of
+    them requests pathfinder and the others wait for its reply.
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None) -> None:
+        self.max_size = (
+            settings.PATHFINDER_CACHE_SIZE if max_size is None else max_size
+        )
+        self.ttl = settings.PATHFINDER_CACHE_TTL if ttl is None else ttl
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = Lock()
+        # key -> (epoch, expiration, paths)
+        self._entries = OrderedDict()
+        self._inflight: dict[str, _InflightRequest] = {}
+
+    @staticmethod
+    def make_key(request_data: dict) -> str:
+        """Return the cache key of a pathfinder request."""
+        return json.dumps(request_data, sort_keys=True, default=str)
+
+    @staticmethod
+    def _copy(paths: list[dict]) -> list[dict]:
+        """Copy the paths, since their dicts are updated by callers."""
+        return [dict(path) for path in paths]
+
+    def invalidate(self) -> None:
+        """Start a new topology epoch, dropping every cached reply."""
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+
+    def clear(self) -> None:
+        """Drop every cached reply and reset the counters."""
+        self.invalidate()
+        with self._lock:
+            self.hits = self.misses = self.coalesced = 0
+
+    def get_stats(self) -> dict:
+        """Return the cache counters."""
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+    def get(self, key: str, fetch: Callable[[], list[dict]]) -> list[dict]:
+        """Return the cached paths of key, calling fetch on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry
+                and entry[0] == self.epoch
+                and entry[1] > time.monotonic()
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(entry[2])
+            inflight = self._inflight.get(key)
+            leader = inflight is None or inflight.epoch != self.epoch
+            if leader:
+                self.misses += 1
+                inflight = self._inflight[key] = _InflightRequest(self.epoch)
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            inflight.done.wait()
+            if inflight.error:
+                raise inflight.error
+            return self._copy(inflight.paths)
+
+        try:
+            inflight.paths = fetch()
+        except Exception as exc:
+            inflight.error = exc
+            raise
+        finally:
+            self._store(key, inflight)
+            inflight.done.set()
+        return self._copy(inflight.paths)
+
+    def _store(self, key: str, inflight: _InflightRequest) -> None:
+        """Cache the reply of a finished request if still up to date."""
+        with self._lock:
+            if self._inflight.get(key) is inflight:
+                del self._inflight[key]
+            if (
+                inflight.error is not None
+                or self.max_size <= 0
+                or inflight.epoch != self.epoch
+            ):
+                return
+            self._entries[key] = (
+                inflight.epoch, time.monotonic() + self.ttl, inflight.paths
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
 
 class DynamicPathManager:
     """Class to handle and create paths."""
 
     controller = None
+    path_cache = PathFinderCache()
+    path_engine = LocalPathEngine()
 
     @classmethod
     def set_controller(cls, controller=None):
         """Set the controller to discovery news paths."""
         cls.controller = controller
+        cls.path_engine.set_controller(controller)
+
+    @classmethod
+    def handle_topology_event(cls, event):
+        """Update the local path engine and drop the cached paths.
+
+        Cached path statuses are invalidated as well.
+        """
+        Path.invalidate_status()
+        cls.path_engine.handle_event(event)
+        cls.path_cache.invalidate()
 
     @staticmethod
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_combine(wait_fixed(3), wait_random(min=0, max=5)),
-        retry=retry_if_exception_type(PathFinderException),
-        before_sleep=before_sleep,
-        reraise=True
-    )
-    def get_paths(circuit, max_paths=2, **kwargs) -> list[dict]:
-        """Get a valid path for the circuit from the Pathfinder."""
-        endpoint = settings.PATHFINDER_URL
+    def _request_data(circuit, max_paths=2, **kwargs) -> dict:
+        """Return the pathfinder request data of a circuit."""
         spf_attribute = kwargs.get("spf_attribute") or settings.SPF_ATTRIBUTE
         request_data = {
             "source": circuit.uni_a.interface.id,
@@ -157,8 +457,42 @@ class DynamicPathManager:
             "spf_attribute": spf_attribute
         }
         request_data.update(kwargs)
+        return request_data
+
+    @classmethod
+    def get_paths(cls, circuit, max_paths=2, **kwargs) -> list[dict]:
+        """Get a valid path for the circuit from the Pathfinder.
+
+        Replies are cached until the topology changes, see PathFinderCache.
+        """
+        request_data = cls._request_data(circuit, max_paths, **kwargs)
+        return cls.path_cache.get(
+            cls.path_cache.make_key(request_data),
+            lambda: cls._find_paths(circuit, request_data),
+        )
+
+    @classmethod
+    def _find_paths(cls, circuit, request_data: dict) -> list[dict]:
+        """Find the paths of a request with settings.PATH_ENGINE."""
+        if settings.PATH_ENGINE == "local":
+            return cls.path_engine.get_paths(**request_data)
+        return cls._request_paths(circuit, request_data)
+
+    @staticmethod
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_combine(wait_fixed(3), wait_random(min=0, max=5)),
+        retry=retry_if_exception_type(PathFinderException),
+        before_sleep=before_sleep,
+        reraise=True
+    )
+    def _request_paths(circuit, request_data: dict) -> list[dict]:
+        """Request the paths of a circuit to the Pathfinder."""
+        endpoint = settings.PATHFINDER_URL
         try:
-            api_reply = httpx.post(endpoint, json=request_data, timeout=10)
+            api_reply = get_client("pathfinder").post(
+                endpoint, json=request_data
+            )
         except httpx.RequestError as err:
             raise PathFinderException(str(err)) from err
 
@@ -206,6 +540,55 @@ class DynamicPathManager:
             return
             yield
 
+    @classmethod
+    def get_best_paths_batch(cls, circuits) -> dict[str, Iterator[Path]]:
+        """Return the best paths of many circuits by circuit id.
+
+        Circuits are grouped by source, destination and primary
+        constraints, so Pathfinder is requested once per group, with up to
+        settings.PATHFINDER_BATCH_MAX_WORKERS requests in flight. Replies
+        are kept in path_cache as well, so a circuit later calling
+        get_best_paths is served from it while the topology is unchanged.
+        """
+        groups = {}
+        for circuit in circuits:
+            request_data = cls._request_data(
+                circuit, circuit.max_paths, **circuit.primary_constraints
+            )
+            key = cls.path_cache.make_key(request_data)
+            groups.setdefault(key, (circuit, request_data, []))
+            groups[key][2].append(circuit)
+        if not groups:
+            return {}
+
+        max_workers = min(settings.PATHFINDER_BATCH_MAX_WORKERS, len(groups))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                key: executor.submit(
+                    cls.path_cache.get,
+                    key,
+                    partial(cls._find_paths, circuit, request_data),
+                )
+                for key, (circuit, request_data, _) in groups.items()
+            }
+
+        best_paths = {}
+        for key, (_, _, group) in groups.items():
+            try:
+                paths = futures[key].result()
+            # pylint: disable=broad-except
+            except Exception as err:
+                log.error(
+                    f"{group} failed to get paths from pathfinder. "
+                    f"Error {err}"
+                )
+                paths = []
+            for circuit in group:
+                best_paths[circuit.id] = (
+                    cls.create_path(path["hops"]) for path in paths
+                )
+        return best_paths
+
     @classmethod
     def get_disjoint_paths(
         cls, circuit, unwanted_path, cutoff=settings.DISJOINT_PATH_CUTOFF
@@ -250,9 +633,10 @@ class DynamicPathManager:
         """
         if cutoff < 1:
             return None
-        unwanted_links = [
-            (link.endpoint_a.id, link.endpoint_b.id) for link in unwanted_path
-        ]
+        unwanted_links = {
+            frozenset((link.endpoint_a.id, link.endpoint_b.id))
+            for link in unwanted_path
+        }
         unwanted_switches = set()
         for link in unwanted_path:
             unwanted_switches.add(link.endpoint_a.switch.id)
@@ -260,7 +644,6 @@ class DynamicPathManager:
         unwanted_switches.discard(circuit.uni_a.interface.switch.id)
         unwanted_switches.discard(circuit.uni_z.interface.switch.id)
 
-        length_unwanted = (len(unwanted_links) + len(unwanted_switches))
         if not unwanted_links:
             return None
 
@@ -274,41 +657,53 @@ class DynamicPathManager:
             )
             return None
 
+        for path in cls.rank_disjoint_paths(
+            paths, unwanted_links, unwanted_switches
+        ):
+            yield cls.create_path(path["hops"])
+        return None
+
+    @classmethod
+    def rank_disjoint_paths(
+        cls,
+        paths: list[dict],
+        unwanted_links: set[frozenset[str]],
+        unwanted_switches: set[str]
+    ) -> list[dict]:
+        """Score the disjointness of paths and return the disjoint ones.
+
+        Each path gets its "disjointness" set and the paths sharing some
+        components are returned sorted by desc disjointness and asc cost.
+        Paths are only scored, so a large cutoff costs a single set
+        intersection per path, the Path objects are created by the caller.
+        """
+        length_unwanted = len(unwanted_links) + len(unwanted_switches)
         for path in paths:
             links_n, switches_n = cls.get_shared_components(
                 path, unwanted_links, unwanted_switches
             )
             shared_components = links_n + switches_n
             path["disjointness"] = 1 - shared_components / length_unwanted
-        paths = sorted(paths, key=lambda x: (-x['disjointness'], x['cost']))
-        for path in paths:
-            if path["disjointness"] == 0:
-                continue
-            yield cls.create_path(path["hops"])
-        return None
+        return sorted(
+            (path for path in paths if path["disjointness"] != 0),
+            key=lambda x: (-x['disjointness'], x['cost'])
+        )
 
     @staticmethod
     def get_shared_components(
-        path: Path,
-        unwanted_links: list[tuple[str, str]],
+        path: dict,
+        unwanted_links: set[frozenset[str]],
         unwanted_switches: set[str]
     ) -> tuple[int, int]:
         """Return the number of shared links
-        and switches found in path."""
-        head = path["hops"][:-1]
-        tail = path["hops"][1:]
-        shared_links = 0
-        for (endpoint_a, endpoint_b) in unwanted_links:
-            if ((endpoint_a, endpoint_b) in zip(head, tail)) or (
-                (endpoint_b, endpoint_a) in zip(head, tail)
-            ):
-                shared_links += 1
-        copy_switches = unwanted_switches.copy()
-        shared_switches = 0
-        for component in path["hops"]:
-            if component in copy_switches:
-                shared_switches += 1
-                copy_switches.remove(component)
+        and switches found in path.
+
+        unwanted_links are the sets of both endpoint ids of each link, so
+        a link is matched regardless of its direction in the path."""
+        hops = path["hops"]
+        path_links = set(map(frozenset, zip(hops, hops[1:])))
+        shared_links = len(unwanted_links & path_links)
+        shared_switches = len(unwanted_switches.intersection(hops))
         return shared_links, shared_switches
 
     @classmethod
@@ -0,0 +1,279 @@
+"""In-process path engine, an alternative to requesting pathfinder."""
+import heapq
+from collections import defaultdict
+from itertools import combinations
+from threading import Lock
+from typing import Iterator, Optional
+
+from kytos.core.common import EntityStatus
+
+# Whether a link metadata value satisfies a constraint value
+_METRIC_FILTERS = {
+    "bandwidth": lambda value, wanted: value >= wanted,
+    "reliability": lambda value, wanted: value >= wanted,
+    "delay": lambda value, wanted: value <= wanted,
+    "utilization": lambda value, wanted: value <= wanted,
+    "priority": lambda value, wanted: value <= wanted,
+    "ownership": lambda value, wanted: (
+        wanted in value if isinstance(value, dict) else value == wanted
+    ),
+    "not_ownership": lambda value, wanted: (
+        not set(value) & set(wanted)
+        if isinstance(value, dict) else value not in wanted
+    ),
+}
+
+
+def _switch_id(interface_id: str) -> str:
+    """Return the switch id of an interface id."""
+    return interface_id.rsplit(":", 1)[0]
+
+
+def _shortest_path(
+    graph: dict, source: str, target: str,
+    removed_nodes: set = frozenset(), removed_edges: set = frozenset(),
+) -> Optional[tuple[float, list[str]]]:
+    """Return the cost and nodes of the shortest path (Dijkstra)."""
+    costs = {source: 0}
+    previous = {}
+    heap = [(0, source)]
+    visited = set()
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if node in visited:
+            continue
+        if node == target:
+            path = [node]
+            while node != source:
+                node = previous[node]
+                path.append(node)
+            return cost, path[::-1]
+        visited.add(node)
+        for neighbor, weight in graph.get(node, {}).items():
+            if (
+                neighbor in visited
+                or neighbor in removed_nodes
+                or (node, neighbor) in removed_edges
+            ):
+                continue
+            new_cost = cost + weight
+            if new_cost < costs.get(neighbor, float("inf")):
+                costs[neighbor] = new_cost
+                previous[neighbor] = node
+                heapq.heappush(heap, (new_cost, neighbor))
+    return None
+
+
+def k_shortest_paths(
+    graph: dict, source: str, target: str, k: int
+) -> Iterator[tuple[float, list[str]]]:
+    """Yield the cost and nodes of the k shortest simple paths (Yen).
+
+    graph maps each node to its neighbors and the weight of the edge.
+    """
+    shortest = _shortest_path(graph, source, target)
+    if shortest is None or k < 1:
+        return
+    found = [shortest]
+    candidates = []
+    seen = {tuple(shortest[1])}
+    yield shortest
+    while len(found) < k:
+        last_path = found[-1][1]
+        for i in range(len(last_path) - 1):
+            root = last_path[:i + 1]
+            removed_edges = set()
+            for _, path in found:
+                if path[:i + 1] == root:
+                    removed_edges.add((path[i], path[i + 1]))
+                    removed_edges.add((path[i + 1], path[i]))
+            spur = _shortest_path(
+                graph, root[-1], target, set(root[:-1]), removed_edges
+            )
+            if spur is None:
+                continue
+            path = root[:-1] + spur[1]
+            if tuple(path) in seen:
+                continue
+            root_cost = sum(
+                graph[node][neighbor]
+                for node, neighbor in zip(root, root[1:])
+            )
+            seen.add(tuple(path))
+            heapq.heappush(candidates, (root_cost + spur[0], path))
+        if not candidates:
+            return
+        found.append(heapq.heappop(candidates))
+        yield found[-1]
+
+
+class LocalPathEngine:
+    """Compute paths over the controller topology, without pathfinder.
+
+    The graph has a node per switch and interface, an edge between each
+    interface and its switch and an edge between the endpoints of each UP
+    link, so paths have the same hops format as pathfinder replies. The
+    links are loaded from the controller on first use and then updated by
+    topology events.
+
+    Link edges weigh their spf_attribute metadata (1 if unset) and
+    interface to switch edges weigh 1 with "hop" and 0 otherwise. A link
+    lacking the metadata of a constraint doesn't satisfy it, except for
+    not_ownership. Without minimum_flexible_hits every flexible metric
+    must be satisfied.
+    """
+
+    def __init__(self, controller=None) -> None:
+        self.controller = controller
+        self._lock = Lock()
+        self._loaded = False
+        # link id -> (endpoint a id, endpoint b id, metadata)
+        self._links: dict[str, tuple[str, str, dict]] = {}
+
+    def set_controller(self, controller) -> None:
+        """Set the controller whose topology is used."""
+        self.controller = controller
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop the links, they're loaded again on the next request."""
+        with self._lock:
+            self._loaded = False
+            self._links = {}
+
+    @staticmethod
+    def _link_entry(link) -> Optional[tuple[str, str, dict]]:
+        """Return the graph entry of a link, None if it isn't UP."""
+        if link.status is not EntityStatus.UP:
+            return None
+        return (link.endpoint_a.id, link.endpoint_b.id, dict(link.metadata))
+
+    def load(self) -> None:
+        """Load every UP link of the controller."""
+        links = {}
+        for link in list(self.controller.links.values()):
+            entry = self._link_entry(link)
+            if entry:
+                links[link.id] = entry
+        with self._lock:
+            self._links = links
+            self._loaded = True
+
+    def update_link(self, link_id: str) -> None:
+        """Update a link from its current state on the controller."""
+        link = self.controller.links.get(link_id)
+        entry = self._link_entry(link) if link else None
+        with self._lock:
+            if not self._loaded:
+                return
+            if entry:
+                self._links[link_id] = entry
+            else:
+                self._links.pop(link_id, None)
+
+    def handle_event(self, event) -> None:
+        """Update the graph on a topology event.
+
+        Link events update that link, other events reload the topology.
+        """
+        link = event.content.get("link")
+        if link is not None:
+            self.update_link(getattr(link, "id", link))
+        else:
+            self.reset()
+
+    @staticmethod
+    def _satisfies(metadata: dict, metrics: list[tuple]) -> bool:
+        """Whether link metadata satisfies all metrics constraints."""
+        for metric, wanted in metrics:
+            if metric == "not_ownership":
+                value = metadata.get("ownership")
+                if value is not None and not _METRIC_FILTERS[metric](
+                    value, wanted
+                ):
+                    return False
+                continue
+            value = metadata.get(metric)
+            if value is None or not _METRIC_FILTERS[metric](value, wanted):
+                return False
+        return True
+
+    # pylint: disable=too-many-arguments, too-many-locals
+    def _graph(
+        self, links: dict, source: str, destination: str,
+        spf_attribute: str, metrics: list[tuple], undesired_links: set,
+    ) -> dict[str, dict[str, float]]:
+        """Build the weighted graph of the links satisfying metrics."""
+        switch_weight = 1 if spf_attribute == "hop" else 0
+        graph = defaultdict(dict)
+
+        def add_edge(node_a, node_b, weight):
+            graph[node_a][node_b] = weight
+            graph[node_b][node_a] = weight
+
+        for interface_id in (source, destination):
+            add_edge(interface_id, _switch_id(interface_id), switch_weight)
+        for link_id, (endpoint_a, endpoint_b, metadata) in links.items():
+            if link_id in undesired_links or not self._satisfies(
+                metadata, metrics
+            ):
+                continue
+            weight = 1
+            if spf_attribute != "hop":
+                weight = metadata.get(spf_attribute, 1)
+            add_edge(endpoint_a, endpoint_b, weight)
+            add_edge(endpoint_a, _switch_id(endpoint_a), switch_weight)
+            add_edge(endpoint_b, _switch_id(endpoint_b), switch_weight)
+        return graph
+
+    # pylint: disable=too-many-arguments, too-many-locals
+    def get_paths(
+        self, source: str, destination: str, spf_max_paths: int = 2,
+        spf_attribute: str = "hop", spf_max_path_cost: float = None,
+        mandatory_metrics: dict = None, flexible_metrics: dict = None,
+        minimum_flexible_hits: int = None, undesired_links: list = None,
+        **_kwargs,
+    ) -> list[dict]:
+        """Return the paths of a pathfinder request, like its reply paths.
+
+        With flexible metrics, the paths satisfying each combination of
+        minimum_flexible_hits of them are merged and sorted by cost.
+        """
+        if source == destination:
+            return []
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            links = dict(self._links)
+
+        mandatory = [
+            (metric, value)
+            for metric, value in (mandatory_metrics or {}).items()
+            if value is not None
+        ]
+        flexible = [
+            (metric, value)
+            for metric, value in (flexible_metrics or {}).items()
+            if value is not None
+        ]
+        hits = len(flexible)
+        if minimum_flexible_hits is not None:
+            hits = min(minimum_flexible_hits, hits)
+
+        found = {}
+        for flexible_hits in combinations(flexible, hits):
+            graph = self._graph(
+                links, source, destination, spf_attribute or "hop",
+                mandatory + list(flexible_hits), set(undesired_links or []),
+            )
+            for cost, path in k_shortest_paths(
+                graph, source, destination, spf_max_paths
+            ):
+                found.setdefault(tuple(path), cost)
+
+        paths = sorted(found.items(), key=lambda item: (item[1], item[0]))
+        return [
+            {"hops": list(hops), "cost": cost}
+            for hops, cost in paths[:spf_max_paths]
+            if spf_max_path_cost is None or cost <= spf_max_path_cost
+        ]
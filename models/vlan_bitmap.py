@@ -0,0 +1,87 @@
+"""Bitmap of VLAN tags, an alternative to lists of tag ranges."""
+from typing import Iterable, Iterator, Union
+
+
+class VlanBitmap:
+    """Set of VLAN tags stored as the bits of an int.
+
+    Bit n is set when tag n is in the set, so union, intersection,
+    difference and overlap tests are a single int operation regardless of
+    how fragmented the tags are. Tag ranges, i.e. [start, end] lists as
+    used by kytos core, are converted with from_ranges and to_ranges.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0) -> None:
+        self.bits = bits
+
+    @classmethod
+    def from_ranges(
+        cls, tag_ranges: Iterable[Union[list[int], tuple[int, int]]]
+    ) -> "VlanBitmap":
+        """Return the bitmap of tag ranges, e.g. [[1, 10], [20, 20]]."""
+        bits = 0
+        for start, end in tag_ranges:
+            if start <= end:
+                bits |= ((1 << (end - start + 1)) - 1) << start
+        return cls(bits)
+
+    @classmethod
+    def from_interface(cls, interface, tag_type: str = "vlan"):
+        """Return the bitmap of the available tags of an interface."""
+        return cls.from_ranges(interface.available_tags.get(tag_type, []))
+
+    def iter_ranges(self) -> Iterator[list[int]]:
+        """Yield the [start, end] ranges of the tags, in order."""
+        bits = self.bits
+        while bits:
+            start = (bits & -bits).bit_length() - 1
+            run = bits >> start
+            length = (~run & (run + 1)).bit_length() - 1
+            yield [start, start + length - 1]
+            bits &= ~(((1 << length) - 1) << start)
+
+    def to_ranges(self) -> list[list[int]]:
+        """Return the [start, end] ranges of the tags, in order."""
+        return list(self.iter_ranges())
+
+    def overlaps(self, other: "VlanBitmap") -> bool:
+        """Whether any tag is in both bitmaps."""
+        return bool(self.bits & other.bits)
+
+    def issubset(self, other: "VlanBitmap") -> bool:
+        """Whether every tag is in other bitmap."""
+        return not self.bits & ~other.bits
+
+    def __or__(self, other: "VlanBitmap") -> "VlanBitmap":
+        return VlanBitmap(self.bits | other.bits)
+
+    def __and__(self, other: "VlanBitmap") -> "VlanBitmap":
+        return VlanBitmap(self.bits & other.bits)
+
+    def __sub__(self, other: "VlanBitmap") -> "VlanBitmap":
+        return VlanBitmap(self.bits & ~other.bits)
+
+    def __le__(self, other: "VlanBitmap") -> bool:
+        return self.issubset(other)
+
+    def __contains__(self, tag: int) -> bool:
+        return tag >= 0 and bool(self.bits >> tag & 1)
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __bool__(self) -> bool:
+        return bool(self.bits)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VlanBitmap):
+            return NotImplemented
+        return self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self) -> str:
+        return f"VlanBitmap({self.to_ranges()})"
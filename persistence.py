@@ -0,0 +1,174 @@
+"""Write-behind persistence of EVCs."""
+import time
+from threading import Condition, Lock, Thread
+from typing import Optional
+
+from kytos.core import log
+from napps.kytos.mef_eline import settings
+
+
+class EVCWriteBehind:
+    """Buffer the EVC writes and flush them to MongoDB in bulk.
+
+    While running, EVCBase.sync hands its upsert_evc and update_evc writes
+    to this buffer instead of writing them right away. The writes of an EVC
+    are merged into a single update, so an EVC synced several times during
+    an operation is written once, and the pending EVCs are flushed with a
+    single bulk_write every settings.EVC_WRITE_BEHIND_INTERVAL seconds, or
+    as soon as settings.EVC_WRITE_BEHIND_MAX_PENDING EVCs are pending. The
+    writes of a failed flush are kept for the next one.
+
+    Whoever reads or writes EVCs in MongoDB directly, e.g. the REST
+    endpoints, must flush first. stop flushes the pending writes.
+    """
+
+    def __init__(
+        self, interval: float = None, max_pending: int = None
+    ) -> None:
+        self.interval = (
+            settings.EVC_WRITE_BEHIND_INTERVAL
+            if interval is None else interval
+        )
+        self.max_pending = (
+            settings.EVC_WRITE_BEHIND_MAX_PENDING
+            if max_pending is None else max_pending
+        )
+        self.mongo_controller = None
+        self._condition = Condition()
+        self._flush_lock = Lock()
+        # evc id -> (fields to set, whether to upsert)
+        self._pending: dict[str, tuple[dict, bool]] = {}
+        self._thread: Optional[Thread] = None
+        self._running = False
+        self._writes = 0
+        self._flushed = 0
+        self._flushes = 0
+        self._errors = 0
+        self._last_flush = 0.0
+        self._max_flush = 0.0
+        self._total_flush = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Whether EVC writes are buffered."""
+        return self._running
+
+    def start(self, mongo_controller) -> None:
+        """Start flushing to mongo_controller, unless interval is 0."""
+        self.mongo_controller = mongo_controller
+        if self.interval <= 0 or self._running:
+            return
+        self._running = True
+        self._thread = Thread(
+            target=self._run, name="evc_write_behind", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop the flushing thread and flush the pending writes."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def upsert_evc(self, evc: dict, trusted: bool = False) -> None:
+        """Buffer an ELineController.upsert_evc write."""
+        fields = self.mongo_controller.get_upsert_fields(evc, trusted=trusted)
+        self._add(evc["id"], fields, True)
+
+    def update_evc(self, evc: dict, trusted: bool = False) -> None:
+        """Buffer an ELineController.update_evc write."""
+        fields = self.mongo_controller.get_update_fields(evc, trusted=trusted)
+        self._add(evc["id"], fields, False)
+
+    def _add(self, evc_id: str, fields: dict, upsert: bool) -> None:
+        """Merge the fields of a write into the pending ones of the EVC."""
+        with self._condition:
+            pending_fields, pending_upsert = self._pending.get(
+                evc_id, ({}, False)
+            )
+            self._pending[evc_id] = (
+                {**pending_fields, **fields}, pending_upsert or upsert
+            )
+            self._writes += 1
+            if len(self._pending) >= self.max_pending:
+                self._condition.notify_all()
+
+    def _run(self) -> None:
+        """Flush every interval or once max_pending EVCs are pending."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: (
+                        not self._running
+                        or len(self._pending) >= self.max_pending
+                    ),
+                    self.interval,
+                )
+                if not self._running:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the pending EVCs, return how many were written.
+
+        It returns once every write buffered before the call is done, or
+        has failed and is kept pending.
+        """
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            start = time.monotonic()
+            try:
+                self.mongo_controller.write_evcs(pending)
+            # pylint: disable=broad-except
+            except Exception as exc:
+                log.error(f"Failed to write {len(pending)} EVCs: {exc}")
+                self._restore(pending)
+                return 0
+            elapsed = time.monotonic() - start
+            with self._condition:
+                self._flushed += len(pending)
+                self._flushes += 1
+                self._last_flush = elapsed
+                self._max_flush = max(self._max_flush, elapsed)
+                self._total_flush += elapsed
+            return len(pending)
+
+    def _restore(self, pending: dict[str, tuple[dict, bool]]) -> None:
+        """Keep the writes of a failed flush under the newer ones."""
+        with self._condition:
+            self._errors += 1
+            for evc_id, (fields, upsert) in pending.items():
+                newer_fields, newer_upsert = self._pending.get(
+                    evc_id, ({}, False)
+                )
+                self._pending[evc_id] = (
+                    {**fields, **newer_fields}, upsert or newer_upsert
+                )
+
+    def get_metrics(self) -> dict:
+        """Return the write and flush counters and flush latencies (ms)."""
+        with self._condition:
+            return {
+                "running": self._running,
+                "pending": len(self._pending),
+                "writes": self._writes,
+                "flushed": self._flushed,
+                "flushes": self._flushes,
+                "errors": self._errors,
+                "last_flush_ms": self._last_flush * 1e3,
+                "max_flush_ms": self._max_flush * 1e3,
+                "avg_flush_ms": (
+                    self._total_flush / self._flushes * 1e3
+                    if self._flushes else 0.0
+                ),
+            }
+
+
+evc_writer = EVCWriteBehind()
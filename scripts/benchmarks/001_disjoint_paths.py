@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark the disjointness scoring of get_disjoint_paths candidates."""
+import argparse
+import random
+import timeit
+
+from napps.kytos.mef_eline.models.path import DynamicPathManager
+
+
+def legacy_shared_components(path, unwanted_links, unwanted_switches):
+    """get_shared_components before it used sets, as a baseline."""
+    head = path["hops"][:-1]
+    tail = path["hops"][1:]
+    shared_links = 0
+    for (endpoint_a, endpoint_b) in unwanted_links:
+        if ((endpoint_a, endpoint_b) in zip(head, tail)) or (
+            (endpoint_b, endpoint_a) in zip(head, tail)
+        ):
+            shared_links += 1
+    copy_switches = unwanted_switches.copy()
+    shared_switches = 0
+    for component in path["hops"]:
+        if component in copy_switches:
+            shared_switches += 1
+            copy_switches.remove(component)
+    return shared_links, shared_switches
+
+
+def legacy_rank(paths, unwanted_links, unwanted_switches):
+    """Score and sort paths like get_disjoint_paths used to."""
+    length_unwanted = len(unwanted_links) + len(unwanted_switches)
+    for path in paths:
+        links_n, switches_n = legacy_shared_components(
+            path, unwanted_links, unwanted_switches
+        )
+        path["disjointness"] = 1 - (links_n + switches_n) / length_unwanted
+    paths = sorted(paths, key=lambda x: (-x["disjointness"], x["cost"]))
+    return [path for path in paths if path["disjointness"] != 0]
+
+
+def random_path(switches: int, length: int) -> list[str]:
+    """Return the hops of a random path over numbered switches."""
+    dpids = [f"00:00:00:00:00:00:{i // 256:02x}:{i % 256:02x}"
+             for i in random.sample(range(switches), length)]
+    hops = [f"{dpids[0]}:1"]
+    for i, dpid in enumerate(dpids):
+        if i:
+            hops.append(f"{dpid}:{i + 1}")
+        hops.append(dpid)
+        hops.append(f"{dpid}:{i + 2}")
+    hops[-1] = f"{dpids[-1]}:1"
+    return hops
+
+
+def main() -> None:
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--candidates", type=int, default=100,
+        help="Number of candidate paths, i.e. DISJOINT_PATH_CUTOFF",
+    )
+    parser.add_argument(
+        "--length", type=int, default=10, help="Switches per path"
+    )
+    parser.add_argument(
+        "--switches", type=int, default=200, help="Switches in the topology"
+    )
+    parser.add_argument(
+        "--number", type=int, default=200, help="Runs per measurement"
+    )
+    args = parser.parse_args()
+
+    random.seed(0)
+    unwanted_hops = random_path(args.switches, args.length)
+    interfaces = [hop for hop in unwanted_hops if hop.count(":") == 8]
+    unwanted_pairs = list(zip(interfaces[1:-1:2], interfaces[2::2]))
+    unwanted_switches = {
+        hop for hop in unwanted_hops[2:-2] if hop.count(":") == 7
+    }
+    paths = [
+        {"hops": random_path(args.switches, args.length), "cost": i}
+        for i in range(args.candidates)
+    ]
+    paths[0]["hops"] = unwanted_hops
+
+    legacy = timeit.timeit(
+        lambda: legacy_rank(
+            [dict(path) for path in paths], unwanted_pairs, unwanted_switches
+        ),
+        number=args.number,
+    )
+    unwanted_links = set(map(frozenset, unwanted_pairs))
+    current = timeit.timeit(
+        lambda: DynamicPathManager.rank_disjoint_paths(
+            [dict(path) for path in paths], unwanted_links, unwanted_switches
+        ),
+        number=args.number,
+    )
+    print(
+        f"{args.candidates} candidates of {args.length} switches, "
+        f"{len(unwanted_pairs)} unwanted links"
+    )
+    print(f"legacy: {legacy / args.number * 1e3:.3f} ms per EVC")
+    print(f"sets:   {current / args.number * 1e3:.3f} ms per EVC")
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
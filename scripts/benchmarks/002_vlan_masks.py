@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark the vlan/mask decomposition of TAGRange UNIs."""
+import argparse
+import random
+import timeit
+
+from napps.kytos.mef_eline.utils import (_get_vlan_tags_and_masks,
+                                         get_vlan_tags_and_masks)
+
+
+def legacy_max_power2_divisor(number, limit=4096):
+    """max_power2_divisor before it used bit operations, as a baseline."""
+    while number % limit > 0:
+        limit //= 2
+    return limit
+
+
+def legacy_get_vlan_tags_and_masks(tag_ranges):
+    """get_vlan_tags_and_masks before it was cached, as a baseline."""
+    masks_list = []
+    for start, end in tag_ranges:
+        limit = end + 1
+        while start < limit:
+            divisor = legacy_max_power2_divisor(start)
+            while divisor > limit - start:
+                divisor //= 2
+            mask = 4096 - divisor
+            if mask == 4095:
+                masks_list.append(start)
+            else:
+                masks_list.append(f"{start}/{mask}")
+            start += divisor
+    return masks_list
+
+
+def fragmented_ranges(size: int) -> list[list[int]]:
+    """Return ranges over 1-4094 that split into the most masks.
+
+    Each range starts on an odd tag and ends on an even one, the worst
+    case alignment, with a gap of 2 tags between ranges.
+    """
+    bounds = sorted(random.sample(range(4, 4090, 4), size - 1))
+    ranges = []
+    start = 1
+    for bound in bounds:
+        ranges.append([start, bound])
+        start = bound + 3
+    ranges.append([start, 4094])
+    return ranges
+
+
+def main() -> None:
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--evcs", type=int, default=1000, help="Number of TAGRange EVCs"
+    )
+    parser.add_argument(
+        "--distinct", type=int, default=20,
+        help="Number of distinct tag ranges among the EVCs",
+    )
+    parser.add_argument(
+        "--ranges", type=int, default=16, help="Ranges per tag range"
+    )
+    parser.add_argument(
+        "--number", type=int, default=10, help="Runs per measurement"
+    )
+    args = parser.parse_args()
+
+    random.seed(0)
+    distinct = [fragmented_ranges(args.ranges) for _ in range(args.distinct)]
+    evcs = [random.choice(distinct) for _ in range(args.evcs)]
+
+    def load(get_masks):
+        for tag_ranges in evcs:
+            get_masks(tag_ranges)
+
+    legacy = timeit.timeit(
+        lambda: load(legacy_get_vlan_tags_and_masks), number=args.number
+    )
+    current = timeit.timeit(
+        lambda: (
+            _get_vlan_tags_and_masks.cache_clear(),
+            load(get_vlan_tags_and_masks),
+        ),
+        number=args.number,
+    )
+    legacy_masks = sum(map(len, map(legacy_get_vlan_tags_and_masks, evcs)))
+    current_masks = sum(map(len, map(get_vlan_tags_and_masks, evcs)))
+    print(
+        f"{args.evcs} EVCs, {args.distinct} distinct tag ranges of "
+        f"{args.ranges} ranges"
+    )
+    print(f"legacy: {legacy / args.number * 1e3:.3f} ms per load")
+    print(f"cached: {current / args.number * 1e3:.3f} ms per load")
+    print(f"speedup: {legacy / current:.1f}x")
+    print(
+        f"masks per EVC: {legacy_masks / args.evcs:.1f} legacy, "
+        f"{current_masks / args.evcs:.1f} cached"
+    )
+
+
+if __name__ == "__main__":
+    main()
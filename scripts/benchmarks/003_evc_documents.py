@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark the validation cost of the EVC documents written to MongoDB."""
+import argparse
+import timeit
+from unittest.mock import MagicMock, patch
+
+from kytos.core.interface import TAG, UNI, Interface
+from kytos.core.link import Link
+from kytos.core.switch import Switch
+from napps.kytos.mef_eline.db.models import EVCBaseDoc
+from napps.kytos.mef_eline.models import EVC, Path
+
+
+def validated_document(evc: EVC) -> dict:
+    """Return the document update_evcs validated before trusted writes."""
+    evc_dict = evc.as_dict()
+    return EVCBaseDoc(
+        **{**evc_dict, **{"_id": evc_dict["id"]}}
+    ).model_dump(exclude_none=True)
+
+
+def linear_path(length: int) -> Path:
+    """Return a path of length links over numbered switches."""
+    switches = [
+        Switch(f"00:00:00:00:00:00:00:{i + 1:02x}") for i in range(length + 1)
+    ]
+    return Path([
+        Link(
+            Interface(f"s{i + 1}-eth2", 2, switches[i]),
+            Interface(f"s{i + 2}-eth1", 1, switches[i + 1]),
+        )
+        for i in range(length)
+    ])
+
+
+def create_evcs(number: int, length: int) -> list[EVC]:
+    """Return EVCs with their primary, current and failover paths set."""
+    path = linear_path(length)
+    backup_path = linear_path(length)
+    evcs = []
+    # The EVCs aren't written, so they don't need a MongoDB connection
+    with patch("napps.kytos.mef_eline.controllers.ELineController"):
+        for i in range(number):
+            uni_a = UNI(path[0].endpoint_a, TAG("vlan", 100 + i % 4000))
+            uni_z = UNI(path[-1].endpoint_b, TAG("vlan", 100 + i % 4000))
+            evc = EVC(
+                MagicMock(), name=f"evc{i}", uni_a=uni_a, uni_z=uni_z,
+                dynamic_backup_path=True, metadata={"index": i},
+            )
+            evc.primary_path = evc.current_path = Path(path)
+            evc.failover_path = Path(backup_path)
+            evcs.append(evc)
+    return evcs
+
+
+def main() -> None:
+    """Main function."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--evcs", type=int, default=500, help="Number of EVCs written"
+    )
+    parser.add_argument(
+        "--length", type=int, default=5, help="Links per path"
+    )
+    parser.add_argument(
+        "--number", type=int, default=10, help="Runs per measurement"
+    )
+    args = parser.parse_args()
+
+    evcs = create_evcs(args.evcs, args.length)
+    validated = timeit.timeit(
+        lambda: [validated_document(evc) for evc in evcs],
+        number=args.number,
+    )
+    trusted = timeit.timeit(
+        lambda: [evc.as_document() for evc in evcs], number=args.number
+    )
+    documents = args.evcs * args.number
+    print(f"{args.evcs} EVCs, paths of {args.length} links")
+    print(f"validated: {validated / documents * 1e6:.1f} us per document")
+    print(f"trusted:   {trusted / documents * 1e6:.1f} us per document")
+    print(f"speedup: {validated / trusted:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
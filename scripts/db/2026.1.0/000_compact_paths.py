@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Store EVC paths with the id, endpoint ids and S-VLAN of their links."""
+import json
+import os
+import sys
+
+from pymongo.operations import UpdateOne
+
+from kytos.core.db import Mongo
+
+PATH_FIELDS = (
+    "primary_links", "backup_links", "current_path", "failover_path",
+    "primary_path", "backup_path",
+)
+BATCH_SIZE = 500
+
+
+def compact_link(link: dict) -> dict:
+    """Return a link as Path.as_stored_dict stores it."""
+    compact = {
+        "endpoint_a": {"id": (link.get("endpoint_a") or {}).get("id")},
+        "endpoint_b": {"id": (link.get("endpoint_b") or {}).get("id")},
+    }
+    if "id" in link:
+        compact = {"id": link["id"], **compact}
+    s_vlan = (link.get("metadata") or {}).get("s_vlan")
+    if s_vlan:
+        compact["metadata"] = {"s_vlan": s_vlan}
+    return compact
+
+
+def compact_paths(evc: dict) -> dict:
+    """Return the compacted path fields of an EVC not yet compact."""
+    fields = {}
+    for field in PATH_FIELDS:
+        links = evc.get(field) or []
+        compact = [compact_link(link) for link in links]
+        if compact != links:
+            fields[field] = compact
+    return fields
+
+
+def get_size(value) -> int:
+    """Return the approximate size of a value in bytes."""
+    return len(json.dumps(value, default=str))
+
+
+def get_candidates(mongo: Mongo) -> None:
+    """Print how many EVCs have paths to compact and their size."""
+    db = mongo.client[mongo.db_name]
+    count = size = compact_size = 0
+    projection = {field: 1 for field in PATH_FIELDS}
+    for evc in db.evcs.find({}, projection):
+        fields = compact_paths(evc)
+        if fields:
+            count += 1
+            size += get_size({field: evc[field] for field in fields})
+            compact_size += get_size(fields)
+    print(f"{count} EVCs have paths to compact")
+    if count:
+        print(
+            f"Paths size: {size} bytes, {compact_size} bytes once compacted"
+        )
+
+
+def update_database(mongo: Mongo) -> None:
+    """Compact the paths of every EVC, in bulks of BATCH_SIZE."""
+    db = mongo.client[mongo.db_name]
+    projection = {field: 1 for field in PATH_FIELDS}
+    ops = []
+    modified = 0
+    for evc in db.evcs.find({}, projection):
+        fields = compact_paths(evc)
+        if fields:
+            ops.append(UpdateOne({"_id": evc["_id"]}, {"$set": fields}))
+        if len(ops) >= BATCH_SIZE:
+            modified += db.evcs.bulk_write(ops).modified_count
+            ops = []
+    if ops:
+        modified += db.evcs.bulk_write(ops).modified_count
+    print(f"{modified} EVCs had their paths compacted")
+
+
+def main() -> None:
+    """Main function."""
+    mongo = Mongo()
+    cmds = {
+        "get_candidates": get_candidates,
+        "update_database": update_database,
+    }
+    try:
+        cmd = os.environ["CMD"]
+        command = cmds[cmd]
+    except KeyError:
+        print(
+            f"Please set the 'CMD' env var. \nIt has to be one of these: "
+            f"{list(cmds.keys())}"
+        )
+        sys.exit(1)
+    command(mongo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Move the operational state of EVCs from evcs to evcs_state."""
+import os
+import sys
+
+from pymongo.operations import UpdateOne
+
+from kytos.core.db import Mongo
+
+STATE_FIELDS = (
+    "active", "current_path", "failover_path", "execution_rounds",
+    "flow_removed_at", "last_deployed_at", "last_removed_at", "updated_at",
+)
+BATCH_SIZE = 500
+query = {"$or": [{field: {"$exists": True}} for field in STATE_FIELDS]}
+
+
+def get_state_update(evc: dict) -> list[dict]:
+    """Return the pipeline update setting the state of an EVC.
+
+    Fields evcs_state already has were written after the split and are
+    kept.
+    """
+    state = {"id": {"$literal": evc["_id"]}}
+    for field in STATE_FIELDS:
+        if field in evc:
+            state[field] = {"$cond": [
+                {"$eq": [{"$type": f"${field}"}, "missing"]},
+                {"$literal": evc[field]},
+                f"${field}",
+            ]}
+    return [{"$set": state}]
+
+
+def get_candidates(mongo: Mongo) -> None:
+    """Print how many EVCs still have state fields in evcs."""
+    db = mongo.client[mongo.db_name]
+    count = db.evcs.count_documents(query)
+    print(f"{count} EVCs have state fields to move to evcs_state")
+
+
+def update_database(mongo: Mongo) -> None:
+    """Move the state fields of every EVC, in bulks of BATCH_SIZE.
+
+    EVCs are paged by _id, each page with its own query, so no cursor is
+    left open over the documents being unset.
+    """
+    db = mongo.client[mongo.db_name]
+    projection = {field: 1 for field in STATE_FIELDS}
+    unset = {field: "" for field in STATE_FIELDS}
+    moved = 0
+    page_query = query
+    while True:
+        batch = list(
+            db.evcs.find(page_query, projection)
+            .sort("_id", 1)
+            .limit(BATCH_SIZE)
+        )
+        if not batch:
+            break
+        page_query = {**query, "_id": {"$gt": batch[-1]["_id"]}}
+        db.evcs_state.bulk_write([
+            UpdateOne({"_id": evc["_id"]}, get_state_update(evc), upsert=True)
+            for evc in batch
+        ])
+        moved += db.evcs.bulk_write([
+            UpdateOne({"_id": evc["_id"]}, {"$unset": unset})
+            for evc in batch
+        ]).modified_count
+    print(f"{moved} EVCs had their state moved to evcs_state")
+
+
+def main() -> None:
+    """Main function."""
+    mongo = Mongo()
+    cmds = {
+        "get_candidates": get_candidates,
+        "update_database": update_database,
+    }
+    try:
+        cmd = os.environ["CMD"]
+        command = cmds[cmd]
+    except KeyError:
+        print(
+            f"Please set the 'CMD' env var. \nIt has to be one of these: "
+            f"{list(cmds.keys())}"
+        )
+        sys.exit(1)
+    command(mongo)
+
+
+if __name__ == "__main__":
+    main()
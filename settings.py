@@ -3,6 +3,11 @@
 # Base URL of the Pathfinder endpoint
 PATHFINDER_URL = "http://localhost:8181/api/kytos/pathfinder/v3/"
 
+# Engine computing dynamic paths: "pathfinder" requests them to the
+# pathfinder NApp, "local" computes them in process over the controller
+# topology
+PATH_ENGINE = "pathfinder"
+
 # Base URL of the Flow Manager endpoint
 MANAGER_URL = "http://localhost:8181/api/kytos/flow_manager/v2"
 
@@ -25,7 +30,8 @@ COOKIE_PREFIX = 0xAA
 
 # Maximum number of paths to consider when calculating the disjoint paths
 # i.e., the number of paths that will be requested to pathfinder to calculate
-# the maximum disjoint paths from unwanted_path
+# the maximum disjoint paths from unwanted_path. Scoring them is cheap, so
+# larger values (50-100) mostly cost the pathfinder computation
 DISJOINT_PATH_CUTOFF = 10
 
 # Default values for EVPL and EPL respectively. They are use when sb_priority
@@ -51,6 +57,69 @@ SPF_ATTRIBUTE = "hop"
 # ".*.switch.interface.(link_up|link_down|created|deleted)"
 UNI_STATE_CHANGE_DELAY = 0.1
 
+# Time (seconds) to aggregate "kytos/topology.link_down" events, e.g. the
+# ones emitted for each link of a switch that went down, so they are
+# handled in a single batch
+LINK_DOWN_AGGREGATION_DELAY = 0.1
+
+# Connection pool limits and default timeout (seconds) of the HTTP clients
+# used to reach each NApp, "default" applies to every service
+HTTP_CLIENTS = {
+    "default": {
+        "max_connections": 100,
+        "max_keepalive_connections": 20,
+        "keepalive_expiry": 30,
+        "timeout": 30,
+    },
+    "flow_manager": {"timeout": 30},
+    "pathfinder": {"max_connections": 50, "timeout": 10},
+    "sdntrace_cp": {"max_connections": 20, "timeout": 30},
+}
+
+# Failover paths are planned in the background by FAILOVER_PLANNER_WORKERS
+# threads, starting at most FAILOVER_PLANNER_RATE plans per second (0 doesn't
+# limit them)
+FAILOVER_PLANNER_WORKERS = 4
+FAILOVER_PLANNER_RATE = 20
+
+# Maximum number of flow_manager requests in flight, flow mods are sent and
+# retried on the controller event loop
+FLOW_MOD_MAX_CONCURRENCY = 10
+
+# Maximum time (seconds) a thread waits for a flow_manager request sent on
+# the event loop, including its retries
+FLOW_MOD_SEND_TIMEOUT = 120
+
+# flows_by_switch requests are buffered up to FLOW_MOD_COALESCE_WINDOW
+# seconds, or until FLOW_MOD_COALESCE_MAX_FLOWS flows are buffered, and sent
+# as a single request with their flows merged per switch
+FLOW_MOD_COALESCE_WINDOW = 0.005
+FLOW_MOD_COALESCE_MAX_FLOWS = 500
+
+# Maximum number of pathfinder replies cached and for how long (seconds)
+# they're kept. The cache is also dropped on every topology change, a size
+# of 0 disables it
+PATHFINDER_CACHE_SIZE = 1024
+PATHFINDER_CACHE_TTL = 30
+
+# Path statuses are cached until a topology event may change them, and for
+# at most PATH_STATUS_CACHE_TTL seconds, a TTL of 0 disables the cache
+PATH_STATUS_CACHE_TTL = 1
+
+# Maximum number of concurrent pathfinder requests when computing the paths
+# of many EVCs at once, e.g. to redeploy the EVCs of a failed link
+PATHFINDER_BATCH_MAX_WORKERS = 10
+
+# EVC writes are buffered and flushed to MongoDB with a single bulk_write
+# every EVC_WRITE_BEHIND_INTERVAL seconds, or as soon as
+# EVC_WRITE_BEHIND_MAX_PENDING EVCs are pending. An interval of 0 writes each
+# EVC right away
+EVC_WRITE_BEHIND_INTERVAL = 0.1
+EVC_WRITE_BEHIND_MAX_PENDING = 500
+
+# Maximum number of VLAN ranges whose vlan/mask decomposition is cached
+VLAN_MASKS_CACHE_SIZE = 1024
+
 # Default EVC values, they will be applied to every EVC which key is missing
 EVC_DEFAULT = {
     # "primary_constraints": {"undesired_links": ["74bbc9527a0e309a86c9570"]},
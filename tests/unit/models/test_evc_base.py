@@ -1,5 +1,6 @@
 """Module to test the EVCBase class."""
 import sys
+from datetime import datetime
 from unittest.mock import MagicMock, call, patch
 
 import pytest
@@ -13,10 +14,12 @@ sys.path.insert(0, "/var/lib/kytos/napps/..")
 # pylint: enable=wrong-import-position, disable=ungrouped-imports
 from napps.kytos.mef_eline.exceptions import DuplicatedNoTagUNI, InvalidPath  # NOQA  pycodestyle
 from napps.kytos.mef_eline.models import EVC  # NOQA  pycodestyle
+from napps.kytos.mef_eline.models.evc import \
+    EVC_FIELDS  # NOQA  pycodestyle
 from napps.kytos.mef_eline.scheduler import \
     CircuitSchedule  # NOQA  pycodestyle
 from napps.kytos.mef_eline.tests.helpers import (  # NOQA  pycodestyle
-    get_controller_mock, get_uni_mocked)
+    get_controller_mock, get_link_mocked, get_uni_mocked)
 
 
 class TestEVC():  # pylint: disable=too-many-public-methods, no-member
@@ -276,6 +279,121 @@ class TestEVC():  # pylint: disable=too-many-public-methods, no-member
         _, redeploy = evc.update(**update_dict)
         assert redeploy
 
+    @patch("napps.kytos.mef_eline.models.evc.evc_writer")
+    def test_sync(self, evc_writer_mock):
+        """Test sync writes right away unless evc_writer is running."""
+        attributes = {
+            "controller": get_controller_mock(),
+            "name": "circuit_name",
+            "enable": True,
+            "uni_a": get_uni_mocked(is_valid=True),
+            "uni_z": get_uni_mocked(is_valid=True),
+        }
+        evc = EVC(**attributes)
+        evc._mongo_controller = MagicMock()
+        evc_writer_mock.running = False
+        evc.sync()
+        evc.sync({"active"})
+        evc._mongo_controller.upsert_evc.assert_called_once()
+        evc._mongo_controller.update_evc.assert_called_once_with(
+            {"id": evc.id, "active": evc.is_active()}, trusted=False
+        )
+
+        evc_writer_mock.running = True
+        evc.sync({"active"})
+        evc_writer_mock.update_evc.assert_called_once_with(
+            {"id": evc.id, "active": evc.is_active()}, trusted=False
+        )
+        evc_writer_mock.upsert_evc.assert_not_called()
+        assert evc._mongo_controller.upsert_evc.call_count == 1
+
+    @patch("napps.kytos.mef_eline.models.evc.evc_writer")
+    def test_sync_dirty_fields(self, evc_writer_mock):
+        """Test sync only writes the fields changed since the last sync."""
+        link = get_link_mocked()
+        link.metadata["s_vlan"] = MagicMock(value=10)
+        attributes = {
+            "controller": get_controller_mock(),
+            "name": "circuit_name",
+            "enable": True,
+            "uni_a": get_uni_mocked(is_valid=True),
+            "uni_z": get_uni_mocked(is_valid=True),
+            "current_path": Path([link]),
+        }
+        evc = EVC(**attributes)
+        evc_writer_mock.running = True
+        assert evc.get_dirty_fields() == set(EVC_FIELDS)
+        evc.sync()
+        evc_writer_mock.upsert_evc.assert_called_once()
+        assert evc.get_dirty_fields() == set()
+
+        evc.deactivate()
+        evc.metadata["key"] = "value"
+        evc.sync()
+        assert evc_writer_mock.update_evc.call_args[0][0] == {
+            "id": evc.id,
+            "active": False,
+            "metadata": {"key": "value"},
+            "updated_at": evc.updated_at,
+        }
+
+        link.metadata["s_vlan"] = MagicMock(value=11)
+        assert evc.get_dirty_fields() == {"current_path"}
+        evc.current_path = Path([])
+        assert evc.get_dirty_fields() == {"current_path"}
+        evc.sync()
+        assert set(evc_writer_mock.update_evc.call_args[0][0]) == {
+            "id", "current_path", "updated_at"
+        }
+        evc_writer_mock.upsert_evc.assert_called_once()
+
+    @patch("napps.kytos.mef_eline.models.evc.evc_writer")
+    def test_sync_trusted(self, evc_writer_mock):
+        """Test trusted syncs write as_document."""
+        attributes = {
+            "controller": get_controller_mock(),
+            "name": "circuit_name",
+            "uni_a": get_uni_mocked(is_valid=True),
+            "uni_z": get_uni_mocked(is_valid=True),
+        }
+        evc = EVC(**attributes)
+        evc._mongo_controller = MagicMock()
+        evc_writer_mock.running = False
+        evc.sync(trusted=True)
+        evc._mongo_controller.upsert_evc.assert_called_once_with(
+            evc.as_document(), trusted=True
+        )
+        evc.sync({"active"}, trusted=True)
+        evc._mongo_controller.update_evc.assert_called_once_with(
+            {"id": evc.id, "active": evc.is_active()}, trusted=True
+        )
+
+    def test_as_document(self):
+        """Test as_document returns the fields EVCBaseDoc dumps."""
+        attributes = {
+            "controller": get_controller_mock(),
+            "name": "circuit_name",
+            "uni_a": get_uni_mocked(is_valid=True),
+            "uni_z": get_uni_mocked(is_valid=True),
+            "creation_time": "2022-05-06T21:34:10",
+            "request_time": "2022-05-06T21:34:10",
+        }
+        evc = EVC(**attributes)
+        evc.uni_a.as_dict.return_value = {"interface_id": "1", "tag": None}
+        document = evc.as_document()
+        assert document["_id"] == document["id"] == evc.id
+        assert document["execution_rounds"] == 0
+        assert document["queue_id"] is None
+        assert "end_date" not in document
+        assert document["uni_a"] == {"interface_id": "1"}
+        assert document["creation_time"] == document["request_time"]
+        assert isinstance(document["creation_time"], datetime)
+        assert set(document) <= {"_id", "execution_rounds", *EVC_FIELDS}
+
+        assert evc.as_document({"end_date", "name"}) == {
+            "id": evc.id, "end_date": None, "name": "circuit_name"
+        }
+
     def test_update_different_tag_lists(self):
         """Test update when tag lists are different."""
         attributes = {
@@ -588,8 +706,7 @@ class TestEVC():  # pylint: disable=too-many-public-methods, no-member
         assert evc._use_uni_vlan.call_args[0][0] == new_uni_a
         assert evc.make_uni_vlan_available.call_count == 0
 
-    @patch("napps.kytos.mef_eline.models.evc.range_difference")
-    def test_use_uni_vlan(self, mock_difference):
+    def test_use_uni_vlan(self):
         """Test _use_uni_vlan"""
         attributes = {
             "controller": get_controller_mock(),
@@ -613,11 +730,11 @@ class TestEVC():  # pylint: disable=too-many-public-methods, no-member
 
         uni.user_tag.value = [[1, 10]]
         uni_dif = get_uni_mocked(tag_value=[[1, 2]])
-        mock_difference.return_value = [[3, 10]]
         evc._use_uni_vlan(uni, uni_dif)
         assert uni.interface.use_tags.call_count == 3
+        assert uni.interface.use_tags.call_args[0][1] == [[3, 10]]
 
-        mock_difference.return_value = []
+        uni_dif.user_tag.value = [[1, 20]]
         evc._use_uni_vlan(uni, uni_dif)
         assert uni.interface.use_tags.call_count == 3
 
@@ -111,36 +111,26 @@ class TestEVC():
         evc = EVC(**attributes)
         assert evc.should_deploy(attributes["primary_links"]) is False
 
-    @patch("napps.kytos.mef_eline.models.evc.httpx")
-    def test_send_flow_mods_case1(self, httpx_mock):
+    @patch("napps.kytos.mef_eline.models.evc.flow_mod_dispatcher")
+    def test_send_flow_mods_case1(self, dispatcher_mock):
         """Test if _send_flow_mods is sending flow_mods to be installed."""
         flow_mods = {"00:01": {"flows": [20]}}
 
-        response = MagicMock()
-        response.status_code = 201
-        response.is_server_error = False
-        httpx_mock.post.return_value = response
-
         # pylint: disable=protected-access
         EVC._send_flow_mods(flow_mods, "install")
 
         expected_endpoint = f"{MANAGER_URL}/flows"
         expected_data = flow_mods
         expected_data["force"] = False
-        assert httpx_mock.post.call_count == 1
-        httpx_mock.post.assert_called_once_with(
-            expected_endpoint, json=expected_data, timeout=30
+        dispatcher_mock.send.assert_called_once_with(
+            "POST", expected_endpoint, expected_data, coalesce=False
         )
 
-    @patch("napps.kytos.mef_eline.models.evc.httpx")
-    def test_send_flow_mods_case2(self, httpx_mock):
+    @patch("napps.kytos.mef_eline.models.evc.flow_mod_dispatcher")
+    def test_send_flow_mods_case2(self, dispatcher_mock):
         """Test if _send_flow_mods are sending flow_mods to be deleted
          and by_switch."""
         flow_mods = {"00:01": {"flows": [20]}}
-        response = MagicMock()
-        response.status_code = 201
-        response.is_server_error = False
-        httpx_mock.request.return_value = response
 
         # pylint: disable=protected-access
         EVC._send_flow_mods(
@@ -148,19 +138,15 @@ class TestEVC():
         )
 
         expected_endpoint = f"{MANAGER_URL}/flows_by_switch/?force={True}"
-        assert httpx_mock.request.call_count == 1
-        httpx_mock.request.assert_called_once_with(
-            "DELETE", expected_endpoint, json=flow_mods, timeout=30
+        dispatcher_mock.send.assert_called_once_with(
+            "DELETE", expected_endpoint, flow_mods, coalesce=True
         )
 
-    @patch("time.sleep")
-    @patch("napps.kytos.mef_eline.models.evc.httpx")
-    def test_send_flow_mods_error(self, httpx_mock, _):
+    @patch("napps.kytos.mef_eline.models.evc.flow_mod_dispatcher")
+    def test_send_flow_mods_error(self, dispatcher_mock):
         """Test flow_manager call fails."""
         flow_mods = {"00:01": {"flows": [20]}}
-        response = MagicMock()
-        response.status_code = 415
-        httpx_mock.post.return_value = response
+        dispatcher_mock.send.side_effect = FlowModException("error")
 
         # pylint: disable=protected-access
         with pytest.raises(FlowModException):
@@ -169,7 +155,7 @@ class TestEVC():
                 command='delete',
                 force=True
             )
-        assert httpx_mock.request.call_count == 3
+        assert dispatcher_mock.send.call_count == 1
 
     def test_prepare_flow_mod(self):
         """Test prepare flow_mod method."""
@@ -439,7 +425,7 @@ class TestEVC():
         }
         return EVC(**attributes)
 
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     @patch("napps.kytos.mef_eline.controllers.ELineController.upsert_evc")
     @patch("napps.kytos.mef_eline.models.evc.log")
     @patch("napps.kytos.mef_eline.models.path.Path.choose_vlans")
@@ -485,7 +471,7 @@ class TestEVC():
         assert log_mock.info.call_count == 2
         log_mock.info.assert_called_with(f"{evc} was deployed.")
 
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     @patch("napps.kytos.mef_eline.models.evc.log")
     @patch("napps.kytos.mef_eline.models.evc.EVC.discover_new_paths")
     @patch("napps.kytos.mef_eline.controllers.ELineController.upsert_evc")
@@ -573,7 +559,7 @@ class TestEVC():
         assert evc.try_to_activate()
         assert evc.is_active()
 
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     @patch("napps.kytos.mef_eline.models.evc.log")
     @patch("napps.kytos.mef_eline.models.evc.EVC.discover_new_paths")
     @patch("napps.kytos.mef_eline.models.path.Path.choose_vlans")
@@ -697,6 +683,110 @@ class TestEVC():
         assert remove_current_flows.call_count == 2
         assert deployed is False
 
+    def test_diff_flows(self):
+        """Test _diff_flows method."""
+        flow1 = {"match": {"in_port": 1, "dl_vlan": 5}, "priority": 10,
+                 "cookie": 1, "actions": [{"action_type": "output"}]}
+        flow2 = {"match": {"dl_vlan": 6, "in_port": 2}, "priority": 10,
+                 "cookie": 1, "actions": [{"action_type": "output"}]}
+        flow2_moved = {**flow2, "actions": [{"action_type": "set_vlan"}]}
+        flow3 = {"match": {"in_port": 3, "dl_vlan": 7}, "priority": 10,
+                 "cookie": 1, "actions": [{"action_type": "output"}]}
+        old_flows = {"1": [flow1, flow2], "2": [flow3]}
+        new_flows = {"1": [flow1, flow2_moved], "3": [flow3]}
+
+        # pylint: disable=protected-access
+        install_flows, delete_flows = EVC._diff_flows(old_flows, new_flows)
+        assert install_flows == {
+            "1": {"flows": [flow2_moved]},
+            "3": {"flows": [flow3]},
+        }
+        assert delete_flows == {
+            "2": {"flows": [{
+                "cookie": 1,
+                "match": flow3["match"],
+                "owner": "mef_eline",
+                "cookie_mask": int(0xffffffffffffffff),
+            }]},
+        }
+        assert EVC._diff_flows(old_flows, old_flows) == ({}, {})
+
+    @patch("napps.kytos.mef_eline.models.evc.EVC.sync")
+    @patch("napps.kytos.mef_eline.models.evc.EVC.try_to_activate")
+    @patch("napps.kytos.mef_eline.models.evc.EVC._send_flow_mods")
+    @patch("napps.kytos.mef_eline.models.path.Path.make_vlans_available")
+    @patch("napps.kytos.mef_eline.models.path.Path.choose_vlans")
+    def test_deploy_to_path_make_before_break(self, *args):
+        """Test deploy_to_path with make_before_break."""
+        (
+            choose_vlans_mock,
+            make_vlans_available_mock,
+            send_flow_mods_mock,
+            _,
+            sync_mock,
+        ) = args
+        evc = self.create_evc_inter_switch()
+        evc.enable()
+        link1, link2, link3 = (
+            MagicMock(id="1"), MagicMock(id="2"), MagicMock(id="3")
+        )
+        # The new path has its own Link object for the shared link
+        new_link1 = MagicMock(id="1")
+        old_path, new_path = Path([link1, link2]), Path([new_link1, link3])
+        evc.current_path = old_path
+        evc.remove_current_flows = MagicMock()
+        flows = {
+            id(old_path): {"1": [{"match": {"in_port": 1}}]},
+            id(new_path): {"1": [{"match": {"in_port": 2}}]},
+        }
+        evc._prepare_nni_flows = lambda path: {
+            dpid: list(dpid_flows)
+            for dpid, dpid_flows in flows[id(path)].items()
+        }
+        evc._prepare_uni_flows = MagicMock(return_value={})
+        evc._diff_flows = MagicMock(
+            return_value=({"1": {"flows": ["new"]}},
+                          {"1": {"flows": ["old"]}})
+        )
+
+        assert evc.deploy_to_path(new_path, make_before_break=True)
+        evc.remove_current_flows.assert_not_called()
+        evc._diff_flows.assert_called_with(
+            {"1": [{"match": {"in_port": 1}}]},
+            {"1": [{"match": {"in_port": 2}}]},
+        )
+        # only the new link gets a VLAN, only the replaced link releases it
+        assert choose_vlans_mock.call_count == 1
+        new_link1.update_metadata.assert_called_once_with(
+            "s_vlan", link1.get_metadata.return_value
+        )
+        link3.update_metadata.assert_not_called()
+        assert make_vlans_available_mock.call_count == 1
+        assert send_flow_mods_mock.call_args_list == [
+            call({"1": {"flows": ["new"]}}, "install", by_switch=True),
+            call({"1": {"flows": ["old"]}}, "delete", by_switch=True),
+        ]
+        assert evc.current_path == new_path
+        assert sync_mock.call_count == 1
+
+        # installing the new flows fails
+        evc.current_path = old_path
+        send_flow_mods_mock.side_effect = FlowModException("error")
+        assert not evc.deploy_to_path(new_path, make_before_break=True)
+        removed_path = evc.remove_current_flows.call_args[0][0]
+        assert list(removed_path) == [link1, link2, link3]
+
+        # no path available, the current path is kept
+        evc.remove_current_flows.reset_mock()
+        send_flow_mods_mock.reset_mock()
+        choose_vlans_mock.side_effect = KytosNoTagAvailableError(MagicMock())
+        evc.discover_new_paths = MagicMock(return_value=[])
+        assert not evc.deploy_to_path(new_path, make_before_break=True)
+        send_flow_mods_mock.assert_not_called()
+        evc.remove_current_flows.assert_not_called()
+        assert evc.current_path == old_path
+
+    @patch("napps.kytos.mef_eline.models.evc.EVC.get_failover_flows")
     @patch("napps.kytos.mef_eline.models.evc.emit_event")
     @patch("napps.kytos.mef_eline.models.evc.EVC.get_failover_path_candidates")
     @patch("napps.kytos.mef_eline.models.evc.EVC._install_flows")
@@ -710,6 +800,7 @@ class TestEVC():
             install_unni_flows_mock,
             get_failover_path_candidates_mock,
             emit_event_mock,
+            get_failover_flows_mock,
         ) = args
 
         # case1: early return intra switch
@@ -738,6 +829,7 @@ class TestEVC():
         mock_choose.assert_called()
         install_unni_flows_mock.assert_called_with(path_mock, skip_in=True)
         assert evc2.failover_path == path_mock
+        get_failover_flows_mock.assert_called()
         assert sync_mock.call_count == 1
         assert emit_event_mock.call_count == 1
         assert emit_event_mock.call_args[0][1] == "failover_deployed"
@@ -762,6 +854,18 @@ class TestEVC():
         assert sync_mock.call_count == 1
         remove_path_flows_mock.assert_called_with(path_mock)
 
+        # case 6: candidates already computed
+        evc2.failover_path = []
+        install_unni_flows_mock.side_effect = None
+        get_failover_path_candidates_mock.reset_mock()
+        other_path = MagicMock()
+        other_path.__iter__.return_value = ["link4"]
+
+        assert evc2.setup_failover_path(candidates=[other_path]) is True
+        get_failover_path_candidates_mock.assert_not_called()
+        install_unni_flows_mock.assert_called_with(other_path, skip_in=True)
+        assert evc2.failover_path == other_path
+
     @patch("napps.kytos.mef_eline.models.evc.EVC.deploy_to_path")
     @patch("napps.kytos.mef_eline.models.evc.EVC.discover_new_paths")
     def test_deploy_to_backup_path1(
@@ -790,10 +894,12 @@ class TestEVC():
 
         deployed = evc.deploy_to_backup_path()
 
-        deploy_to_path_mocked.assert_called_once_with(old_path_dict=None)
+        deploy_to_path_mocked.assert_called_once_with(
+            old_path_dict=None, make_before_break=False
+        )
         assert deployed is True
 
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     @patch("napps.kytos.mef_eline.controllers.ELineController.upsert_evc")
     @patch("napps.kytos.mef_eline.models.evc.log")
     @patch("napps.kytos.mef_eline.models.path.Path.choose_vlans")
@@ -1384,6 +1490,41 @@ class TestEVC():
         evc.get_failover_flows()
         prepare_uni_flows_mock.assert_called_with(path, skip_out=True)
 
+    @patch("napps.kytos.mef_eline.models.evc.EVC._prepare_uni_flows")
+    def test_get_failover_flows_cache(self, prepare_uni_flows_mock):
+        """Test get_failover_flows caches the flows until they change."""
+        evc = self.create_evc_inter_switch()
+        evc.failover_path = Path([get_link_mocked(), get_link_mocked()])
+        prepare_uni_flows_mock.return_value = {"1": ["flow1"], "2": ["flow2"]}
+
+        flows = evc.get_failover_flows()
+        assert flows == {"1": ["flow1"], "2": ["flow2"]}
+        flows["1"].append("flow3")
+        assert evc.get_failover_flows() == {"1": ["flow1"], "2": ["flow2"]}
+        assert prepare_uni_flows_mock.call_count == 1
+
+        evc.queue_id = 3
+        evc.get_failover_flows()
+        assert prepare_uni_flows_mock.call_count == 2
+
+        evc.sb_priority = 100
+        evc.get_failover_flows()
+        assert prepare_uni_flows_mock.call_count == 3
+
+        evc.uni_a.user_tag.value = 100
+        evc.get_failover_flows()
+        assert prepare_uni_flows_mock.call_count == 4
+
+        evc.table_group = {"epl": 2, "evpl": 3}
+        evc.get_failover_flows()
+        assert prepare_uni_flows_mock.call_count == 5
+
+        evc.failover_path = Path([get_link_mocked()])
+        evc.get_failover_flows()
+        assert prepare_uni_flows_mock.call_count == 6
+        evc.get_failover_flows()
+        assert prepare_uni_flows_mock.call_count == 6
+
     @patch("napps.kytos.mef_eline.models.evc.log")
     @patch("napps.kytos.mef_eline.models.evc.EVC._send_flow_mods")
     @patch("napps.kytos.mef_eline.models.path.Path.make_vlans_available")
@@ -1451,7 +1592,7 @@ class TestEVC():
         evc.remove_path_flows(evc.primary_links)
         log_mock.error.assert_called()
 
-    @patch("httpx.put")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.put")
     def test_run_bulk_sdntraces(self, put_mock):
         """Test run_bulk_sdntraces method for bulk request."""
         evc = self.create_evc_inter_switch()
@@ -1473,8 +1614,7 @@ class TestEVC():
         result = EVCDeploy.run_bulk_sdntraces(arg_tuple)
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         assert result['result'] == "ok"
 
@@ -1487,7 +1627,7 @@ class TestEVC():
         result = EVCDeploy.run_bulk_sdntraces(arg_tuple)
         assert result == {"result": []}
 
-    @patch("httpx.put")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.put")
     def test_run_bulk_sdntraces_special_vlan(self, put_mock):
         """Test run_bulk_sdntraces method for bulk request."""
         evc = self.create_evc_inter_switch()
@@ -1509,8 +1649,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         args = put_mock.call_args[1]['json'][0]
         assert 'eth' not in args
@@ -1521,8 +1660,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         args = put_mock.call_args[1]['json'][0]['trace']
         assert 'eth' not in args
@@ -1533,8 +1671,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         args = put_mock.call_args[1]['json'][0]['trace']
         assert 'eth' not in args
@@ -1546,8 +1683,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         args = put_mock.call_args[1]['json'][0]['trace']
         assert args['eth'] == {'dl_type': 33024, 'dl_vlan': 1}
@@ -1558,8 +1694,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         args = put_mock.call_args[1]['json'][0]['trace']
         assert args['eth'] == {'dl_type': 33024, 'dl_vlan': 1}
@@ -1574,8 +1709,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         args = put_mock.call_args[1]['json'][0]['trace']
         assert args['eth'] == {'dl_type': 33024, 'dl_vlan': 10}
@@ -1590,8 +1724,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
         args = put_mock.call_args[1]['json'][0]['trace']
         assert args['eth'] == {'dl_type': 33024, 'dl_vlan': 1}
@@ -1606,8 +1739,7 @@ class TestEVC():
         )
         put_mock.assert_called_with(
                                     expected_endpoint,
-                                    json=expected_payload,
-                                    timeout=30
+                                    json=expected_payload
                                 )
 
     @patch("napps.kytos.mef_eline.models.evc.log")
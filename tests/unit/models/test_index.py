@@ -0,0 +1,239 @@
+"""Module to test the in-memory EVC indexes."""
+from unittest.mock import MagicMock
+
+from napps.kytos.mef_eline.models import (EVC, LinkIndex, Path,
+                                          ServiceLevelIndex, UNIIndex)
+from napps.kytos.mef_eline.tests.helpers import (get_controller_mock,
+                                                 get_link_mocked,
+                                                 get_uni_mocked)
+
+
+class TestLinkIndex:
+    """Test the LinkIndex class."""
+
+    def setup_method(self):
+        """Set up an index and a few links."""
+        self.index = LinkIndex()
+        self.links = [get_link_mocked(), get_link_mocked(), get_link_mocked()]
+        for i, link in enumerate(self.links):
+            link.id = f"link{i}"
+
+    def create_evc(self, **kwargs):
+        """Create an EVC with mocked UNIs."""
+        attributes = {
+            "controller": get_controller_mock(),
+            "name": "custom_name",
+            "uni_a": get_uni_mocked(is_valid=True),
+            "uni_z": get_uni_mocked(is_valid=True),
+            **kwargs,
+        }
+        return EVC(**attributes)
+
+    def test_add(self):
+        """Test add indexes every path of the EVC."""
+        evc = self.create_evc(
+            primary_path=Path(self.links[:2]),
+            backup_path=Path([self.links[2]]),
+        )
+        self.index.add(evc)
+        assert evc.link_index is self.index
+        assert self.index.get_evcs("link0") == [evc]
+        assert self.index.get_evcs("link2", ("primary_path",)) == []
+        assert self.index.get_evcs("link2", ("backup_path",)) == [evc]
+        assert "link1" in self.index
+
+    def test_update_on_path_assignment(self):
+        """Test the index follows EVC path assignments."""
+        evc = self.create_evc()
+        self.index.add(evc)
+        assert not self.index.get_evcs("link0")
+
+        evc.current_path = Path(self.links[:2])
+        assert self.index.get_evcs("link0", ("current_path",)) == [evc]
+        assert self.index.get_evcs("link1", ("current_path",)) == [evc]
+
+        evc.failover_path = Path([self.links[2]])
+        current, failover = evc.current_path, evc.failover_path
+        evc.current_path, evc.failover_path = failover, current
+        assert self.index.get_evcs("link0", ("current_path",)) == []
+        assert self.index.get_evcs("link0", ("failover_path",)) == [evc]
+        assert self.index.get_evcs("link2", ("current_path",)) == [evc]
+
+        evc.current_path = Path([])
+        evc.failover_path = Path([])
+        assert "link0" not in self.index
+        assert "link2" not in self.index
+
+    def test_same_link_in_multiple_paths(self):
+        """Test a link used by more than one path of the same EVC."""
+        evc = self.create_evc(primary_path=Path([self.links[0]]))
+        self.index.add(evc)
+        evc.current_path = Path([self.links[0]])
+        evc.current_path = Path([])
+        assert self.index.get_evcs("link0", ("current_path",)) == []
+        assert self.index.get_evcs("link0", ("primary_path",)) == [evc]
+
+    def test_remove(self):
+        """Test remove."""
+        evc = self.create_evc(primary_path=Path(self.links))
+        other = MagicMock(id="other", link_index=None)
+        other.current_path = Path([self.links[0]])
+        other.failover_path = other.primary_path = other.backup_path = []
+        self.index.add(evc)
+        self.index.add(other)
+        assert len(self.index.get_evcs("link0")) == 2
+
+        self.index.remove(evc)
+        assert evc.link_index is None
+        assert self.index.get_evcs("link0") == [other]
+        assert "link1" not in self.index
+
+        evc.current_path = Path(self.links)
+        assert "link1" not in self.index
+
+    def test_inactive_dynamic_evcs(self):
+        """Test the inactive EVCs with dynamic_backup_path are tracked."""
+        evc = self.create_evc(dynamic_backup_path=True)
+        static_evc = self.create_evc()
+        self.index.add(evc)
+        self.index.add(static_evc)
+        assert self.index.get_inactive_dynamic_evcs() == [evc]
+
+        evc.activate()
+        assert not self.index.get_inactive_dynamic_evcs()
+        evc.deactivate()
+        assert self.index.get_inactive_dynamic_evcs() == [evc]
+        evc.dynamic_backup_path = False
+        assert not self.index.get_inactive_dynamic_evcs()
+        static_evc.dynamic_backup_path = True
+        assert self.index.get_inactive_dynamic_evcs() == [static_evc]
+
+        self.index.remove(static_evc)
+        assert not self.index.get_inactive_dynamic_evcs()
+        static_evc.deactivate()
+        assert not self.index.get_inactive_dynamic_evcs()
+
+
+class TestUNIIndex:
+    """Test the UNIIndex class."""
+
+    def setup_method(self):
+        """Set up an index."""
+        self.index = UNIIndex()
+
+    @staticmethod
+    def create_evc(evc_id, interface_a, interface_z):
+        """Create a mocked EVC with UNIs on the given interfaces."""
+        evc = MagicMock(id=evc_id)
+        evc.uni_a.interface.id = interface_a
+        evc.uni_z.interface.id = interface_z
+        return evc
+
+    def test_add_and_get_evcs(self):
+        """Test add and get_evcs."""
+        evc1 = self.create_evc("1", "intf1", "intf2")
+        evc2 = self.create_evc("2", "intf2", "intf3")
+        self.index.add(evc1)
+        self.index.add(evc2)
+        assert self.index.get_evcs("intf1") == [evc1]
+        assert self.index.get_evcs("intf2") == [evc1, evc2]
+        assert self.index.get_evcs("intf3") == [evc2]
+        assert not self.index.get_evcs("intf4")
+
+    def test_add_uni_changed(self):
+        """Test re-indexing an EVC after a UNI changed."""
+        evc = self.create_evc("1", "intf1", "intf2")
+        self.index.add(evc)
+        evc.uni_z.interface.id = "intf3"
+        self.index.add(evc)
+        assert self.index.get_evcs("intf1") == [evc]
+        assert not self.index.get_evcs("intf2")
+        assert self.index.get_evcs("intf3") == [evc]
+
+    def test_remove(self):
+        """Test remove."""
+        evc1 = self.create_evc("1", "intf1", "intf1")
+        evc2 = self.create_evc("2", "intf1", "intf2")
+        self.index.add(evc1)
+        self.index.add(evc2)
+        self.index.remove(evc1)
+        assert self.index.get_evcs("intf1") == [evc2]
+        self.index.remove(evc2)
+        self.index.remove(evc2)
+        assert not self.index.get_evcs("intf1")
+        assert not self.index.get_evcs("intf2")
+
+
+class TestServiceLevelIndex:
+    """Test the ServiceLevelIndex class."""
+
+    def setup_method(self):
+        """Set up an index."""
+        self.index = ServiceLevelIndex()
+
+    def test_order(self):
+        """Test EVCs are kept sorted."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=2)
+        evc2 = MagicMock(id="2", service_level=6, creation_time=3)
+        evc3 = MagicMock(id="3", service_level=0, creation_time=1)
+        evc4 = MagicMock(id="4", service_level=0, creation_time=1)
+        for evc in (evc1, evc2, evc3, evc4):
+            self.index.add(evc)
+        assert self.index.get_evcs() == [evc2, evc3, evc4, evc1]
+        assert len(self.index) == 4
+
+        evc1.service_level = 7
+        self.index.add(evc1)
+        assert self.index.get_evcs() == [evc1, evc2, evc3, evc4]
+        assert len(self.index) == 4
+
+    def test_enable_filter(self):
+        """Test disabled EVCs are filtered out by default."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=1)
+        evc2 = MagicMock(id="2", service_level=0, creation_time=2)
+        evc2.is_enabled.return_value = False
+        self.index.add(evc1)
+        self.index.add(evc2)
+        assert self.index.get_evcs() == [evc1]
+        assert self.index.get_evcs(enable_filter=False) == [evc1, evc2]
+
+    def test_remove(self):
+        """Test remove."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=1)
+        evc2 = MagicMock(id="2", service_level=0, creation_time=2)
+        self.index.add(evc1)
+        self.index.add(evc2)
+        self.index.remove(evc1)
+        self.index.remove(evc1)
+        assert self.index.get_evcs() == [evc2]
+        assert len(self.index) == 1
+
+    def test_get_evcs_not_copied(self):
+        """Test the sorted EVCs are only copied after a change."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=1)
+        evc2 = MagicMock(id="2", service_level=0, creation_time=2)
+        self.index.add(evc1)
+        evcs = self.index.get_evcs(enable_filter=False)
+        assert self.index.get_evcs(enable_filter=False) is evcs
+
+        self.index.add(evc2)
+        assert evcs == [evc1]
+        assert self.index.get_evcs(enable_filter=False) == [evc1, evc2]
+        self.index.remove(evc1)
+        assert self.index.get_evcs(enable_filter=False) == [evc2]
+
+    def test_load(self):
+        """Test EVCs loaded in bulk are sorted with the indexed ones."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=2)
+        evc2 = MagicMock(id="2", service_level=6, creation_time=3)
+        evc3 = MagicMock(id="3", service_level=0, creation_time=1)
+        self.index.add(evc1)
+        self.index.load([evc2, evc3])
+        assert self.index.get_evcs() == [evc2, evc3, evc1]
+
+        evc1.service_level = 7
+        self.index.load([evc1])
+        assert self.index.get_evcs() == [evc1, evc2, evc3]
+        assert len(self.index) == 3
+        self.index.remove(evc2)
+        assert self.index.get_evcs() == [evc1, evc3]
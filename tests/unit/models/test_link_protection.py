@@ -449,7 +449,9 @@ class TestLinkProtection():  # pylint: disable=too-many-public-methods
         current_handle_link_up = evc.handle_link_up(primary_path[0])
         assert deploy_mocked.call_count == 0
         assert deploy_to_path_mocked.call_count == 1
-        deploy_to_path_mocked.assert_called_once_with(evc.primary_path, None)
+        deploy_to_path_mocked.assert_called_once_with(
+            evc.primary_path, None, False
+        )
         assert current_handle_link_up
 
     @patch("napps.kytos.mef_eline.models.evc.EVCDeploy.deploy")
@@ -512,7 +514,9 @@ class TestLinkProtection():  # pylint: disable=too-many-public-methods
 
         assert deploy_mocked.call_count == 0
         assert deploy_to_path_mocked.call_count == 1
-        deploy_to_path_mocked.assert_called_once_with(evc.backup_path, None)
+        deploy_to_path_mocked.assert_called_once_with(
+            evc.backup_path, None, False
+        )
         assert current_handle_link_up
 
     @patch("napps.kytos.mef_eline.models.evc.EVCDeploy.deploy_to_path")
@@ -574,7 +578,9 @@ class TestLinkProtection():  # pylint: disable=too-many-public-methods
         current_handle_link_up = evc.handle_link_up(backup_path[0])
 
         assert deploy_to_path_mocked.call_count == 1
-        deploy_to_path_mocked.assert_called_once_with(old_path_dict=None)
+        deploy_to_path_mocked.assert_called_once_with(
+            old_path_dict=None, make_before_break=False
+        )
         assert current_handle_link_up
 
     async def test_handle_link_up_case_5(self):
@@ -593,6 +599,27 @@ class TestLinkProtection():  # pylint: disable=too-many-public-methods
         self.evc.deploy_to_path = return_false_mock
         assert not self.evc.handle_link_up(MagicMock())
 
+    async def test_should_revert_to_primary_path(self):
+        """Test should_revert_to_primary_path method."""
+        link = MagicMock()
+        self.evc.is_using_primary_path = MagicMock(return_value=False)
+        self.evc.is_intra_switch = MagicMock(return_value=False)
+        self.evc.primary_path = MagicMock(status=EntityStatus.UP)
+        self.evc.primary_path.is_affected_by_link.return_value = True
+        assert self.evc.should_revert_to_primary_path(link)
+        self.evc.primary_path.is_affected_by_link.assert_called_with(link)
+
+        self.evc.primary_path.status = EntityStatus.DOWN
+        assert not self.evc.should_revert_to_primary_path(link)
+
+        self.evc.primary_path.status = EntityStatus.UP
+        self.evc.primary_path.is_affected_by_link.return_value = False
+        assert not self.evc.should_revert_to_primary_path(link)
+
+        self.evc.primary_path.is_affected_by_link.return_value = True
+        self.evc.is_using_primary_path.return_value = True
+        assert not self.evc.should_revert_to_primary_path(link)
+
     # pylint: disable=too-many-statements
     async def test_handle_link_up_case_6(self):
         """Test handle_link_up method."""
@@ -793,6 +820,7 @@ class TestLinkProtection():  # pylint: disable=too-many-public-methods
 
         evc.primary_path[0].status = EntityStatus.DOWN
         evc.backup_path[1].status = EntityStatus.UP
+        Path.invalidate_status()
         evc.handle_link_up(interface=evc.uni_a.interface)
         assert deploy_primary_mock.call_count == 1
         assert deploy_backup_mock.call_count == 1
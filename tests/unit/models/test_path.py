@@ -1,11 +1,15 @@
 """Module to test the Path class."""
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
 from unittest.mock import call, patch, Mock, MagicMock
 import pytest
 from napps.kytos.mef_eline import settings
 from httpx import TimeoutException, ConnectError
 from kytos.core.common import EntityStatus
 from kytos.core.exceptions import KytosNoTagAvailableError
+from kytos.core.interface import TAG
 from kytos.core.link import Link
 from kytos.core.switch import Switch
 
@@ -14,9 +18,10 @@ from kytos.core.switch import Switch
 
 sys.path.insert(0, "/var/lib/kytos/napps/..")
 # pylint: enable=wrong-import-position
-from napps.kytos.mef_eline.exceptions import InvalidPath  # NOQA pycodestyle
+from napps.kytos.mef_eline.exceptions import (  # NOQA pycodestyle
+    InvalidPath, PathFinderException)
 from napps.kytos.mef_eline.models import (  # NOQA pycodestyle
-    DynamicPathManager, Path)
+    DynamicPathManager, Path, PathFinderCache)
 from napps.kytos.mef_eline.tests.helpers import (  # NOQA pycodestyle
     MockResponse, get_link_mocked, id_to_interface_mock)
 
@@ -51,6 +56,32 @@ class TestPath():
         path = Path([link1, link2])
         assert path.link_affected_by_interface("a") == link1
 
+    def test_link_index(self):
+        """Test link and interface lookups follow path mutations."""
+        link1 = get_link_mocked(endpoint_a_port=1, endpoint_b_port=2)
+        link2 = get_link_mocked(endpoint_a_port=3, endpoint_b_port=4)
+        link3 = get_link_mocked(endpoint_a_port=5, endpoint_b_port=6)
+        link1.id, link2.id, link3.id = "link1", "link2", "link3"
+        path = Path([link1, link2])
+        assert path.link_ids == {"link1", "link2"}
+        assert path.is_affected_by_link(link2)
+        assert not path.is_affected_by_link(link3)
+        assert path.link_affected_by_interface(link2.endpoint_b) == link2
+
+        path.append(link3)
+        assert path.is_affected_by_link(link3)
+        assert path.link_affected_by_interface(link3.endpoint_a) == link3
+        path.remove(link1)
+        assert not path.is_affected_by_link(link1)
+        assert path.link_affected_by_interface(link1.endpoint_a) is None
+        path[0] = link1
+        assert path.link_ids == {"link1", "link3"}
+        del path[0]
+        path += [link2]
+        assert path.link_ids == {"link2", "link3"}
+        path.clear()
+        assert not path.link_ids
+
     def test_status_case_1(self):
         """Test if empty link is DISABLED."""
         current_path = Path()
@@ -135,6 +166,37 @@ class TestPath():
         current_path = Path(links)
         assert current_path.status == EntityStatus.DOWN
 
+    def test_status_cache(self):
+        """Test the status is cached until the status epoch changes."""
+        link1 = get_link_mocked(status=EntityStatus.UP)
+        link2 = get_link_mocked(status=EntityStatus.UP)
+        path = Path([link1])
+        assert path.status == EntityStatus.UP
+        link1.status = EntityStatus.DOWN
+        assert path.status == EntityStatus.UP
+
+        Path.invalidate_status()
+        assert path.status == EntityStatus.DOWN
+        link1.status = EntityStatus.UP
+        assert path.status == EntityStatus.DOWN
+
+        link2.status = EntityStatus.DISABLED
+        path.append(link2)
+        assert path.status == EntityStatus.DISABLED
+
+    @patch("napps.kytos.mef_eline.models.path.time")
+    def test_status_cache_ttl(self, time_mock):
+        """Test the cached status expires after PATH_STATUS_CACHE_TTL."""
+        time_mock.monotonic.return_value = 100
+        link = get_link_mocked(status=EntityStatus.UP)
+        path = Path([link])
+        assert path.status == EntityStatus.UP
+        link.status = EntityStatus.DOWN
+        assert path.status == EntityStatus.UP
+
+        time_mock.monotonic.return_value = 100 + settings.PATH_STATUS_CACHE_TTL
+        assert path.status == EntityStatus.DOWN
+
     def test_choose_vlans(self) -> None:
         """Test choose vlans."""
         controller = MagicMock()
@@ -172,6 +234,47 @@ class TestPath():
         assert not link2.add_metadata.call_count
         assert path.make_vlans_available.call_count == 1
 
+    def test_choose_vlans_bulk(self) -> None:
+        """Test choose vlans of many paths, all or nothing per path."""
+        controller = MagicMock()
+        shared = [get_link_mocked() for _ in range(4)]
+        link_a, link_b = get_link_mocked(), get_link_mocked()
+        for link in shared:
+            link.id = "shared"
+        link_a.id, link_b.id = "a", "b"
+        paths = [
+            Path([link_a, shared[0]]),
+            Path([link_b, shared[1]]),
+            Path([shared[2]]),
+            Path([shared[3]]),
+        ]
+        for path in paths:
+            path.make_vlans_available = MagicMock()
+        shared[2].get_next_available_tag.side_effect = (
+            KytosNoTagAvailableError(shared[2])
+        )
+        link_b.get_next_available_tag.side_effect = (
+            KytosNoTagAvailableError(link_b)
+        )
+
+        failed = Path.choose_vlans_bulk(
+            controller, paths, [{"shared": 5}, None, None, None]
+        )
+        assert set(failed) == {1, 2, 3}
+        assert failed[3] is failed[2]
+        shared[0].get_next_available_tag.assert_called_once_with(
+            controller, "shared", try_avoid_value=5
+        )
+        shared[1].get_next_available_tag.assert_called_once_with(
+            controller, "shared", try_avoid_value=None
+        )
+        shared[3].get_next_available_tag.assert_not_called()
+        link_a.add_metadata.assert_called_once()
+        link_b.add_metadata.assert_not_called()
+        paths[0].make_vlans_available.assert_not_called()
+        for path in paths[1:]:
+            path.make_vlans_available.assert_called_once_with(controller)
+
     def test_compare_same_paths(self):
         """Test compare paths with same links."""
         links = [
@@ -221,6 +324,27 @@ class TestPath():
         expected_dict = [{"id": 3}, {"id": 2}]
         assert expected_dict == current_path.as_dict()
 
+    def test_as_stored_dict(self):
+        """Test path as stored dict."""
+        link1 = get_link_mocked(endpoint_a_port=1, endpoint_b_port=2)
+        link2 = get_link_mocked(endpoint_a_port=3, endpoint_b_port=4)
+        link1.get_metadata = Mock(return_value=None)
+        link2.get_metadata = Mock(return_value=TAG("vlan", 100))
+
+        assert Path([link1, link2]).as_stored_dict() == [
+            {
+                "id": link1.id,
+                "endpoint_a": {"id": link1.endpoint_a.id},
+                "endpoint_b": {"id": link1.endpoint_b.id},
+            },
+            {
+                "id": link2.id,
+                "endpoint_a": {"id": link2.endpoint_a.id},
+                "endpoint_b": {"id": link2.endpoint_b.id},
+                "metadata": {"s_vlan": {"tag_type": "vlan", "value": 100}},
+            },
+        ]
+
     def test_empty_is_valid(self) -> None:
         """Test empty path is valid."""
         path = Path([])
@@ -302,6 +426,15 @@ class TestPath():
 class TestDynamicPathManager():
     """Tests for the DynamicPathManager class"""
 
+    def setup_method(self):
+        """Disable the pathfinder cache, every request is mocked."""
+        self.path_cache = DynamicPathManager.path_cache
+        DynamicPathManager.path_cache = PathFinderCache(max_size=0)
+
+    def teardown_method(self):
+        """Restore the pathfinder cache."""
+        DynamicPathManager.path_cache = self.path_cache
+
     def test_clear_path(self):
         """Test _clear_path method"""
         path = [
@@ -397,7 +530,7 @@ class TestDynamicPathManager():
         ]
         assert DynamicPathManager.create_path(path) is None
 
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     def test_get_best_paths(self, mock_httpx_post):
         """Test get_best_paths method."""
         controller = MagicMock()
@@ -494,13 +627,80 @@ class TestDynamicPathManager():
                 },
                 **kwargs
             },
-            timeout=10,
         )
         mock_httpx_post.assert_has_calls([expected_call])
 
+    @patch("napps.kytos.mef_eline.models.path.settings")
+    def test_find_paths(self, settings_mock):
+        """Test _find_paths uses the engine set in PATH_ENGINE."""
+        circuit = MagicMock()
+        request_data = {"source": "a", "destination": "z"}
+        with patch.object(
+            DynamicPathManager, "_request_paths", return_value=["remote"]
+        ) as request_mock, patch.object(
+            DynamicPathManager, "path_engine"
+        ) as engine_mock:
+            engine_mock.get_paths.return_value = ["local"]
+            settings_mock.PATH_ENGINE = "pathfinder"
+            paths = DynamicPathManager._find_paths(circuit, request_data)
+            assert paths == ["remote"]
+            request_mock.assert_called_once_with(circuit, request_data)
+
+            settings_mock.PATH_ENGINE = "local"
+            paths = DynamicPathManager._find_paths(circuit, request_data)
+            assert paths == ["local"]
+            engine_mock.get_paths.assert_called_once_with(**request_data)
+
+    def test_handle_topology_event(self):
+        """Test handle_topology_event."""
+        event = MagicMock()
+        with patch.object(
+            DynamicPathManager, "path_engine"
+        ) as engine_mock, patch.object(
+            DynamicPathManager, "path_cache"
+        ) as cache_mock:
+            DynamicPathManager.handle_topology_event(event)
+            engine_mock.handle_event.assert_called_once_with(event)
+            cache_mock.invalidate.assert_called_once()
+
+    @patch("napps.kytos.mef_eline.models.path.log")
+    def test_get_best_paths_batch(self, mock_log):
+        """Test get_best_paths_batch requests each group once."""
+        circuits = []
+        for evc_id, (source, destination) in enumerate(
+            [("a", "z"), ("a", "z"), ("b", "z"), ("c", "z")]
+        ):
+            circuit = MagicMock(
+                id=str(evc_id), max_paths=2, primary_constraints={}
+            )
+            circuit.uni_a.interface.id = source
+            circuit.uni_z.interface.id = destination
+            circuits.append(circuit)
+
+        def request_paths(_circuit, request_data):
+            if request_data["source"] == "b":
+                raise PathFinderException("error")
+            if request_data["source"] == "c":
+                raise ValueError("error")
+            return [{"hops": ["hop1"]}, {"hops": ["hop2"]}]
+
+        with patch.object(
+            DynamicPathManager, "_request_paths", side_effect=request_paths
+        ) as request_mock, patch.object(
+            DynamicPathManager, "create_path", side_effect=lambda hops: hops
+        ):
+            best_paths = DynamicPathManager.get_best_paths_batch(circuits)
+            assert request_mock.call_count == 3
+            assert list(best_paths["0"]) == [["hop1"], ["hop2"]]
+            assert list(best_paths["1"]) == [["hop1"], ["hop2"]]
+            assert not list(best_paths["2"])
+            assert not list(best_paths["3"])
+        assert mock_log.error.call_count == 2
+        assert not DynamicPathManager.get_best_paths_batch([])
+
     @patch('time.sleep')
     @patch("napps.kytos.mef_eline.models.path.log")
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     def test_get_best_paths_error(self, mock_httpx_post, mock_log, _):
         """Test get_best_paths method."""
         controller = MagicMock()
@@ -527,7 +727,7 @@ class TestDynamicPathManager():
         "get_shared_components",
         side_effect=DynamicPathManager.get_shared_components
     )
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     def test_get_disjoint_paths(self, mock_httpx_post, mock_shared):
         """Test get_disjoint_paths method."""
 
@@ -674,11 +874,17 @@ class TestDynamicPathManager():
                 id_to_interface_mock("00:00:00:00:00:00:00:05:2")
             ),
         ]
-        path_links = [
-            ("00:00:00:00:00:00:00:01:2", "00:00:00:00:00:00:00:02:2"),
-            ("00:00:00:00:00:00:00:02:3", "00:00:00:00:00:00:00:04:2"),
-            ("00:00:00:00:00:00:00:04:3", "00:00:00:00:00:00:00:05:2")
-        ]
+        path_links = {
+            frozenset(
+                ("00:00:00:00:00:00:00:01:2", "00:00:00:00:00:00:00:02:2")
+            ),
+            frozenset(
+                ("00:00:00:00:00:00:00:02:3", "00:00:00:00:00:00:00:04:2")
+            ),
+            frozenset(
+                ("00:00:00:00:00:00:00:04:3", "00:00:00:00:00:00:00:05:2")
+            ),
+        }
         path_switches = {
             "00:00:00:00:00:00:00:04",
             "00:00:00:00:00:00:00:02"
@@ -747,7 +953,6 @@ class TestDynamicPathManager():
                 },
                 **evc.secondary_constraints
             },
-            timeout=10,
         )
         assert mock_httpx_post.call_count >= 1
         # If secondary_constraints are set they are expected to be parametrized
@@ -822,12 +1027,12 @@ class TestDynamicPathManager():
                 id_to_interface_mock("00:00:00:00:00:00:00:07:2")
             ),
         ]
-        path_interfaces = [
+        path_interfaces = set(map(frozenset, [
             ("00:00:00:00:00:00:00:01:2", "00:00:00:00:00:00:00:02:1"),
             ("00:00:00:00:00:00:00:02:2", "00:00:00:00:00:00:00:03:1"),
             ("00:00:00:00:00:00:00:03:2", "00:00:00:00:00:00:00:04:1"),
             ("00:00:00:00:00:00:00:04:2", "00:00:00:00:00:00:00:07:2")
-        ]
+        ]))
         path_switches = {
             "00:00:00:00:00:00:00:02",
             "00:00:00:00:00:00:00:03",
@@ -899,7 +1104,7 @@ class TestDynamicPathManager():
 
         assert not result
 
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     def test_get_disjoint_paths_simple_evc(self, mock_httpx_post):
         """Test get_disjoint_paths method for simple EVCs."""
         controller = MagicMock()
@@ -976,7 +1181,7 @@ class TestDynamicPathManager():
             [link.id for link in expected_disjoint_path]
         )
 
-    @patch("httpx.post")
+    @patch("napps.kytos.mef_eline.clients.HTTPClient.post")
     @patch("napps.kytos.mef_eline.models.path.log")
     @patch("time.sleep")
     def test_get_disjoint_paths_error(self, _, mock_log, mock_post):
@@ -1026,13 +1231,159 @@ class TestDynamicPathManager():
             '00:00:00:00:00:00:00:03',
             '00:00:00:00:00:00:00:03:1'
         ]}
-        mock_links = [
-            ("00:00:00:00:00:00:00:01:2", "00:00:00:00:00:00:00:02:2"),
-            ("00:00:00:00:00:00:00:02:3", "00:00:00:00:00:00:00:03:2")
-        ]
+        mock_links = {
+            frozenset(
+                ("00:00:00:00:00:00:00:01:2", "00:00:00:00:00:00:00:02:2")
+            ),
+            frozenset(
+                ("00:00:00:00:00:00:00:03:2", "00:00:00:00:00:00:00:02:3")
+            ),
+        }
         mock_switches = {"00:00:00:00:00:00:00:02"}
         actual_lk, actual_sw = DynamicPathManager.get_shared_components(
             mock_path, mock_links, mock_switches
         )
         assert actual_lk == 1
         assert actual_sw == 1
+
+    def test_rank_disjoint_paths(self):
+        """Test rank_disjoint_paths."""
+        unwanted_links = {frozenset(("1:1", "2:1")), frozenset(("2:2", "3:1"))}
+        unwanted_switches = {"2"}
+        paths = [
+            {"hops": ["1:3", "1", "1:1", "2:1", "2", "2:2", "3:1", "3", "3:3"],
+             "cost": 1},
+            {"hops": ["1:3", "1", "1:2", "4:1", "4", "4:2", "3:2", "3", "3:3"],
+             "cost": 3},
+            {"hops": ["1:3", "1", "1:1", "2:1", "2", "2:3", "3:4", "3", "3:3"],
+             "cost": 2},
+            {"hops": ["1:3", "1", "1:4", "5:1", "5", "5:2", "3:5", "3", "3:3"],
+             "cost": 2},
+        ]
+        ranked = DynamicPathManager.rank_disjoint_paths(
+            paths, unwanted_links, unwanted_switches
+        )
+        assert ranked == [paths[3], paths[1], paths[2]]
+        assert [path["disjointness"] for path in paths] == [0, 1, 1 / 3, 1]
+
+
+class TestPathFinderCache():
+    """Tests for the PathFinderCache class"""
+
+    def setup_method(self):
+        """Set up a cache."""
+        self.cache = PathFinderCache(max_size=2, ttl=60)
+
+    def test_get(self):
+        """Test cached replies are returned until invalidated."""
+        fetch = MagicMock(return_value=[{"hops": ["a", "b"], "cost": 1}])
+        paths = self.cache.get("key", fetch)
+        assert paths == [{"hops": ["a", "b"], "cost": 1}]
+        paths[0]["disjointness"] = 1
+        assert self.cache.get("key", fetch) == [
+            {"hops": ["a", "b"], "cost": 1}
+        ]
+        assert fetch.call_count == 1
+
+        self.cache.invalidate()
+        self.cache.get("key", fetch)
+        assert fetch.call_count == 2
+        stats = self.cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["epoch"] == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used reply is evicted."""
+        fetch = MagicMock(return_value=[])
+        self.cache.get("key1", fetch)
+        self.cache.get("key2", fetch)
+        self.cache.get("key1", fetch)
+        self.cache.get("key3", fetch)
+        assert fetch.call_count == 3
+        self.cache.get("key1", fetch)
+        assert fetch.call_count == 3
+        self.cache.get("key2", fetch)
+        assert fetch.call_count == 4
+        assert self.cache.get_stats()["size"] == 2
+
+    @patch("napps.kytos.mef_eline.models.path.time.monotonic")
+    def test_ttl(self, monotonic_mock):
+        """Test replies expire after ttl seconds."""
+        fetch = MagicMock(return_value=[])
+        monotonic_mock.return_value = 0
+        self.cache.get("key", fetch)
+        monotonic_mock.return_value = 59
+        self.cache.get("key", fetch)
+        assert fetch.call_count == 1
+        monotonic_mock.return_value = 61
+        self.cache.get("key", fetch)
+        assert fetch.call_count == 2
+
+    def test_errors_not_cached(self):
+        """Test failed requests aren't cached."""
+        fetch = MagicMock(side_effect=[PathFinderException("error"), []])
+        with pytest.raises(PathFinderException):
+            self.cache.get("key", fetch)
+        assert not self.cache.get("key", fetch)
+        assert fetch.call_count == 2
+
+    def test_invalidated_while_in_flight(self):
+        """Test a reply isn't cached if the topology changed meanwhile."""
+        def fetch():
+            self.cache.invalidate()
+            return []
+
+        self.cache.get("key", fetch)
+        assert self.cache.get_stats()["size"] == 0
+
+    def test_coalesce_concurrent_requests(self):
+        """Test concurrent identical requests send a single request."""
+        started, release = Event(), Event()
+        fetch = MagicMock(return_value=[{"hops": []}])
+
+        def slow_fetch():
+            started.set()
+            release.wait(5)
+            return fetch()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(self.cache.get, "key", slow_fetch)
+            started.wait(5)
+            followers = [
+                executor.submit(self.cache.get, "key", slow_fetch)
+                for _ in range(3)
+            ]
+            while self.cache.get_stats()["coalesced"] < 3:
+                time.sleep(0.01)
+            release.set()
+            results = [leader.result(5)] + [
+                follower.result(5) for follower in followers
+            ]
+        assert fetch.call_count == 1
+        assert all(result == [{"hops": []}] for result in results)
+
+    def test_get_paths(self):
+        """Test DynamicPathManager.get_paths uses the cache."""
+        circuit = MagicMock()
+        circuit.uni_a.interface.id = "a"
+        circuit.uni_z.interface.id = "z"
+        path_cache = DynamicPathManager.path_cache
+        DynamicPathManager.path_cache = self.cache
+        try:
+            with patch.object(
+                DynamicPathManager, "_request_paths", return_value=[]
+            ) as request_mock:
+                DynamicPathManager.get_paths(circuit, spf_attribute="hop")
+                DynamicPathManager.get_paths(circuit, spf_attribute="hop")
+                assert request_mock.call_count == 1
+                DynamicPathManager.get_paths(circuit, spf_attribute="delay")
+                assert request_mock.call_count == 2
+                request_mock.assert_called_with(circuit, {
+                    "source": "a",
+                    "destination": "z",
+                    "spf_max_paths": 2,
+                    "spf_attribute": "delay",
+                })
+        finally:
+            DynamicPathManager.path_cache = path_cache
@@ -0,0 +1,154 @@
+"""Module to test the local path engine."""
+from unittest.mock import MagicMock
+
+from kytos.core.common import EntityStatus
+from napps.kytos.mef_eline.models import LocalPathEngine
+from napps.kytos.mef_eline.models.path_engine import k_shortest_paths
+
+DPID = "00:00:00:00:00:00:00:0{}"
+
+
+def get_link(link_id, interface_a, interface_b, **metadata):
+    """Return a mocked UP link between two interfaces."""
+    link = MagicMock(id=link_id, status=EntityStatus.UP, metadata=metadata)
+    link.endpoint_a.id = interface_a
+    link.endpoint_b.id = interface_b
+    return link
+
+
+def test_k_shortest_paths():
+    """Test k_shortest_paths yields simple paths sorted by cost."""
+    graph = {
+        "C": {"D": 3, "E": 2},
+        "D": {"C": 3, "E": 1, "F": 4},
+        "E": {"C": 2, "D": 1, "F": 2, "G": 3},
+        "F": {"D": 4, "E": 2, "G": 2, "H": 1},
+        "G": {"E": 3, "F": 2, "H": 2},
+        "H": {"F": 1, "G": 2},
+    }
+    paths = list(k_shortest_paths(graph, "C", "H", 4))
+    assert paths == [
+        (5, ["C", "E", "F", "H"]),
+        (7, ["C", "D", "E", "F", "H"]),
+        (7, ["C", "E", "G", "H"]),
+        (8, ["C", "D", "F", "H"]),
+    ]
+    assert not list(k_shortest_paths(graph, "C", "X", 3))
+
+
+class TestLocalPathEngine:
+    """Test the LocalPathEngine class."""
+
+    def setup_method(self):
+        """Set up a square topology: s1 - s2 - s4 and s1 - s3 - s4."""
+        self.links = {
+            "l12": get_link(
+                "l12", f"{DPID.format(1)}:2", f"{DPID.format(2)}:2",
+                bandwidth=10, delay=6,
+            ),
+            "l24": get_link(
+                "l24", f"{DPID.format(2)}:3", f"{DPID.format(4)}:2",
+                bandwidth=10, delay=6,
+            ),
+            "l13": get_link(
+                "l13", f"{DPID.format(1)}:3", f"{DPID.format(3)}:2",
+                bandwidth=100, delay=5,
+            ),
+            "l34": get_link(
+                "l34", f"{DPID.format(3)}:3", f"{DPID.format(4)}:3",
+                bandwidth=100, delay=5,
+            ),
+        }
+        controller = MagicMock()
+        controller.links = self.links
+        self.engine = LocalPathEngine()
+        self.engine.set_controller(controller)
+        self.source = f"{DPID.format(1)}:1"
+        self.destination = f"{DPID.format(4)}:1"
+
+    def get_paths(self, **kwargs):
+        """Return the paths from source to destination."""
+        return self.engine.get_paths(self.source, self.destination, **kwargs)
+
+    def test_get_paths_hop(self):
+        """Test get_paths replies like pathfinder."""
+        paths = self.get_paths(spf_attribute="hop")
+        assert paths == [
+            {
+                "hops": [
+                    self.source, DPID.format(1), f"{DPID.format(1)}:2",
+                    f"{DPID.format(2)}:2", DPID.format(2),
+                    f"{DPID.format(2)}:3", f"{DPID.format(4)}:2",
+                    DPID.format(4), self.destination,
+                ],
+                "cost": 8,
+            },
+            {
+                "hops": [
+                    self.source, DPID.format(1), f"{DPID.format(1)}:3",
+                    f"{DPID.format(3)}:2", DPID.format(3),
+                    f"{DPID.format(3)}:3", f"{DPID.format(4)}:3",
+                    DPID.format(4), self.destination,
+                ],
+                "cost": 8,
+            },
+        ]
+        assert len(self.get_paths(spf_max_paths=1)) == 1
+        assert not self.engine.get_paths(self.source, self.source)
+
+    def test_get_paths_delay(self):
+        """Test get_paths weighing links by delay."""
+        paths = self.get_paths(spf_attribute="delay")
+        assert [path["cost"] for path in paths] == [10, 12]
+        assert DPID.format(3) in paths[0]["hops"]
+        assert not self.get_paths(spf_attribute="delay", spf_max_path_cost=9)
+
+    def test_get_paths_constraints(self):
+        """Test mandatory and flexible metrics and undesired links."""
+        paths = self.get_paths(mandatory_metrics={"bandwidth": 50})
+        assert len(paths) == 1
+        assert DPID.format(3) in paths[0]["hops"]
+
+        flexible_metrics = {"bandwidth": 50, "delay": 7}
+        paths = self.get_paths(
+            flexible_metrics=flexible_metrics, minimum_flexible_hits=1
+        )
+        assert len(paths) == 2
+        paths = self.get_paths(flexible_metrics=flexible_metrics)
+        assert len(paths) == 1
+
+        paths = self.get_paths(undesired_links=["l13"])
+        assert len(paths) == 1
+        assert DPID.format(2) in paths[0]["hops"]
+
+        self.links["l12"].metadata["ownership"] = {"red": {}}
+        self.engine.handle_event(MagicMock(content={"link": "l12"}))
+        paths = self.get_paths(mandatory_metrics={"not_ownership": ["red"]})
+        assert len(paths) == 1
+        assert DPID.format(3) in paths[0]["hops"]
+
+    def test_handle_event(self):
+        """Test link events update the graph and others reload it."""
+        assert len(self.get_paths()) == 2
+        self.links["l13"].status = EntityStatus.DOWN
+        assert len(self.get_paths()) == 2
+
+        event = MagicMock(content={"link": self.links["l13"]})
+        self.engine.handle_event(event)
+        assert len(self.get_paths()) == 1
+
+        self.links["l13"].status = EntityStatus.UP
+        self.engine.handle_event(MagicMock(content={"link": "l13"}))
+        assert len(self.get_paths()) == 2
+
+        del self.links["l12"]
+        self.engine.handle_event(MagicMock(content={"link": "l12"}))
+        paths = self.get_paths()
+        assert len(paths) == 1
+        assert DPID.format(2) not in paths[0]["hops"]
+
+        self.links["l12"] = get_link(
+            "l12", f"{DPID.format(1)}:2", f"{DPID.format(2)}:2"
+        )
+        self.engine.handle_event(MagicMock(content={"dpid": DPID.format(2)}))
+        assert len(self.get_paths()) == 2
@@ -0,0 +1,42 @@
+"""Module to test the VlanBitmap class."""
+from unittest.mock import MagicMock
+
+from napps.kytos.mef_eline.models import VlanBitmap
+
+
+class TestVlanBitmap:
+    """Test the VlanBitmap class."""
+
+    def test_ranges(self):
+        """Test converting from and to tag ranges."""
+        tag_ranges = [[1, 1], [5, 10], [4000, 4095]]
+        bitmap = VlanBitmap.from_ranges(tag_ranges)
+        assert bitmap.to_ranges() == tag_ranges
+        assert len(bitmap) == 103
+        assert 5 in bitmap and 4095 in bitmap
+        assert 2 not in bitmap and -1 not in bitmap
+        bitmap = VlanBitmap.from_ranges([[1, 3], [4, 6], [9, 8]])
+        assert bitmap.to_ranges() == [[1, 6]]
+        assert not VlanBitmap.from_ranges([])
+        assert not VlanBitmap().to_ranges()
+
+    def test_operations(self):
+        """Test union, intersection, difference and overlap."""
+        bitmap_a = VlanBitmap.from_ranges([[1, 10], [20, 30]])
+        bitmap_b = VlanBitmap.from_ranges([[5, 25]])
+        assert (bitmap_a | bitmap_b).to_ranges() == [[1, 30]]
+        assert (bitmap_a & bitmap_b).to_ranges() == [[5, 10], [20, 25]]
+        assert (bitmap_a - bitmap_b).to_ranges() == [[1, 4], [26, 30]]
+        assert bitmap_a.overlaps(bitmap_b)
+        assert not bitmap_a.overlaps(VlanBitmap.from_ranges([[11, 19]]))
+        assert VlanBitmap.from_ranges([[2, 3], [21, 21]]) <= bitmap_a
+        assert not bitmap_b.issubset(bitmap_a)
+        assert bitmap_a == VlanBitmap.from_ranges([[1, 10], [20, 30]])
+
+    def test_from_interface(self):
+        """Test the available tags of an interface."""
+        interface = MagicMock(available_tags={"vlan": [[1, 99], [101, 4095]]})
+        available = VlanBitmap.from_interface(interface)
+        assert 100 not in available
+        assert len(available) == 4094
+        assert not VlanBitmap.from_interface(interface, "vlan_qinq")
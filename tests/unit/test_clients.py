@@ -0,0 +1,100 @@
+"""Module to test the clients.py file."""
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from napps.kytos.mef_eline import clients
+from napps.kytos.mef_eline.clients import (HTTPClient, close_clients,
+                                           get_client, get_latency_stats)
+
+
+class TestHTTPClient:
+    """Test the HTTPClient class."""
+
+    def setup_method(self):
+        """Set up a client with a mocked transport."""
+        self.client = HTTPClient("flow_manager")
+
+        def handler(request):
+            if request.url.path == "/error":
+                return httpx.Response(500, text="error")
+            if request.url.path == "/timeout":
+                raise httpx.TimeoutException("timeout")
+            return httpx.Response(200, json={"method": request.method})
+
+        # pylint: disable=protected-access
+        self.client._client = httpx.Client(
+            transport=httpx.MockTransport(handler)
+        )
+
+    def teardown_method(self):
+        """Close the client."""
+        self.client.close()
+
+    def test_requests(self):
+        """Test requests are sent through the pooled client."""
+        response = self.client.post("http://localhost/flows", json={})
+        assert response.json() == {"method": "POST"}
+        response = self.client.put("http://localhost/flows?force=True")
+        assert response.json() == {"method": "PUT"}
+        response = self.client.request("DELETE", "http://localhost/flows")
+        assert response.json() == {"method": "DELETE"}
+
+    def test_get_stats(self):
+        """Test the latency stats are recorded per endpoint."""
+        self.client.post("http://localhost/flows?force=True")
+        self.client.post("http://localhost/flows")
+        self.client.post("http://localhost/error")
+        with pytest.raises(httpx.TimeoutException):
+            self.client.put("http://localhost/timeout")
+
+        stats = self.client.get_stats()
+        assert set(stats) == {
+            "POST /flows", "POST /error", "PUT /timeout"
+        }
+        assert stats["POST /flows"]["count"] == 2
+        assert stats["POST /flows"]["errors"] == 0
+        assert stats["POST /error"]["errors"] == 1
+        assert stats["PUT /timeout"]["errors"] == 1
+        assert stats["POST /flows"]["max"] >= stats["POST /flows"]["avg"]
+
+    def test_close(self):
+        """Test close."""
+        assert not self.client.is_closed
+        self.client.close()
+        assert self.client.is_closed
+
+
+class TestClients:
+    """Test the shared clients functions."""
+
+    def teardown_method(self):
+        """Close the shared clients."""
+        close_clients()
+
+    @patch.dict(
+        "napps.kytos.mef_eline.settings.HTTP_CLIENTS",
+        {"default": {"timeout": 5}, "pathfinder": {"timeout": 10}},
+        clear=True
+    )
+    def test_get_client(self):
+        """Test get_client shares a client per service."""
+        client = get_client("pathfinder")
+        assert client is get_client("pathfinder")
+        assert client is not get_client("flow_manager")
+        # pylint: disable=protected-access
+        assert client._client.timeout.read == 10
+        assert get_client("flow_manager")._client.timeout.read == 5
+
+        client.close()
+        assert get_client("pathfinder") is not client
+
+    def test_close_clients(self):
+        """Test close_clients."""
+        client = get_client("sdntrace_cp")
+        assert get_latency_stats() == {"sdntrace_cp": {}}
+        close_clients()
+        assert client.is_closed
+        # pylint: disable=protected-access
+        assert not clients._clients
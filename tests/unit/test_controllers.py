@@ -70,11 +70,43 @@ class TestControllers():
         args = self.eline.db.evcs.aggregate.call_args[0][0][0]
         assert args["$match"]["metadata.test"] == 123
 
+    def test_get_circuit(self):
+        """Test get_circuit merges the EVC state"""
+        self.eline.db.evcs.aggregate.return_value = iter([{"id": "1234"}])
+        assert self.eline.get_circuit("1234") == {"id": "1234"}
+        stages = self.eline.db.evcs.aggregate.call_args[0][0]
+        assert stages[0] == {"$match": {"_id": "1234"}}
+        assert stages[1]["$lookup"]["from"] == "evcs_state"
+
+        self.eline.db.evcs.aggregate.return_value = iter([])
+        assert self.eline.get_circuit("1234") is None
+
     def test_upsert_evc(self):
         """Test upsert_evc"""
 
         self.eline.upsert_evc(self.evc_dict)
         assert self.eline.db.evcs.find_one_and_update.call_count == 1
+        config = self.eline.db.evcs.find_one_and_update.call_args[0][1]
+        assert "active" not in config["$set"]
+        self.eline.db.evcs_state.update_one.assert_called_once_with(
+            {"_id": "1234"},
+            {"$set": {"active": False, "execution_rounds": 0, "id": "1234"}},
+            upsert=True,
+        )
+
+    def test_update_evc(self):
+        """Test update_evc only writes evcs_state for state fields"""
+        self.eline.update_evc({"id": "1234", "active": True})
+        self.eline.db.evcs.find_one_and_update.assert_not_called()
+        self.eline.db.evcs_state.update_one.assert_called_once_with(
+            {"_id": "1234"},
+            {"$set": {"active": True, "id": "1234"}},
+            upsert=True,
+        )
+
+        self.eline.update_evc({"id": "1234", "name": "EVC 2"})
+        self.eline.db.evcs.find_one_and_update.assert_called_once()
+        assert self.eline.db.evcs_state.update_one.call_count == 1
 
     def test_update_evcs_metadata(self):
         """Test update_evcs_metadata"""
@@ -88,7 +120,52 @@ class TestControllers():
     def test_update_evcs(self):
         """Test update_evcs"""
         evc2 = dict(self.evc_dict | {"id": "456"})
-        self.eline.update_evcs([self.evc_dict, evc2])
+        self.eline.db.evcs.bulk_write.return_value.modified_count = 2
+        self.eline.db.evcs_state.bulk_write.return_value.modified_count = 2
+        assert self.eline.update_evcs([self.evc_dict, evc2]) == 2
         arg = self.eline.db.evcs.bulk_write.call_args[0][0]
         assert len(arg) == 2
         assert self.eline.db.evcs.bulk_write.call_count == 1
+        assert self.eline.db.evcs_state.bulk_write.call_count == 1
+
+    def test_update_evcs_trusted(self):
+        """Test update_evcs sets trusted EVCs without validating them"""
+        evc = {"id": "1234", "_id": "1234", "name": "EVC 1"}
+        self.eline.update_evcs([evc], trusted=True)
+        arg = self.eline.db.evcs.bulk_write.call_args[0][0]
+        assert arg[0]._doc["$set"] == {
+            "id": "1234", "_id": "1234", "name": "EVC 1"
+        }
+        arg = self.eline.db.evcs_state.bulk_write.call_args[0][0]
+        assert arg[0]._doc["$set"] == {
+            "updated_at": evc["updated_at"], "id": "1234"
+        }
+        assert self.eline.get_upsert_fields(evc, trusted=True) is evc
+        assert self.eline.get_update_fields({"id": "1"}, trusted=True) == {
+            "id": "1"
+        }
+
+    def test_write_evcs(self):
+        """Test write_evcs"""
+        self.eline.db.evcs.bulk_write.return_value.modified_count = 1
+        self.eline.db.evcs.bulk_write.return_value.upserted_count = 1
+        fields = self.eline.get_upsert_fields(self.evc_dict)
+        assert fields["queue_id"] is None
+        writes = {
+            "1234": (fields, True),
+            "456": ({"id": "456", "active": True}, False),
+        }
+        self.eline.db.evcs_state.bulk_write.return_value.modified_count = 1
+        self.eline.db.evcs_state.bulk_write.return_value.upserted_count = 1
+        assert self.eline.write_evcs(writes) == 2
+        ops = self.eline.db.evcs.bulk_write.call_args[0][0]
+        assert len(ops) == 1
+        assert ops[0]._upsert
+        assert "$setOnInsert" in ops[0]._doc
+        assert "active" not in ops[0]._doc["$set"]
+        state_ops = self.eline.db.evcs_state.bulk_write.call_args[0][0]
+        assert len(state_ops) == 2
+        assert state_ops[1]._doc == {"$set": {"active": True, "id": "456"}}
+
+        assert not self.eline.write_evcs({})
+        assert self.eline.db.evcs.bulk_write.call_count == 1
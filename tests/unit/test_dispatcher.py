@@ -0,0 +1,226 @@
+"""Module to test the dispatcher.py file."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from napps.kytos.mef_eline.dispatcher import FlowModDispatcher
+from napps.kytos.mef_eline.exceptions import FlowModException
+
+
+class TestFlowModDispatcher:
+    """Test the FlowModDispatcher class."""
+
+    def setup_method(self):
+        """Set up a dispatcher."""
+        self.dispatcher = FlowModDispatcher()
+        self.dispatcher.set_controller(MagicMock())
+
+    @patch("napps.kytos.mef_eline.dispatcher.get_async_client")
+    async def test_asend(self, get_client_mock):
+        """Test asend."""
+        client = get_client_mock.return_value
+        client.request = AsyncMock(
+            return_value=MagicMock(status_code=201, is_server_error=False)
+        )
+        await self.dispatcher.asend("POST", "http://flows", {"1": {}})
+        client.request.assert_awaited_once_with(
+            "POST", "http://flows", json={"1": {}}
+        )
+        get_client_mock.assert_called_with("flow_manager")
+
+    @patch.object(FlowModDispatcher.asend.retry, "wait", wait_none())
+    @patch("napps.kytos.mef_eline.dispatcher.get_async_client")
+    async def test_asend_retries(self, get_client_mock):
+        """Test asend retries failed requests and then raises."""
+        client = get_client_mock.return_value
+        client.request = AsyncMock(
+            side_effect=[
+                httpx.ConnectError("error"),
+                MagicMock(status_code=500, is_server_error=True),
+                MagicMock(status_code=415, is_server_error=False),
+            ]
+        )
+        with pytest.raises(FlowModException):
+            await self.dispatcher.asend("DELETE", "http://flows", {})
+        assert client.request.await_count == 3
+
+    @patch("napps.kytos.mef_eline.dispatcher.settings")
+    async def test_asend_bounded_concurrency(self, settings_mock):
+        """Test the requests in flight are bounded."""
+        settings_mock.FLOW_MOD_MAX_CONCURRENCY = 2
+        in_flight, max_in_flight = 0, 0
+
+        async def request(*_args, **_kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MagicMock(status_code=201, is_server_error=False)
+
+        with patch(
+            "napps.kytos.mef_eline.dispatcher.get_async_client"
+        ) as get_client_mock:
+            get_client_mock.return_value.request = request
+            await asyncio.gather(*(
+                self.dispatcher.asend("POST", "http://flows", {})
+                for _ in range(5)
+            ))
+        assert max_in_flight == 2
+
+    async def test_send(self):
+        """Test send from a thread waits for the request on the loop."""
+        self.dispatcher.controller.loop = asyncio.get_running_loop()
+        self.dispatcher.asend = AsyncMock()
+        await asyncio.to_thread(
+            self.dispatcher.send, "POST", "http://flows", {}
+        )
+        self.dispatcher.asend.assert_awaited_once_with(
+            "POST", "http://flows", {}
+        )
+
+        self.dispatcher.acoalesce = AsyncMock()
+        await asyncio.to_thread(
+            self.dispatcher.send, "POST", "http://flows", {}, True
+        )
+        self.dispatcher.acoalesce.assert_awaited_once_with(
+            "POST", "http://flows", {}
+        )
+
+        self.dispatcher.asend.side_effect = FlowModException("error")
+        with pytest.raises(FlowModException):
+            await asyncio.to_thread(
+                self.dispatcher.send, "POST", "http://flows", {}
+            )
+
+    @patch("napps.kytos.mef_eline.dispatcher.settings")
+    async def test_send_timeout(self, settings_mock):
+        """Test send stops waiting for a request after a timeout."""
+        settings_mock.FLOW_MOD_SEND_TIMEOUT = 0.01
+        self.dispatcher.controller.loop = asyncio.get_running_loop()
+        cancelled = asyncio.Event()
+
+        async def asend(*_args):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        self.dispatcher.asend = asend
+        with pytest.raises(FlowModException):
+            await asyncio.to_thread(
+                self.dispatcher.send, "POST", "http://flows", {}
+            )
+        await asyncio.wait_for(cancelled.wait(), timeout=5)
+
+    async def test_send_on_loop_thread(self):
+        """Test send refuses to block the event loop."""
+        self.dispatcher.controller.loop = asyncio.get_running_loop()
+        with pytest.raises(RuntimeError):
+            self.dispatcher.send("POST", "http://flows", {})
+
+    def test_submit_without_loop(self):
+        """Test submit when the event loop isn't running."""
+        self.dispatcher.controller.loop = None
+        with pytest.raises(FlowModException):
+            self.dispatcher.submit("POST", "http://flows", {})
+
+
+class TestFlowModCoalescing:
+    """Test the FlowModDispatcher flows_by_switch coalescing."""
+
+    def setup_method(self):
+        """Set up a dispatcher with mocked asend and _request."""
+        self.dispatcher = FlowModDispatcher()
+        self.dispatcher.asend = AsyncMock()
+        self.dispatcher._request = AsyncMock()
+
+    @patch("napps.kytos.mef_eline.dispatcher.settings")
+    async def test_acoalesce_window(self, settings_mock):
+        """Test requests in the same window are merged per dpid."""
+        settings_mock.FLOW_MOD_COALESCE_WINDOW = 0.01
+        settings_mock.FLOW_MOD_COALESCE_MAX_FLOWS = 100
+        await asyncio.gather(
+            self.dispatcher.acoalesce(
+                "POST", "http://flows", {"1": {"flows": [1]}}
+            ),
+            self.dispatcher.acoalesce(
+                "POST", "http://flows", {"1": {"flows": [2]}, "2": {
+                    "flows": [3]
+                }}
+            ),
+            self.dispatcher.acoalesce(
+                "DELETE", "http://flows", {"1": {"flows": [4]}}
+            ),
+        )
+        assert self.dispatcher.asend.await_count == 2
+        self.dispatcher.asend.assert_any_await(
+            "POST", "http://flows",
+            {"1": {"flows": [1, 2]}, "2": {"flows": [3]}}
+        )
+        self.dispatcher.asend.assert_any_await(
+            "DELETE", "http://flows", {"1": {"flows": [4]}}
+        )
+
+    @patch("napps.kytos.mef_eline.dispatcher.settings")
+    async def test_acoalesce_max_flows(self, settings_mock):
+        """Test the buffer is flushed once it has enough flows."""
+        settings_mock.FLOW_MOD_COALESCE_WINDOW = 60
+        settings_mock.FLOW_MOD_COALESCE_MAX_FLOWS = 3
+        await asyncio.wait_for(asyncio.gather(
+            self.dispatcher.acoalesce(
+                "POST", "http://flows", {"1": {"flows": [1, 2]}}
+            ),
+            self.dispatcher.acoalesce(
+                "POST", "http://flows", {"2": {"flows": [3]}}
+            ),
+        ), timeout=5)
+        self.dispatcher.asend.assert_awaited_once_with(
+            "POST", "http://flows",
+            {"1": {"flows": [1, 2]}, "2": {"flows": [3]}}
+        )
+        # pylint: disable=protected-access
+        assert not self.dispatcher._flush_handles
+
+    @patch("napps.kytos.mef_eline.dispatcher.settings")
+    async def test_acoalesce_failure(self, settings_mock):
+        """Test a failed batch only fails the requests whose flows fail."""
+        settings_mock.FLOW_MOD_COALESCE_WINDOW = 0.01
+        settings_mock.FLOW_MOD_COALESCE_MAX_FLOWS = 100
+        bad_data = {"1": {"flows": ["bad"]}}
+
+        async def asend(_method, _endpoint, data):
+            if "bad" in data["1"]["flows"]:
+                raise FlowModException("error")
+
+        self.dispatcher.asend.side_effect = asend
+        self.dispatcher._request.side_effect = asend
+        results = await asyncio.gather(
+            self.dispatcher.acoalesce(
+                "POST", "http://flows", {"1": {"flows": ["good"]}}
+            ),
+            self.dispatcher.acoalesce("POST", "http://flows", bad_data),
+            return_exceptions=True
+        )
+        assert results[0] is None
+        assert isinstance(results[1], FlowModException)
+        # The requests are resent once each, without asend retries
+        self.dispatcher.asend.assert_awaited_once()
+        assert self.dispatcher._request.await_count == 2
+
+    async def test_flush_keeps_task(self):
+        """Test a batch task is referenced until it's done."""
+        future = asyncio.get_running_loop().create_future()
+        key = ("POST", "http://flows")
+        # pylint: disable=protected-access
+        self.dispatcher._buffers[key] = [({"1": {"flows": [1]}}, future)]
+        self.dispatcher._flush(key)
+        assert len(self.dispatcher._tasks) == 1
+        await asyncio.wait_for(future, timeout=5)
+        await asyncio.gather(*self.dispatcher._tasks)
+        await asyncio.sleep(0)
+        assert not self.dispatcher._tasks
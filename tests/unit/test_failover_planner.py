@@ -0,0 +1,152 @@
+"""Module to test the failover_planner.py file."""
+from threading import Event
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from kytos.core.common import EntityStatus
+from napps.kytos.mef_eline.failover_planner import FailoverPlanner
+
+
+def get_evc_mocked(evc_id, service_level=0, creation_time=0):
+    """Return a mocked EVC needing a failover path."""
+    evc = MagicMock(
+        id=evc_id, service_level=service_level, creation_time=creation_time
+    )
+    evc.is_eligible_for_failover_path.return_value = True
+    evc.is_active.return_value = True
+    evc.failover_path = []
+    evc.current_path = ["link1"]
+    return evc
+
+
+class TestFailoverPlanner:
+    """Test the FailoverPlanner class."""
+
+    def setup_method(self):
+        """Set up a planner."""
+        self.evcs = {}
+        self.planner = FailoverPlanner(self.evcs.get, max_workers=2, rate=0)
+
+    def teardown_method(self):
+        """Stop the planner workers."""
+        self.planner.stop()
+
+    def test_needs_failover(self):
+        """Test needs_failover."""
+        evc = get_evc_mocked("1")
+        assert self.planner.needs_failover(evc)
+        evc.failover_path = ["link2"]
+        assert not self.planner.needs_failover(evc)
+        evc.failover_path = []
+        evc.is_eligible_for_failover_path.return_value = False
+        assert not self.planner.needs_failover(evc)
+
+    @patch.object(FailoverPlanner, "_start")
+    def test_schedule_order(self, _):
+        """Test EVCs are planned by service level and creation time."""
+        self.planner._running = True
+        evc1 = get_evc_mocked("1", service_level=0, creation_time=1)
+        evc2 = get_evc_mocked("2", service_level=5, creation_time=2)
+        evc3 = get_evc_mocked("3", service_level=0, creation_time=0)
+        for evc in (evc1, evc2, evc3, evc1):
+            self.planner.schedule(evc)
+        assert len(self.planner._queue) == 3
+        assert [self.planner._next() for _ in range(3)] == ["2", "3", "1"]
+
+    @patch("napps.kytos.mef_eline.failover_planner.time")
+    @patch.object(FailoverPlanner, "_start")
+    def test_rate_limit(self, _, time_mock):
+        """Test plans are started at most rate per second."""
+        self.planner.rate = 10
+        self.planner._running = True
+        time_mock.monotonic.return_value = 100
+        for evc_id in ("1", "2", "3"):
+            self.planner.schedule(get_evc_mocked(evc_id))
+            self.planner._next()
+        assert [
+            call.args[0] for call in time_mock.sleep.call_args_list
+        ] == pytest.approx([0.1, 0.2])
+
+    def test_plan(self):
+        """Test plan sets up the failover path with UP candidates."""
+        evc = get_evc_mocked("1")
+        self.evcs["1"] = evc
+        path_up = MagicMock(status=EntityStatus.UP)
+        path_down = MagicMock(status=EntityStatus.DOWN)
+        evc.get_failover_path_candidates.return_value = iter(
+            [None, path_down, path_up]
+        )
+        planned_candidates = []
+
+        def setup_failover_path(candidates):
+            planned_candidates.extend(candidates)
+
+        evc.setup_failover_path.side_effect = setup_failover_path
+        self.planner.plan("1")
+        evc.setup_failover_path.assert_called_once()
+        assert planned_candidates == [path_up]
+
+        evc.setup_failover_path.reset_mock()
+        evc.failover_path = ["link2"]
+        self.planner.plan("1")
+        self.planner.plan("2")
+        evc.setup_failover_path.assert_not_called()
+
+    def test_plan_lazy_candidates(self):
+        """Test candidates after the first usable one aren't created."""
+        evc = get_evc_mocked("1")
+        self.evcs["1"] = evc
+        created = []
+
+        def get_candidates():
+            for i in range(3):
+                created.append(i)
+                yield MagicMock(status=EntityStatus.UP)
+
+        evc.get_failover_path_candidates.side_effect = get_candidates
+
+        def setup_failover_path(candidates):
+            next(candidates)
+
+        evc.setup_failover_path.side_effect = setup_failover_path
+        self.planner.plan("1")
+        evc.setup_failover_path.assert_called_once()
+        assert created == [0]
+
+    @patch.object(FailoverPlanner, "schedule")
+    def test_plan_current_path_changed(self, schedule_mock):
+        """Test the EVC is scheduled again if its current_path changed."""
+        evc = get_evc_mocked("1")
+        self.evcs["1"] = evc
+
+        def get_candidates():
+            evc.current_path = ["link3"]
+            return []
+
+        evc.get_failover_path_candidates.side_effect = get_candidates
+        self.planner.plan("1")
+        evc.setup_failover_path.assert_not_called()
+        schedule_mock.assert_called_once_with(evc)
+
+    def test_workers(self):
+        """Test scheduled EVCs are planned by the workers."""
+        planned = Event()
+        evc = get_evc_mocked("1")
+        self.evcs["1"] = evc
+        evc.get_failover_path_candidates.return_value = []
+        planned_candidates = []
+
+        def setup_failover_path(candidates):
+            planned_candidates.extend(candidates)
+            planned.set()
+
+        evc.setup_failover_path.side_effect = setup_failover_path
+
+        self.planner.schedule(evc)
+        assert planned.wait(5)
+        assert len(self.planner._workers) == 2
+        self.planner.stop()
+        assert not self.planner._workers
+        evc.setup_failover_path.assert_called_once()
+        assert not planned_candidates
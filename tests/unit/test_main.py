@@ -8,10 +8,12 @@ from kytos.lib.helpers import get_controller_mock, get_test_client
 from kytos.core.helpers import now
 from kytos.core.common import EntityStatus
 from kytos.core.events import KytosEvent
-from kytos.core.exceptions import KytosTagError
+from kytos.core.exceptions import KytosNoTagAvailableError, KytosTagError
 from kytos.core.interface import TAGRange, UNI, Interface
+from napps.kytos.mef_eline import settings
 from napps.kytos.mef_eline.exceptions import FlowModException, InvalidPath
 from napps.kytos.mef_eline.models import EVC, Path
+from napps.kytos.mef_eline.persistence import evc_writer
 from napps.kytos.mef_eline.tests.helpers import get_uni_mocked
 
 
@@ -22,6 +24,7 @@ async def test_on_table_enabled():
     controller = get_controller_mock()
     controller.buffers.app.aput = AsyncMock()
     Main.get_eline_controller = MagicMock()
+    evc_writer.interval = 0
     napp = Main(controller)
 
     # Succesfully setting table groups
@@ -67,6 +70,8 @@ class TestMain:
         # pylint: disable=import-outside-toplevel
         from napps.kytos.mef_eline.main import Main
         Main.get_eline_controller = MagicMock()
+        # EVCs are written right away instead of buffered by evc_writer
+        evc_writer.interval = 0
         controller = get_controller_mock()
         self.napp = Main(controller)
         self.api_client = get_test_client(controller, self.napp)
@@ -162,6 +167,8 @@ class TestMain:
             '2': evc2,
             '3': evc3,
         }
+        for evc in self.napp.circuits.values():
+            self.napp.svc_level_index.add(evc)
         assert self.napp.get_evcs_by_svc_level() == [
             evc2,
             evc1,
@@ -209,6 +216,7 @@ class TestMain:
         evc1.execution_rounds = 0
         evc1.deploy.call_count = 0
         self.napp.circuits = {'1': evc1}
+        self.napp.svc_level_index.add(evc1)
         assert self.napp.get_evcs_by_svc_level() == [evc1]
         mock_settings.WAIT_FOR_OLD_PATH = 1
 
@@ -376,6 +384,87 @@ class TestMain:
         assert response.status_code == 200, response.data
         assert not response.json()
 
+    @patch("napps.kytos.mef_eline.main.evc_writer")
+    async def test_list_flushes_pending_writes(self, evc_writer_mock):
+        """Test the circuits are read after the pending writes are flushed."""
+        self.napp.mongo_controller.get_circuits.side_effect = (
+            lambda **_: evc_writer_mock.flush.assert_called_once()
+            or {"circuits": {}}
+        )
+        url = f"{self.base_endpoint}/v2/evc/"
+        response = await self.api_client.get(url)
+        assert response.status_code == 200, response.data
+
+    @patch("napps.kytos.mef_eline.main.evc_writer")
+    async def test_get_persistence_metrics(self, evc_writer_mock):
+        """Test get_persistence_metrics."""
+        evc_writer_mock.get_metrics.return_value = {"flushes": 2}
+        url = f"{self.base_endpoint}/v2/evc/persistence/metrics"
+        response = await self.api_client.get(url)
+        assert response.status_code == 200
+        assert response.json() == {"flushes": 2}
+
+    @patch("napps.kytos.mef_eline.main.get_latency_stats")
+    async def test_get_clients_metrics(self, get_latency_stats_mock):
+        """Test get_clients_metrics."""
+        stats = {"pathfinder": {"POST /api/kytos/pathfinder/v3/": {
+            "count": 2, "errors": 0, "avg": 0.01, "max": 0.02,
+        }}}
+        get_latency_stats_mock.return_value = stats
+        url = f"{self.base_endpoint}/v2/evc/clients/metrics"
+        response = await self.api_client.get(url)
+        assert response.status_code == 200
+        assert response.json() == stats
+
+    @patch("napps.kytos.mef_eline.main.DynamicPathManager")
+    async def test_get_pathfinder_metrics(self, path_manager_mock):
+        """Test get_pathfinder_metrics."""
+        stats = {
+            "epoch": 1, "size": 2, "hits": 3, "misses": 2, "coalesced": 1
+        }
+        path_manager_mock.path_cache.get_stats.return_value = stats
+        url = f"{self.base_endpoint}/v2/evc/pathfinder/metrics"
+        response = await self.api_client.get(url)
+        assert response.status_code == 200
+        assert response.json() == stats
+
+    async def test_list_expands_paths(self):
+        """Test the stored links of paths are expanded from the topology."""
+        link_dict = {
+            "id": "1",
+            "endpoint_a": {"id": "00:00:00:00:00:00:00:01:1", "port": 1},
+            "endpoint_b": {"id": "00:00:00:00:00:00:00:02:1", "port": 1},
+            "metadata": {"s_vlan": {"tag_type": "vlan", "value": 1}},
+        }
+        link = MagicMock()
+        link.as_dict.return_value = link_dict
+        self.napp.controller.links = {"1": link}
+        stored_link = {
+            "id": "1",
+            "endpoint_a": {"id": "00:00:00:00:00:00:00:01:1"},
+            "endpoint_b": {"id": "00:00:00:00:00:00:00:02:1"},
+            "metadata": {"s_vlan": {"tag_type": "vlan", "value": 5}},
+        }
+        unknown_link = {"id": "2", "endpoint_a": {}, "endpoint_b": {}}
+        circuits = {"circuits": {"1": {
+            "id": "1",
+            "current_path": [stored_link, unknown_link],
+            "primary_path": [{**stored_link, "metadata": {}}],
+            "backup_path": [],
+        }}}
+        self.napp.mongo_controller.get_circuits.return_value = circuits
+        url = f"{self.base_endpoint}/v2/evc/"
+        response = await self.api_client.get(url)
+        assert response.status_code == 200
+        circuit = response.json()["1"]
+        assert circuit["current_path"] == [
+            {**link_dict, "metadata": stored_link["metadata"]},
+            unknown_link,
+        ]
+        assert circuit["primary_path"] == [{**link_dict, "metadata": {}}]
+        assert circuit["backup_path"] == []
+        link.as_dict.assert_called_once()
+
     async def test_list_no_circuits_stored(self):
         """Test if list circuits return all circuits stored."""
         circuits = {"circuits": {}}
@@ -999,6 +1088,28 @@ class TestMain:
             sync=False, return_path=True
         )
 
+    async def test_redeploy_evc_make_before_break(self):
+        """Test endpoint to redeploy an EVC with make_before_break."""
+        evc1 = MagicMock()
+        evc1.is_enabled.return_value = True
+        failover_path = evc1.failover_path
+        self.napp.circuits = {"1": evc1, "2": MagicMock()}
+        url = f"{self.base_endpoint}/v2/evc/1/redeploy"
+        response = await self.api_client.patch(
+            url + "?make_before_break=true"
+        )
+        assert response.status_code == 202, response.data
+        evc1.remove_current_flows.assert_not_called()
+        evc1.remove_failover_flows.assert_not_called()
+        evc1.remove_path_flows.assert_called_with(failover_path)
+        assert not evc1.failover_path
+        evc1.deploy.assert_called_with(make_before_break=True)
+
+        response = await self.api_client.patch(
+            url + "?make_before_break=maybe"
+        )
+        assert response.status_code == 400, response.data
+
     async def test_redeploy_evc_disabled(self):
         """Test endpoint to redeploy an EVC."""
         evc1 = MagicMock()
@@ -1431,9 +1542,10 @@ class TestMain:
     def test_get_evcs_by_svc_level(self) -> None:
         """Test get_evcs_by_svc_level."""
         levels = [1, 2, 4, 2, 7]
-        evcs = {i: MagicMock(service_level=v, creation_time=1)
+        evcs = {i: MagicMock(id=i, service_level=v, creation_time=1)
                 for i, v in enumerate(levels)}
-        self.napp.circuits = evcs
+        for evc in evcs.values():
+            self.napp._index_evc(evc)
         expected_levels = sorted(levels, reverse=True)
         evcs_by_level = self.napp.get_evcs_by_svc_level()
         assert evcs_by_level
@@ -1441,21 +1553,32 @@ class TestMain:
         for evc, exp_level in zip(evcs_by_level, expected_levels):
             assert evc.service_level == exp_level
 
-        evcs = {i: MagicMock(service_level=1, creation_time=i)
+        for evc in evcs.values():
+            self.napp._unindex_evc(evc)
+        assert not self.napp.get_evcs_by_svc_level()
+
+        evcs = {i: MagicMock(id=i, service_level=1, creation_time=i)
                 for i in reversed(range(2))}
-        self.napp.circuits = evcs
+        for evc in evcs.values():
+            self.napp._index_evc(evc)
         evcs_by_level = self.napp.get_evcs_by_svc_level()
         for i in range(2):
             assert evcs_by_level[i].creation_time == i
 
-        self.napp.circuits[1].is_enabled = lambda: False
+        evcs[1].is_enabled = lambda: False
         evcs_by_level = self.napp.get_evcs_by_svc_level()
         assert len(evcs_by_level) == 1
 
-        self.napp.circuits[1].is_enabled = lambda: False
+        evcs[1].is_enabled = lambda: False
         evcs_by_level = self.napp.get_evcs_by_svc_level(enable_filter=False)
         assert len(evcs_by_level) == 2
 
+        # service_level changed
+        evcs[1].service_level = 2
+        self.napp.svc_level_index.add(evcs[1])
+        evcs_by_level = self.napp.get_evcs_by_svc_level(enable_filter=False)
+        assert evcs_by_level == [evcs[1], evcs[0]]
+
     async def test_get_circuit_not_found(self):
         """Test /v2/evc/<circuit_id> 404."""
         self.napp.mongo_controller.get_circuit.return_value = None
@@ -1463,7 +1586,7 @@ class TestMain:
         response = await self.api_client.get(url)
         assert response.status_code == 404
 
-    @patch('httpx.post')
+    @patch('napps.kytos.mef_eline.clients.HTTPClient.post')
     @patch("napps.kytos.mef_eline.main.Main._use_uni_tags")
     @patch('napps.kytos.mef_eline.scheduler.Scheduler.add')
     @patch('napps.kytos.mef_eline.controllers.ELineController.update_evc')
@@ -1981,19 +2104,155 @@ class TestMain:
 
     def test_handle_link_up(self):
         """Test handle_link_up method."""
-        evc_mock = create_autospec(EVC)
-        evc_mock.service_level, evc_mock.creation_time = 0, 1
-        evc_mock.is_enabled = MagicMock(side_effect=[
-            True, False, True, True, True
-        ])
-        evc_mock.lock = MagicMock()
-        evc_mock.archived = False
-        evcs = [evc_mock, evc_mock, evc_mock]
-        event = KytosEvent(name="test", content={"link": "abc"})
-        self.napp.circuits = dict(zip(["1", "2", "3"], evcs))
+        evcs = []
+        for i in range(4):
+            evc_mock = create_autospec(EVC)
+            evc_mock.id = str(i)
+            evc_mock.service_level, evc_mock.creation_time = 0, i
+            evc_mock.is_enabled.return_value = True
+            evc_mock.is_active.return_value = True
+            evc_mock.dynamic_backup_path = False
+            evc_mock.lock = MagicMock()
+            evc_mock.archived = False
+            evc_mock.should_revert_to_primary_path.return_value = False
+            evcs.append(evc_mock)
+        # evcs[0] is disabled and evcs[1] uses the link on primary_path
+        evcs[0].is_enabled.return_value = False
+        # evcs[2] is an inactive dynamic EVC, evcs[3] isn't affected
+        evcs[2].dynamic_backup_path = True
+        evcs[2].is_active.return_value = False
+        self.napp.link_index = MagicMock()
+        self.napp.link_index.get_evcs.return_value = evcs[:2]
+        self.napp.link_index.get_inactive_dynamic_evcs.return_value = [
+            evcs[2]
+        ]
+        link = MagicMock(id="abc")
+        event = KytosEvent(name="test", content={"link": link})
+        self.napp.circuits = {evc.id: evc for evc in evcs}
+        self.napp.handle_link_up(event)
+        self.napp.link_index.get_evcs.assert_called_with(
+            "abc", ("primary_path", "backup_path")
+        )
+        evcs[0].handle_link_up.assert_not_called()
+        evcs[1].handle_link_up.assert_called_with(link)
+        evcs[2].handle_link_up.assert_called_with(link)
+        evcs[3].handle_link_up.assert_not_called()
+
+    @patch("napps.kytos.mef_eline.main.emit_event")
+    def test_handle_link_up_revert_to_primary(self, emit_event_mock):
+        """Test handle_link_up reverting EVCs to primary_path in bulk."""
+        evcs = []
+        for i in range(3):
+            evc_mock = create_autospec(EVC)
+            evc_mock.id = str(i)
+            evc_mock.service_level, evc_mock.creation_time = 0, i
+            evc_mock.is_enabled.return_value = True
+            evc_mock.is_active.return_value = True
+            evc_mock.dynamic_backup_path = False
+            evc_mock.lock = MagicMock()
+            evc_mock.archived = False
+            evc_mock.should_revert_to_primary_path.return_value = True
+            evcs.append(evc_mock)
+        evcs[2].should_revert_to_primary_path.return_value = False
+        self.napp.link_index = MagicMock()
+        self.napp.link_index.get_evcs.return_value = evcs
+        self.napp.link_index.get_inactive_dynamic_evcs.return_value = []
+        self.napp.circuits = {evc.id: evc for evc in evcs}
+        self.napp.mongo_controller = MagicMock()
+        self.napp.execute_revert_to_primary = MagicMock(
+            return_value=([evcs[0]], [evcs[1]])
+        )
+        link = MagicMock(id="abc")
+        event = KytosEvent(name="test", content={"link": link})
         self.napp.handle_link_up(event)
-        assert evc_mock.handle_link_up.call_count == 2
-        evc_mock.handle_link_up.assert_called_with("abc")
+
+        self.napp.execute_revert_to_primary.assert_called_with(evcs[:2])
+        evcs[0].handle_link_up.assert_not_called()
+        evcs[1].handle_link_up.assert_called_with(link)
+        evcs[2].handle_link_up.assert_called_with(link)
+        assert emit_event_mock.call_count == 1
+        assert emit_event_mock.call_args[0][1] == "redeployed_link_up"
+        self.napp.mongo_controller.update_evcs.assert_called_with(
+            [evcs[0].as_document()], trusted=True
+        )
+
+    @patch("napps.kytos.mef_eline.main.Path.choose_vlans_bulk")
+    @patch("napps.kytos.mef_eline.main.send_flow_mods_http")
+    def test_execute_revert_to_primary(
+        self, send_flow_mods_mock, choose_vlans_bulk_mock
+    ):
+        """Test execute_revert_to_primary method."""
+        evc1 = MagicMock(id="1")
+        evc2 = MagicMock(id="2")
+        evc3 = MagicMock(id="3")
+        primary_path1 = evc1.primary_path
+        choose_vlans_bulk_mock.return_value = {
+            1: KytosNoTagAvailableError(MagicMock())
+        }
+        self.napp.prepare_revert_to_primary_flows = {
+            evc1: ({"1": ["Delete1"]}, {"1": ["Install1"]}),
+            evc3: ({}, {}),
+        }.get
+
+        success, failure = self.napp.execute_revert_to_primary(
+            [evc1, evc2, evc3]
+        )
+        assert success == [evc1]
+        assert failure == [evc2, evc3]
+        choose_vlans_bulk_mock.assert_called_once_with(
+            self.napp.controller,
+            [evc1.primary_path, evc2.primary_path, evc3.primary_path],
+        )
+        send_flow_mods_mock.assert_has_calls([
+            call({"1": ["Delete1"]}, "delete"),
+            call({"1": ["Install1"]}, "install"),
+        ])
+        assert evc1.current_path == primary_path1
+        evc1.deactivate.assert_called()
+        evc1.try_to_activate.assert_called()
+        evc3.primary_path.make_vlans_available.assert_called()
+
+    @patch("napps.kytos.mef_eline.main.send_flow_mods_http")
+    @patch("napps.kytos.mef_eline.main.Path.choose_vlans_bulk")
+    def test_execute_revert_to_primary_exception(
+        self, choose_vlans_bulk_mock, send_flow_mods_mock
+    ):
+        """Test execute_revert_to_primary when a flow mod fails."""
+        choose_vlans_bulk_mock.return_value = {}
+        evc1 = MagicMock(id="1")
+        current_path = evc1.current_path
+        self.napp.prepare_revert_to_primary_flows = MagicMock(
+            return_value=({"1": ["Delete1"]}, {"1": ["Install1"]})
+        )
+        send_flow_mods_mock.side_effect = FlowModException("error")
+
+        success, failure = self.napp.execute_revert_to_primary([evc1])
+        assert success == []
+        assert failure == [evc1]
+        assert evc1.current_path == current_path
+        evc1.primary_path.make_vlans_available.assert_called()
+        evc1.deactivate.assert_not_called()
+
+    @patch(
+        "napps.kytos.mef_eline.main.DynamicPathManager.handle_topology_event"
+    )
+    def test_on_topology_changed(self, handle_topology_event_mock):
+        """Test topology changes are handled by DynamicPathManager."""
+        self.napp.handle_link_up = MagicMock()
+        self.napp.handle_link_down = MagicMock()
+        self.napp.schedule_missing_failover_paths = MagicMock()
+        events = [MagicMock(), MagicMock(), MagicMock()]
+        self.napp.on_topology_changed(events[0])
+        self.napp.on_link_up(events[1])
+        self.napp.on_link_down(events[2])
+        assert handle_topology_event_mock.call_args_list == [
+            call(event) for event in events
+        ]
+        self.napp.handle_link_up.assert_called_once()
+        self.napp.handle_link_down.assert_called_once()
+        self.napp.schedule_missing_failover_paths.assert_called_once_with(
+            events[1].content["link"]
+        )
 
     def test_handle_link_down(
         self
@@ -2029,16 +2288,11 @@ class TestMain:
 
         default_clear_failover = [evc5, evc6]
 
-        self.napp.get_evcs_by_svc_level = MagicMock()
-
-        self.napp.get_evcs_by_svc_level.return_value = [
-            evc1,
-            evc2,
-            evc3,
-            evc4,
-            evc5,
-            evc6,
-        ]
+        evcs = [evc1, evc2, evc3, evc4, evc5, evc6]
+        for i, evc in enumerate(evcs):
+            evc.service_level, evc.creation_time = 0, i
+        self.napp.link_index = MagicMock()
+        self.napp.link_index.get_evcs.return_value = list(reversed(evcs))
 
         self.napp.execute_swap_to_failover = MagicMock()
 
@@ -2064,11 +2318,15 @@ class TestMain:
         self.napp.execute_undeploy.return_value =\
             undeploy_success, undeploy_failure
 
+        self.napp.prefetch_dynamic_paths = MagicMock()
+
         link = MagicMock(id="123")
-        event = KytosEvent(name="test", content={"link": link})
 
-        self.napp.handle_link_down(event)
+        self.napp.handle_links_down([link])
 
+        self.napp.link_index.get_evcs.assert_called_with(
+            "123", ("current_path", "failover_path")
+        )
         self.napp.execute_swap_to_failover.assert_called_with(
             default_swap_to_failover
         )
@@ -2084,12 +2342,114 @@ class TestMain:
         ])
 
         self.napp.mongo_controller.update_evcs.assert_called_with([
-            evc3.as_dict(),
-            evc5.as_dict(),
-            evc1.as_dict(),
-            evc4.as_dict(),
-            evc6.as_dict(),
-        ])
+            evc3.as_document(),
+            evc5.as_document(),
+            evc1.as_document(),
+            evc4.as_document(),
+            evc6.as_document(),
+        ], trusted=True)
+        self.napp.prefetch_dynamic_paths.assert_called_once_with(
+            undeploy_success
+        )
+
+    @patch("napps.kytos.mef_eline.main.emit_event")
+    def test_handle_links_down_multiple_links(self, emit_event_mock):
+        """Test handle_links_down with the links of a switch."""
+        link1, link2 = MagicMock(id="1"), MagicMock(id="2")
+        evc1 = MagicMock(id="1", service_level=0, creation_time=1)
+        evc1.is_affected_by_link.side_effect = lambda link: link is link2
+        evc1.is_failover_path_affected_by_link.side_effect = (
+            lambda link: link is link1
+        )
+        evc2 = MagicMock(id="2", service_level=0, creation_time=2)
+        evc2.is_affected_by_link.side_effect = lambda link: link is link1
+        evc2.is_failover_path_affected_by_link.return_value = False
+        self.napp.link_index = MagicMock()
+        self.napp.link_index.get_evcs.side_effect = [[evc1, evc2], [evc1]]
+        self.napp.execute_swap_to_failover = MagicMock(
+            return_value=([evc2], [])
+        )
+        self.napp.execute_clear_failover = MagicMock(
+            return_value=([evc2], [])
+        )
+        self.napp.execute_undeploy = MagicMock(return_value=([evc1], []))
+        self.napp.prefetch_dynamic_paths = MagicMock()
+
+        self.napp.handle_links_down([link1, link2])
+
+        self.napp.execute_swap_to_failover.assert_called_once_with([evc2])
+        self.napp.execute_clear_failover.assert_called_once_with([evc2])
+        self.napp.execute_undeploy.assert_called_once_with([evc1])
+        self.napp.mongo_controller.update_evcs.assert_called_once_with([
+            evc2.as_document(), evc1.as_document()
+        ], trusted=True)
+        self.napp.prefetch_dynamic_paths.assert_called_once_with([evc1])
+        emit_event_mock.assert_called_once_with(
+            self.napp.controller, "need_redeploy", content={"evc_id": "1"}
+        )
+
+    @patch("napps.kytos.mef_eline.main.evc_writer")
+    def test_write_evcs(self, evc_writer_mock):
+        """Test write_evcs syncs the EVCs while evc_writer is running."""
+        evc1, evc2 = MagicMock(id="1"), MagicMock(id="2")
+        evc_writer_mock.running = True
+        self.napp.write_evcs([evc1, evc2])
+        evc1.sync.assert_called_once_with(trusted=True)
+        evc2.sync.assert_called_once_with(trusted=True)
+        evc_writer_mock.flush.assert_not_called()
+        self.napp.mongo_controller.update_evcs.assert_not_called()
+
+        evc_writer_mock.running = False
+        self.napp.write_evcs([evc1, evc2])
+        self.napp.mongo_controller.update_evcs.assert_called_once_with(
+            [evc1.as_document(), evc2.as_document()], trusted=True
+        )
+        assert evc1.sync.call_count == 1
+
+    @patch("napps.kytos.mef_eline.main.evc_writer")
+    def test_load_all_evcs_flushes_pending_writes(self, evc_writer_mock):
+        """Test load_all_evcs flushes the pending writes before reading."""
+        self.napp.mongo_controller.get_circuits.side_effect = (
+            lambda: evc_writer_mock.flush.assert_called_once()
+            or {"circuits": {}}
+        )
+        self.napp.load_all_evcs()
+        self.napp.mongo_controller.get_circuits.assert_called_once()
+
+    @patch("napps.kytos.mef_eline.main.Timer")
+    def test_handle_link_down_aggregation(self, timer_mock):
+        """Test link_down events are aggregated in a single batch."""
+        link1, link2, link3 = (
+            MagicMock(id="1"), MagicMock(id="2"), MagicMock(id="3")
+        )
+        self.napp.handle_links_down = MagicMock()
+        self.napp.link_index = MagicMock()
+        self.napp.link_index.get_evcs.return_value = []
+        for link in (link1, link2, link3):
+            self.napp.handle_link_down(
+                KytosEvent(name="test", content={"link": link})
+            )
+        self.napp.handle_link_up(
+            KytosEvent(name="test", content={"link": link3})
+        )
+        timer_mock.assert_called_once_with(
+            settings.LINK_DOWN_AGGREGATION_DELAY,
+            self.napp.handle_pending_links_down,
+        )
+        timer_mock.return_value.start.assert_called_once()
+        self.napp.handle_links_down.assert_not_called()
+
+        self.napp.handle_pending_links_down()
+        self.napp.handle_links_down.assert_called_once_with([link1, link2])
+        assert not self.napp._links_down
+        assert self.napp._links_down_timer is None
+
+        self.napp.handle_pending_links_down()
+        self.napp.handle_links_down.assert_called_once()
+        self.napp.handle_link_down(
+            KytosEvent(name="test", content={"link": link1})
+        )
+        assert timer_mock.call_count == 2
 
     @patch("napps.kytos.mef_eline.main.emit_event")
     @patch("napps.kytos.mef_eline.main.send_flow_mods_http")
@@ -2313,12 +2673,35 @@ class TestMain:
         evc1.deactivate.assert_called()
         evc2.deactivate.assert_not_called()
 
-        emit_main_mock.assert_called_with(
-            self.napp.controller,
-            "need_redeploy",
-            content={"evc_id": "1"}
+        # need_redeploy is emitted by handle_links_down
+        emit_main_mock.assert_not_called()
+
+    @patch("napps.kytos.mef_eline.main.DynamicPathManager")
+    def test_prefetch_dynamic_paths(self, path_manager_mock):
+        """Test prefetch_dynamic_paths only requests dynamic EVCs."""
+        path_manager_mock.path_cache.max_size = 1024
+        evc1 = MagicMock(id="1", dynamic_backup_path=True)
+        evc1.is_intra_switch.return_value = False
+        evc1.primary_path.status = EntityStatus.DOWN
+        evc1.backup_path.status = EntityStatus.DISABLED
+        evc2 = MagicMock(id="2", dynamic_backup_path=True)
+        evc2.is_intra_switch.return_value = False
+        evc2.primary_path.status = EntityStatus.UP
+        evc3 = MagicMock(id="3", dynamic_backup_path=False)
+
+        self.napp.prefetch_dynamic_paths([evc1, evc2, evc3])
+        path_manager_mock.get_best_paths_batch.assert_called_once_with(
+            [evc1]
         )
 
+        path_manager_mock.get_best_paths_batch.reset_mock()
+        self.napp.prefetch_dynamic_paths([evc2, evc3])
+        path_manager_mock.get_best_paths_batch.assert_not_called()
+
+        path_manager_mock.path_cache.max_size = 0
+        self.napp.prefetch_dynamic_paths([evc1])
+        path_manager_mock.get_best_paths_batch.assert_not_called()
+
     @patch("napps.kytos.mef_eline.main.emit_event")
     @patch("napps.kytos.mef_eline.main.send_flow_mods_http")
     def test_execute_undeploy_exception(
@@ -2543,22 +2926,65 @@ class TestMain:
     @patch('napps.kytos.mef_eline.main.Main._load_evc')
     def test_load_all_evcs(self, load_evc_mock):
         """Test load_evcs method"""
+        stored_link = {
+            "id": "link1",
+            "endpoint_a": {"id": "00:00:00:00:00:00:00:01:1"},
+            "endpoint_b": {"id": "00:00:00:00:00:00:00:02:1"},
+            "metadata": {"s_vlan": {"tag_type": "vlan", "value": 100}},
+        }
+        link_dict = {
+            "id": "link1",
+            "endpoint_a": {"id": "00:00:00:00:00:00:00:01:1", "port": 1},
+            "endpoint_b": {"id": "00:00:00:00:00:00:00:02:1", "port": 1},
+            "metadata": {"link_name": "link1"},
+        }
+        link = MagicMock()
+        link.as_dict.return_value = link_dict
+        self.napp.controller.links = {"link1": link}
         mock_circuits = {
             'circuits': {
-                1: 'circuit_1',
-                2: 'circuit_2',
-                3: 'circuit_3',
-                4: 'circuit_4'
+                i: {"id": i, "current_path": [stored_link]}
+                for i in range(1, 5)
             }
         }
         self.napp.mongo_controller.get_circuits.return_value = mock_circuits
         self.napp.circuits = {2: 'circuit_2', 3: 'circuit_3'}
+        evcs = {
+            1: MagicMock(id=1, service_level=0, creation_time=1),
+            4: MagicMock(id=4, service_level=1, creation_time=4),
+        }
+
+        def load_evc(circuit, index=True):
+            assert not index
+            evc = evcs[circuit["id"]]
+            self.napp.circuits[evc.id] = evc
+            return evc
+
+        load_evc_mock.side_effect = load_evc
         self.napp.load_all_evcs()
-        load_evc_mock.assert_has_calls([call('circuit_1'), call('circuit_4')])
+        load_evc_mock.assert_has_calls([
+            call(mock_circuits["circuits"][1], index=False),
+            call(mock_circuits["circuits"][4], index=False),
+        ])
+        assert self.napp.get_evcs_by_svc_level(enable_filter=False) == [
+            evcs[4], evcs[1]
+        ]
         assert self.napp.controller.buffers.app.put.call_count > 1
         call_args = self.napp.controller.buffers.app.put.call_args[0]
         assert call_args[0].name == "kytos/mef_eline.evcs_loaded"
-        assert dict(call_args[0].content) == mock_circuits["circuits"]
+        expanded_link = {
+            **link_dict,
+            "metadata": {
+                "link_name": "link1",
+                "s_vlan": {"tag_type": "vlan", "value": 100},
+            },
+        }
+        assert dict(call_args[0].content) == {
+            i: {"id": i, "current_path": [expanded_link]}
+            for i in range(1, 5)
+        }
+        # The stored circuits aren't expanded
+        assert mock_circuits["circuits"][1]["current_path"] == [stored_link]
         timeout_d = {"timeout": 1}
         assert self.napp.controller.buffers.app.put.call_args[1] == timeout_d
 
@@ -2905,6 +3331,41 @@ class TestMain:
         assert mock_down.call_count == 3
         assert mock_up.call_count == 2
 
+    @patch("napps.kytos.mef_eline.main._does_uni_affect_evc")
+    def test_handle_interface_link_up(self, mock_affect):
+        """Test handle_interface_link_up only visits indexed EVCs."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=2)
+        evc2 = MagicMock(id="2", service_level=5, creation_time=1)
+        evc3 = MagicMock(id="3", service_level=0, creation_time=1)
+        evc3.is_enabled.return_value = False
+        self.napp.uni_index = MagicMock()
+        self.napp.uni_index.get_evcs.return_value = [evc1, evc2, evc3]
+        mock_affect.side_effect = [True, False]
+        interface = MagicMock(id="intf1")
+
+        self.napp.handle_interface_link_up(interface)
+        self.napp.uni_index.get_evcs.assert_called_with("intf1")
+        assert mock_affect.call_args_list == [
+            call(evc2, interface, "up"), call(evc1, interface, "up")
+        ]
+        evc2.handle_interface_link_up.assert_called_with(interface)
+        evc1.handle_interface_link_up.assert_not_called()
+        evc3.handle_interface_link_up.assert_not_called()
+
+    @patch("napps.kytos.mef_eline.main._does_uni_affect_evc")
+    def test_handle_interface_link_down(self, mock_affect):
+        """Test handle_interface_link_down only visits indexed EVCs."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=1)
+        self.napp.uni_index = MagicMock()
+        self.napp.uni_index.get_evcs.return_value = [evc1]
+        mock_affect.return_value = True
+        interface = MagicMock(id="intf1")
+
+        self.napp.handle_interface_link_down(interface)
+        self.napp.uni_index.get_evcs.assert_called_with("intf1")
+        mock_affect.assert_called_with(evc1, interface, "down")
+        evc1.handle_interface_link_down.assert_called_with(interface)
+
     def test_handle_evc_deployed(
         self,
     ):
@@ -2935,8 +3396,12 @@ class TestMain:
             }
         )
 
+        self.napp.failover_planner = MagicMock()
+        self.napp.failover_planner.needs_failover.side_effect = (
+            lambda evc: evc.is_eligible_for_failover_path()
+        )
         self.napp.handle_evc_deployed(event)
-        evc1.setup_failover_path.assert_called()
+        self.napp.failover_planner.schedule.assert_called_once_with(evc1)
 
         event = KytosEvent(
             name="kytos/mef_eline.need_failover",
@@ -2946,7 +3411,33 @@ class TestMain:
         )
 
         self.napp.handle_evc_deployed(event)
-        evc2.setup_failover_path.assert_not_called()
+        self.napp.failover_planner.schedule.assert_called_once_with(evc1)
+        evc1.setup_failover_path.assert_not_called()
+
+    def test_schedule_missing_failover_paths(self):
+        """Test schedule_missing_failover_paths only visits the EVCs of
+        the link and of its endpoints."""
+        evc1 = MagicMock(id="1", service_level=0, creation_time=1)
+        evc2 = MagicMock(id="2", service_level=0, creation_time=2)
+        link = MagicMock(id="123")
+        link.endpoint_a.id = "00:00:00:00:00:00:00:01:1"
+        link.endpoint_b.id = "00:00:00:00:00:00:00:02:1"
+        self.napp.link_index = MagicMock()
+        self.napp.link_index.get_evcs.return_value = [evc1]
+        self.napp.uni_index = MagicMock()
+        self.napp.uni_index.get_evcs.side_effect = [[evc1, evc2], []]
+        self.napp.failover_planner = MagicMock()
+        self.napp.failover_planner.needs_failover.side_effect = [True, False]
+        self.napp.schedule_missing_failover_paths(link)
+        self.napp.link_index.get_evcs.assert_called_once_with("123")
+        assert self.napp.uni_index.get_evcs.call_args_list == [
+            call("00:00:00:00:00:00:00:01:1"),
+            call("00:00:00:00:00:00:00:02:1"),
+        ]
+        assert self.napp.failover_planner.needs_failover.call_args_list == [
+            call(evc1), call(evc2)
+        ]
+        self.napp.failover_planner.schedule.assert_called_once_with(evc1)
 
     def test_load_default_evc_values(self):
         """Test load_default_evc_values using Attributes scheme from
@@ -0,0 +1,83 @@
+"""Module to test the persistence.py file."""
+from threading import Event
+from unittest.mock import MagicMock
+
+from napps.kytos.mef_eline.persistence import EVCWriteBehind
+
+
+class TestEVCWriteBehind:
+    """Test the EVCWriteBehind class."""
+
+    def setup_method(self):
+        """Set up a writer flushing to a mocked ELineController."""
+        self.mongo_controller = MagicMock()
+        self.mongo_controller.get_upsert_fields.side_effect = (
+            lambda evc, trusted: dict(evc)
+        )
+        self.mongo_controller.get_update_fields.side_effect = (
+            lambda evc, trusted: dict(evc)
+        )
+        self.writer = EVCWriteBehind(interval=60, max_pending=3)
+        self.writer.mongo_controller = self.mongo_controller
+
+    def teardown_method(self):
+        """Stop the writer thread."""
+        self.writer.stop()
+
+    def test_flush(self):
+        """Test the writes of each EVC are merged and flushed in bulk."""
+        self.writer.upsert_evc({"id": "1", "active": False, "name": "a"})
+        self.writer.update_evc({"id": "1", "active": True})
+        self.writer.update_evc({"id": "2", "current_path": []})
+        assert self.writer.flush() == 2
+        self.mongo_controller.write_evcs.assert_called_once_with({
+            "1": ({"id": "1", "active": True, "name": "a"}, True),
+            "2": ({"id": "2", "current_path": []}, False),
+        })
+        assert not self.writer.flush()
+        assert self.mongo_controller.write_evcs.call_count == 1
+
+        metrics = self.writer.get_metrics()
+        assert metrics["writes"] == 3
+        assert metrics["flushed"] == 2
+        assert metrics["flushes"] == 1
+        assert metrics["pending"] == 0
+
+    def test_flush_error(self):
+        """Test the writes of a failed flush are kept under newer ones."""
+        self.mongo_controller.write_evcs.side_effect = [
+            ConnectionError("down"), None
+        ]
+        self.writer.upsert_evc({"id": "1", "active": False, "name": "a"})
+        assert not self.writer.flush()
+        self.writer.update_evc({"id": "1", "active": True})
+        assert self.writer.flush() == 1
+        self.mongo_controller.write_evcs.assert_called_with({
+            "1": ({"id": "1", "active": True, "name": "a"}, True),
+        })
+        assert self.writer.get_metrics()["errors"] == 1
+
+    def test_start_stop(self):
+        """Test pending writes are flushed by the thread and on stop."""
+        flushed = Event()
+        self.mongo_controller.write_evcs.side_effect = (
+            lambda _: flushed.set()
+        )
+        self.writer.start(self.mongo_controller)
+        assert self.writer.running
+        for evc_id in ("1", "2", "3"):
+            self.writer.update_evc({"id": evc_id, "active": True})
+        assert flushed.wait(5)
+
+        self.writer.update_evc({"id": "4", "active": True})
+        self.writer.stop()
+        assert not self.writer.running
+        self.mongo_controller.write_evcs.assert_called_with({
+            "4": ({"id": "4", "active": True}, False),
+        })
+
+    def test_start_disabled(self):
+        """Test an interval of 0 doesn't buffer the writes."""
+        writer = EVCWriteBehind(interval=0)
+        writer.start(self.mongo_controller)
+        assert not writer.running
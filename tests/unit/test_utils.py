@@ -6,7 +6,8 @@ from kytos.core.common import EntityStatus
 from napps.kytos.mef_eline.utils import (compare_endpoint_trace,
                                          compare_uni_out_trace,
                                          get_vlan_tags_and_masks, map_dl_vlan,
-                                         merge_flow_dicts, prepare_delete_flow,
+                                         max_power2_divisor, merge_flow_dicts,
+                                         prepare_delete_flow,
                                          _does_uni_affect_evc)
 
 
@@ -103,6 +104,20 @@ class TestUtils:
                     "130/4094",
                     "132/4092"
                 ]
+            ),
+            (
+                [[0, 1], [2, 3]],
+                ["0/4092"]
+            ),
+            (
+                [[130, 135], [128, 131], [1, 4094]],
+                [
+                    1, "2/4094", "4/4092", "8/4088", "16/4080", "32/4064",
+                    "64/4032", "128/3968", "256/3840", "512/3584",
+                    "1024/3072", "2048/3072", "3072/3584", "3584/3840",
+                    "3840/3968", "3968/4032", "4032/4064", "4064/4080",
+                    "4080/4088", "4088/4092", "4092/4094", 4094
+                ]
             )
         ]
     )
@@ -110,6 +125,20 @@ class TestUtils:
         """Test get_vlan_tags_and_masks"""
         assert get_vlan_tags_and_masks(vlan_range) == expected
 
+    def test_get_vlan_tags_and_masks_cache(self):
+        """Test get_vlan_tags_and_masks returns a copy of the cached list"""
+        masks_list = get_vlan_tags_and_masks([[10, 13]])
+        masks_list.append(100)
+        assert get_vlan_tags_and_masks([[10, 13]]) == ["10/4094", "12/4094"]
+
+    @pytest.mark.parametrize(
+        "number,expected",
+        [(0, 4096), (1, 1), (12, 4), (2048, 2048), (8192, 4096)]
+    )
+    def test_max_power2_divisor(self, number, expected):
+        """Test max_power2_divisor"""
+        assert max_power2_divisor(number) == expected
+
     @pytest.mark.parametrize(
         "src1,src2,src3,expected",
         [
@@ -1,16 +1,12 @@
 """Utility functions."""
+from functools import lru_cache
 from typing import Union
 
-import httpx
-from tenacity import (retry, retry_if_exception_type, stop_after_attempt,
-                      wait_combine, wait_fixed, wait_random)
-
 from kytos.core.common import EntityStatus
 from kytos.core.events import KytosEvent
 from kytos.core.interface import Interface, TAGRange
-from kytos.core.retry import before_sleep
 from napps.kytos.mef_eline import settings
-from napps.kytos.mef_eline.exceptions import FlowModException
+from napps.kytos.mef_eline.dispatcher import flow_mod_dispatcher
 
 
 def map_evc_event_content(evc, **kwargs) -> dict:
@@ -101,28 +97,57 @@ def compare_uni_out_trace(
 
 
 def max_power2_divisor(number: int, limit: int = 4096) -> int:
-    """Get the max power of 2 that is divisor of number"""
-    while number % limit > 0:
-        limit //= 2
-    return limit
+    """Get the max power of 2 that is divisor of number, up to limit.
+
+    limit must be a power of 2.
+    """
+    lowest_bit = number & -number
+    if not lowest_bit or lowest_bit > limit:
+        return limit
+    return lowest_bit
 
 
 def get_vlan_tags_and_masks(tag_ranges: list[list[int]]) -> list[int, str]:
-    """Get a list of vlan/mask pairs for a given list of ranges."""
+    """Get a list of vlan/mask pairs for a given list of ranges.
+
+    The ranges are merged first, so the fewest vlan/mask pairs matching
+    exactly their tags are returned. Results are cached by tag ranges.
+    """
+    key = tuple((start, end) for start, end in tag_ranges)
+    return list(_get_vlan_tags_and_masks(key))
+
+
+@lru_cache(maxsize=settings.VLAN_MASKS_CACHE_SIZE)
+def _get_vlan_tags_and_masks(tag_ranges: tuple[tuple[int, int]]) -> tuple:
+    """Cached get_vlan_tags_and_masks of a tuple of ranges.
+
+    Each merged range is split greedily into the largest aligned power of
+    2 blocks, which is the minimal decomposition of a range into prefix
+    masks.
+    """
+    merged = []
+    for start, end in sorted(tag_ranges):
+        if start > end:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
     masks_list = []
-    for start, end in tag_ranges:
+    for start, end in merged:
         limit = end + 1
         while start < limit:
-            divisor = max_power2_divisor(start)
-            while divisor > limit - start:
-                divisor //= 2
-            mask = 4096 - divisor
-            if mask == 4095:
+            divisor = min(
+                max_power2_divisor(start),
+                1 << ((limit - start).bit_length() - 1),
+            )
+            if divisor == 1:
                 masks_list.append(start)
             else:
-                masks_list.append(f"{start}/{mask}")
+                masks_list.append(f"{start}/{4096 - divisor}")
             start += divisor
-    return masks_list
+    return tuple(masks_list)
 
 
 def make_uni_list(list_circuits: list) -> list:
@@ -170,13 +195,6 @@ def send_flow_mods_event(
         )
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_combine(wait_fixed(3), wait_random(min=2, max=7)),
-    retry=retry_if_exception_type(FlowModException),
-    before_sleep=before_sleep,
-    reraise=True,
-)
 def send_flow_mods_http(
     flow_dict: dict[str, list],
     action: str, force=True
@@ -198,17 +216,8 @@ def send_flow_mods_http(
         for (dpid, flows) in flow_dict.items()
     }
 
-    try:
-        if action == "install":
-            res = httpx.post(endpoint, json=formatted_dict, timeout=30)
-        elif action == "delete":
-            res = httpx.request(
-                "DELETE", endpoint, json=formatted_dict, timeout=30
-            )
-    except httpx.RequestError as err:
-        raise FlowModException(str(err)) from err
-    if res.is_server_error or res.status_code >= 400:
-        raise FlowModException(res.text)
+    method = "POST" if action == "install" else "DELETE"
+    flow_mod_dispatcher.send(method, endpoint, formatted_dict, coalesce=True)
 
 
 def prepare_delete_flow(evc_flows: dict[str, list[dict]]):